@@ -1,33 +1,63 @@
+import time
+_startup_started = time.perf_counter()  # Startup is timed from the first import
+
+from app_settings import load_settings
+load_settings()  # .env, before the services imported below read their settings
+
 import math
-import numpy as np
 from PyQt5 import QtCore, QtGui, QtWidgets
-from PyQt5.QtGui import QMovie, QPolygonF, QImage, QPixmap
+from api_endpoints import APIEndpoints, api
+from PyQt5.QtGui import QMovie, QPolygonF
 from PyQt5.QtWidgets import QFileDialog, QMainWindow, QGraphicsView, QMessageBox, QDialog, QTableWidgetItem, \
     QGraphicsPolygonItem, QMenu, QWidget, QHBoxLayout, QLabel, QSpinBox
-from PyQt5.QtCore import Qt, QRectF, QPointF
+from PyQt5.QtCore import Qt, QPointF
 from PyQt5.QtGui import QPen, QColor
 from PyQt5.QtWidgets import QGraphicsRectItem
-import fitz  # PyMuPDF
-import cv2
 import os
 
-from ultralytics import YOLO
+from lazy_imports import lazy_import, load_times, preload
+
+# Heavy modules are imported on first use to keep startup short
+fitz = lazy_import('fitz')  # PyMuPDF
+cv2 = lazy_import('cv2')
+requests = lazy_import('requests')
+
+from model_service import yolo_service
+from page_cache import page_raster_cache
+from render_service import render_service
 from ui_smart_metrology import Ui_MainWindow
 from dialogs import DimensionDialog, PDFPreviewDialog, PartNumberDialog, LoginDialog, OperationsDialog, MeasurementInstrumentDialog, BluetoothDialog, ReportFolderDialog
 import re
 from events import EventHandler, ViewEvents, TableEvents, VisualizationEvents
 from graphics import CustomGraphicsView
-from algorithms import DimensionParser, ImageProcessor, BoundingBoxUtils, ClusterDetector, OCRProcessor,ZoneDetector
-import requests
-from PyQt5.QtWidgets import QGraphicsPolygonItem, QGraphicsPathItem, QGraphicsTextItem, QGraphicsEllipseItem
-from api_endpoints import APIEndpoints, api
+from algorithms import ImageProcessor, BoundingBoxUtils, ClusterDetector, OCRProcessor,ZoneDetector
+from detection_engine import DimensionParser, detection_engine
+from PyQt5.QtWidgets import QGraphicsPathItem, QGraphicsTextItem, QGraphicsEllipseItem
+from drawing_cache import drawing_cache
+from batch_submit import RowSubmissionWorker
+from order_directory import order_directory
+from warmup import WarmupScheduler, detector_warmup_allowed
 import json
-import asyncio
-from bleak import BleakClient
 import tempfile
 import uuid
 from PyQt5 import QtPrintSupport
 
+
+# Startup, can be overridden in .env
+#   STARTUP_BUDGET_MS: Milliseconds from launch until the main window is shown before a warning is printed
+DEFAULT_STARTUP_BUDGET_MS = 1500
+
+
+def report_startup_time():
+    """Print the time from launch until the main window was shown, against the budget"""
+    elapsed_ms = (time.perf_counter() - _startup_started) * 1000
+    budget_ms = float(os.getenv('STARTUP_BUDGET_MS', DEFAULT_STARTUP_BUDGET_MS))
+    print(f"Main window shown after {elapsed_ms:.0f} ms (budget {budget_ms:.0f} ms)")
+    if elapsed_ms > budget_ms:
+        deferred = ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in load_times.items())
+        print(f"Warning: startup exceeded its budget; deferred modules loaded during startup: {deferred or 'none'}")
+
+
 class PDFProcessStatus:
     PREPARING = "Preparing document..."
     OPENING = "Opening document..."
@@ -117,13 +147,6 @@ class MainWindow(QMainWindow):
         self.pdf_results = None
         self.bbox_data = {'ocr': [], 'yolo': []}  # Dictionary to store bbox data
 
-        # Initialize YOLO model
-        try:
-            self.yolo_model = YOLO(r'D:\siri\calipers\prometrix\prometrix\best.pt')
-        except Exception as e:
-            print(f"Error loading YOLO model: {str(e)}")
-            self.yolo_model = None
-
         # Set the main window reference
         self.ui.pdf_view.main_window = self
 
@@ -183,6 +206,9 @@ class MainWindow(QMainWindow):
         # Ensure window opens maximized
         self.showMaximized()
 
+        # Load the detector, libraries and API session in the background once the window is up
+        self.setup_warmup()
+
         # Connect save action
         self.ui.actionSave.triggered.connect(self.save_to_database)
 
@@ -196,6 +222,8 @@ class MainWindow(QMainWindow):
         self.current_image = None
         self.vertical_lines = None
         self.horizontal_lines = None
+        self.zone_grid = None  # Cached field-division grid of the loaded page
+        self.zone_grid_missing_key = None  # Page key on which no field division was found
 
         # Connect cell changed signal to enable manual measurement entry
         self.ui.dimtable.cellChanged.connect(self.handle_cell_change)
@@ -365,84 +393,6 @@ class MainWindow(QMainWindow):
         """
         return ImageProcessor.find_innermost_boundary(image)
 
-    def process_pdf_page(self, page):
-        """Process PDF page with text extraction and YOLO detection"""
-        try:
-            # Create rotation matrix based on selected rotation
-            rotation_matrix = fitz.Matrix(300 / 72, 300 / 72).prerotate(self.rotation)
-
-            # Get pixmap with selected rotation
-            pix = page.get_pixmap(matrix=rotation_matrix)
-            img = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, 3)
-
-            # Store the original rotated image
-            processed_img = img.copy()
-
-            # Get text using PyMuPDF
-            fitz_dict = page.get_text("dict")['blocks']
-            pdf_results = []
-
-            # Process text blocks
-            for block in fitz_dict:
-                if 'lines' in block:
-                    for line in block['lines']:
-                        for span in line['spans']:
-                            dimension = span['text'].strip()
-                            if not dimension:  # Skip empty text
-                                continue
-                            bound_box = span['bbox']
-                            # Scale coordinates
-                            bound_box = [i * 2 for i in bound_box]
-                            # Convert to our standard format
-                            scene_box = [
-                                [bound_box[0], bound_box[1]],  # top-left
-                                [bound_box[2], bound_box[1]],  # top-right
-                                [bound_box[2], bound_box[3]],  # bottom-right
-                                [bound_box[0], bound_box[3]]  # bottom-left
-                            ]
-                            pdf_results.append({
-                                'text': dimension,
-                                'box': scene_box,
-                                'confidence': 1.0,  # PyMuPDF doesn't provide confidence
-                                'rotation': 0
-                            })
-
-            # Store results
-            self.all_detections['ocr'][0] = pdf_results
-            self.ocr_results = pdf_results
-
-            # Process YOLO if model exists
-            if self.yolo_model:
-                marked_image = img.copy()
-                mask, _ = self.find_innermost_boundary(img)
-                if mask is not None:
-                    contours, _ = cv2.findContours(mask, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
-                    cv2.drawContours(marked_image, contours, -1, (0, 255, 0), 2)
-
-                    detections = self.yolo_model(marked_image)[0]
-                    yolo_results = [
-                        {
-                            'box': [int(x1), int(y1), int(x2), int(y2)],
-                            'confidence': float(conf),
-                            'class': int(cls),
-                            'class_name': detections.names[int(cls)]
-                        }
-                        for x1, y1, x2, y2, conf, cls in detections.boxes.data
-                        if conf >= 0.75
-                    ]
-
-                    self.all_detections['yolo'] = yolo_results
-                    self.yolo_detections = yolo_results
-                    processed_img = marked_image
-
-            return self.convert_to_pixmap(processed_img)
-
-        except Exception as e:
-            print(f"Error in process_pdf_page: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            return None
-
     def is_valid_detection(self, result):
         """Check if the detection is valid based on box dimensions and position"""
         try:
@@ -645,15 +595,13 @@ class MainWindow(QMainWindow):
             if rotation:
                 self.current_page.set_rotation(rotation)
 
-            # Get the page pixmap
-            pix = self.current_page.get_pixmap(matrix=fitz.Matrix(2, 2))
-            img = QImage(pix.samples, pix.width, pix.height, pix.stride, QImage.Format_RGB888)
-            pixmap = QPixmap.fromImage(img)
-
-            # Clear existing scene and add new pixmap
+            # Clear existing scene and add the page as tiles rendered for the visible area
             self.ui.pdf_view.scene().clear()
-            self.ui.pdf_view.scene().addPixmap(pixmap)
-            self.ui.pdf_view.setSceneRect(QRectF(pixmap.rect()))
+            page_item = self.ui.pdf_view.addPageItem(self.current_page)
+            self.ui.pdf_view.setSceneRect(page_item.boundingRect())
+
+            # New page/rotation, so the zone grid has to be detected again
+            ZoneDetector.invalidate_zone_grid(self)
 
             # For admin users, process the page with OCR/YOLO
             if self.user_role == 'admin':
@@ -783,9 +731,11 @@ class MainWindow(QMainWindow):
     def process_page(self):
         """Process the current page with OCR and YOLO"""
         try:
-            # Get pixmap of current page
-            pix = self.current_page.get_pixmap(matrix=fitz.Matrix(2, 2))
-            img = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, 3)
+            # Decode the full page raster once; zone detection and export reuse it from the cache
+            page_raster_cache.get(self.current_page, 2)
+
+            # Parse the text layer once; area selections query its index
+            detection_engine.span_store(self.current_page)
 
             # Initialize empty results
             self.pdf_results = []
@@ -873,36 +823,6 @@ class MainWindow(QMainWindow):
         self.balloon_triangle = None
         self.balloon_text = None
 
-    def render_page(self):
-        """Render the current page with masking, OCR and YOLO detection overlay"""
-        if not self.current_page:
-            return
-
-        try:
-            # Process the page with masking and get QPixmap
-            pixmap = self.process_pdf_page(self.current_page)
-
-            # Add to scene
-            self.ui.scene.clear()
-            self.ui.pdf_view.clearOCRItems()  # Clear previous items
-            pixmap_item = self.ui.scene.addPixmap(pixmap)
-
-            # Skip drawing individual OCR and YOLO boxes - they'll be handled by cluster_detections
-
-            # Call cluster_detections to create merged boxes
-            self.cluster_detections()
-
-            # Adjust view if needed
-            if self.zoom_factor == 1.0:
-                self.fit_to_view()
-
-        except Exception as e:
-            QtWidgets.QMessageBox.critical(
-                self,
-                "Render Error",
-                f"Failed to render PDF page: {str(e)}"
-            )
-
     def zoom_in(self, use_mouse_position=False, mouse_pos=None):
         self.zoom_factor = ViewEvents.zoom_in(
             self.ui.pdf_view,
@@ -1071,7 +991,7 @@ class MainWindow(QMainWindow):
                     # Try to connect to the API server
                     print("Testing API connection...")
                     base_url = APIEndpoints.BASE_URL
-                    response = requests.get(base_url, timeout=10)
+                    response = api.http.get(base_url, timeout=10)
                     print(f"API response status: {response.status_code}")
 
                     # Show login dialog if server is responding
@@ -1147,11 +1067,12 @@ class MainWindow(QMainWindow):
                         self.stop_loading()
                         QtWidgets.QApplication.processEvents()
 
-                        # Clean up temporary file
-                        try:
-                            os.remove(file_path)
-                        except:
-                            pass
+                        # Clean up temporary file (drawings in the local cache are kept for reuse)
+                        if not drawing_cache.contains(file_path):
+                            try:
+                                os.remove(file_path)
+                            except:
+                                pass
                 else:
                     QtWidgets.QMessageBox.warning(
                         self,
@@ -1217,20 +1138,11 @@ class MainWindow(QMainWindow):
             production_order = self.operations_dialog.production_order
             ipid = f"IPID-{self.operations_dialog.part_number}-{operation_number}"
 
-            # Get order_id from all_orders endpoint
+            # Get order_id from the cached order directory
             try:
-                response = api._make_request("/planning/all_orders")
-                if response and isinstance(response, list):
-                    order_id = None
-                    for order in response:
-                        if str(order.get('production_order')) == str(production_order):
-                            order_id = order.get('id')
-                            break
-
-                    if not order_id:
-                        raise Exception(f"Could not find order_id for production order {production_order}")
-                else:
-                    raise Exception("Invalid response from all_orders endpoint")
+                order_id = order_directory.find_order_id(production_order)
+                if not order_id:
+                    raise Exception(f"Could not find order_id for production order {production_order}")
             except Exception as e:
                 print(f"Error getting order_id: {e}")
                 QMessageBox.critical(self, "Error", f"Failed to get order ID: {str(e)}")
@@ -1253,24 +1165,31 @@ class MainWindow(QMainWindow):
             failed_rows = []
             total_rows = self.ui.dimtable.rowCount()
 
-            # Process all rows
+            # Prepare all payloads from the table (GUI thread)
+            rows = []
             for row in range(total_rows):
                 try:
                     if self.user_role == 'operator':
                         payload = self.prepare_stage_inspection_payload(row, operation_number, order_id, quantity_no)
-                        result = api.create_stage_inspection(payload)
                     else:
                         payload = self.prepare_master_boc_payload(row, document_id, operation_number, order_id, ipid)
-                        result = api.create_master_boc(payload)
-
-                    if result is None:
-                        failed_rows.append(row + 1)
-                    else:
-                        success_count += 1
-
+                    rows.append((row + 1, payload))
                 except Exception as e:
                     failed_rows.append(row + 1)
 
+            # Send the rows concurrently in the background
+            submit_fn = api.create_stage_inspection if self.user_role == 'operator' else api.create_master_boc
+            sent_failed_rows, success_count, cancelled_rows = self.submit_rows(rows, submit_fn)
+            failed_rows = sorted(failed_rows + sent_failed_rows)
+
+            if cancelled_rows:
+                msg = f"Saving was cancelled, {len(cancelled_rows)} rows were not sent: {', '.join(map(str, cancelled_rows))}"
+                if failed_rows:
+                    msg += f"\nFailed to save {len(failed_rows)} rows: {', '.join(map(str, failed_rows))}"
+                msg += f"\nSuccessfully saved {success_count} rows"
+                QMessageBox.warning(self, "Save Results", msg)
+                return
+
             # Save ballooned drawing for admin
             if self.user_role == 'admin' and success_count > 0:
                 try:
@@ -1467,6 +1386,42 @@ class MainWindow(QMainWindow):
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to save data: {str(e)}")
 
+    def submit_rows(self, rows, submit_fn):
+        """Submit (row number, payload) pairs concurrently with a cancellable progress dialog.
+
+        Returns (failed row numbers, success count, row numbers not sent because of cancel).
+        """
+        if not rows:
+            return [], 0, []
+
+        progress = QtWidgets.QProgressDialog("Saving rows...", "Cancel", 0, len(rows), self)
+        progress.setWindowTitle("Saving")
+        progress.setWindowModality(Qt.WindowModal)
+        progress.setMinimumDuration(0)
+        progress.setValue(0)
+
+        worker = RowSubmissionWorker(rows, submit_fn, parent=self)
+        loop = QtCore.QEventLoop()
+
+        def on_progress(done, total):
+            progress.setLabelText(f"Saved {done} of {total} rows...")
+            progress.setValue(done)
+
+        def on_cancel():
+            progress.setLabelText("Cancelling, waiting for rows already sent...")
+            worker.cancel()
+
+        worker.progress.connect(on_progress)
+        progress.canceled.connect(on_cancel)
+        worker.finished.connect(loop.quit)
+        worker.start()
+        # The UI stays responsive while the rows are sent
+        loop.exec_()
+
+        progress.close()
+        worker.deleteLater()
+        return worker.failed_rows, worker.success_count, worker.cancelled_rows
+
     def prepare_stage_inspection_payload(self, row, operation_number, order_id, quantity_no):
         """Prepare payload for stage inspection (operator role)"""
         def get_cell_text(row, col):
@@ -1591,6 +1546,46 @@ class MainWindow(QMainWindow):
         # Show operations dialog
         self.show_operations_dialog()
 
+    def setup_warmup(self):
+        """Schedule the warm-up of everything the first selection and API call would otherwise wait for"""
+        self.warmup = WarmupScheduler(self)
+        self.warmup.add_task("Compiling patterns", DimensionParser.compile_patterns)
+        self.warmup.add_task("Loading libraries", lambda: preload('fitz', 'cv2'))
+        self.warmup.add_task("Connecting to server", api.http.preconnect)
+        self.detector_warmup = None  # Scheduled by warmup_detector once an admin logs in
+
+        # Permanent widget, so showMessage() does not hide it
+        self.warmup_label = QLabel()
+        self.statusBar().addPermanentWidget(self.warmup_label)
+        self.warmup_label.hide()
+        self.warmup.progress.connect(self.on_warmup_progress)
+        self.warmup.finished.connect(lambda timings: QtCore.QTimer.singleShot(3000, self.warmup_label.hide))
+        QtWidgets.QApplication.instance().aboutToQuit.connect(self.warmup.stop)
+        self.warmup.start()
+
+    def warmup_detector(self):
+        """Load the detector and run a test detection at idle priority (only admins run detection)"""
+        if self.detector_warmup is not None:
+            return
+        if not detector_warmup_allowed():
+            # The model is loaded on the first detection instead
+            print("Skipping detector warm-up: less memory than WARMUP_MIN_RAM_MB")
+            return
+
+        self.detector_warmup = WarmupScheduler(self)
+        self.detector_warmup.add_task("Loading detector", yolo_service.get_model)
+        self.detector_warmup.add_task("Running a test detection", yolo_service.warmup)
+        self.detector_warmup.progress.connect(self.on_warmup_progress)
+        self.detector_warmup.finished.connect(lambda timings: QtCore.QTimer.singleShot(3000, self.warmup_label.hide))
+        QtWidgets.QApplication.instance().aboutToQuit.connect(self.detector_warmup.stop)
+        if not self.detector_warmup.start():
+            # Warm-up disabled, still load the model before the first detection
+            yolo_service.preload()
+
+    def on_warmup_progress(self, status):
+        self.warmup_label.setText(status)
+        self.warmup_label.show()
+
     def configure_ui_for_role(self):
         """Configure UI elements based on user role"""
         is_admin = self.user_role == 'admin'
@@ -1603,6 +1598,10 @@ class MainWindow(QMainWindow):
         if hasattr(self.ui, 'actionStamp'):
             self.ui.actionStamp.setEnabled(is_admin)
 
+        # Only admins run detection, so only they pay for loading the model
+        if is_admin:
+            self.warmup_detector()
+
         # Update graphics view settings
         if hasattr(self.ui, 'pdf_view'):
             self.ui.pdf_view.selection_mode = False  # Start with selection mode off
@@ -1776,6 +1775,7 @@ class MainWindow(QMainWindow):
             self.current_page = None
             self.rotation = 0
             self.loading_params = None
+            ZoneDetector.invalidate_zone_grid(self)
 
             # Disable tools that require login
             self.ui.actionSelectionTool.setEnabled(False)
@@ -1849,20 +1849,10 @@ class MainWindow(QMainWindow):
     def load_operator_data(self):
         """Load operator data from API"""
         try:
-            # Get order_id from all_orders endpoint
-            response = api._make_request("/planning/all_orders")
-            if response and isinstance(response, list):
-                # Find the matching order
-                order_id = None
-                for order in response:
-                    if str(order.get('production_order')) == str(self.operations_dialog.production_order):
-                        order_id = order.get('id')
-                        break
-
-                if not order_id:
-                    raise Exception(f"Could not find order_id for production order {self.operations_dialog.production_order}")
-            else:
-                raise Exception("Invalid response from all_orders endpoint")
+            # Get order_id from the cached order directory
+            order_id = order_directory.find_order_id(self.operations_dialog.production_order)
+            if not order_id:
+                raise Exception(f"Could not find order_id for production order {self.operations_dialog.production_order}")
 
             # Get operation number
             operation_number = self.operations_dialog.get_operation_number()
@@ -1944,11 +1934,13 @@ class MainWindow(QMainWindow):
 
                 # Reload the PDF page
                 if self.current_page:
-                    pix = self.current_page.get_pixmap(matrix=fitz.Matrix(2, 2))
-                    img = QImage(pix.samples, pix.width, pix.height, pix.stride, QImage.Format_RGB888)
-                    pixmap = QPixmap.fromImage(img)
-                    self.ui.pdf_view.scene().addPixmap(pixmap)
-                    self.ui.pdf_view.setSceneRect(QRectF(pixmap.rect()))
+                    page_item = self.ui.pdf_view.addPageItem(self.current_page)
+                    self.ui.pdf_view.setSceneRect(page_item.boundingRect())
+                    ZoneDetector.invalidate_zone_grid(self)
+
+                # Rows without a stored zone are zoned in one batch after loading
+                unzoned_rows = []
+                unzoned_midpoints = []
 
                 # Process each dimension
                 for dimension in response:
@@ -2008,10 +2000,21 @@ class MainWindow(QMainWindow):
                                     nominal_item.setData(Qt.UserRole, points)  # Store as points list
                                     print(f"Stored points data: {points}")  # Debug print
 
+                                if dimension.get('zone') in (None, '', 'N/A'):
+                                    midpoint = ClusterDetector.calculate_merged_box_midpoint(points)
+                                    if midpoint:
+                                        unzoned_rows.append(row)
+                                        unzoned_midpoints.append(midpoint)
+
                         except Exception as bbox_error:
                             print(f"Error processing bbox for row {row}: {bbox_error}")
                             print(f"Original bbox data: {bbox}")
 
+                if unzoned_rows:
+                    zones = ZoneDetector.assign_zones(self, unzoned_midpoints)
+                    for row, zone in zip(unzoned_rows, zones):
+                        self.ui.dimtable.setItem(row, 1, QTableWidgetItem(str(zone)))
+
                 print(f"Loaded {len(response)} dimensions from database")
 
                 # Fit view to content
@@ -2028,20 +2031,25 @@ class MainWindow(QMainWindow):
     def update_table_zones(self):
         """Update zones for all items in the table"""
         try:
-            if self.current_image is None:
-                return
-
+            rows = []
+            midpoints = []
             for row in range(self.ui.dimtable.rowCount()):
                 # Get the bbox from the nominal column
                 nominal_item = self.ui.dimtable.item(row, 2)
                 if nominal_item and nominal_item.data(Qt.UserRole):
                     bbox = nominal_item.data(Qt.UserRole)
 
-                    # Calculate midpoint and get zone
+                    # Calculate midpoint
                     midpoint = ClusterDetector.calculate_merged_box_midpoint(bbox)
                     if midpoint:
-                        zone = ZoneDetector.get_zone_for_midpoint(self.current_image, midpoint)
-                        self.ui.dimtable.setItem(row, 1, QTableWidgetItem(zone))
+                        rows.append(row)
+                        midpoints.append(midpoint)
+
+            # Rezone the whole table in one call
+            if rows:
+                zones = ZoneDetector.assign_zones(self, midpoints)
+                for row, zone in zip(rows, zones):
+                    self.ui.dimtable.setItem(row, 1, QTableWidgetItem(str(zone)))
 
         except Exception as e:
             print(f"Error updating table zones: {str(e)}")
@@ -3199,6 +3207,9 @@ class MeasurementThread(QtCore.QThread):
     def run(self):
         """Run the measurement thread"""
         try:
+            import asyncio
+            from bleak import BleakClient
+
             loop = asyncio.new_event_loop()
             asyncio.set_event_loop(loop)
 
@@ -3248,8 +3259,15 @@ class MeasurementThread(QtCore.QThread):
 
 if __name__ == "__main__":
     import sys
+    import multiprocessing
+
+    # Render worker processes re-launch the frozen executable
+    multiprocessing.freeze_support()
 
     app = QtWidgets.QApplication(sys.argv)
+    app.aboutToQuit.connect(render_service.shutdown)
+    app.aboutToQuit.connect(api.http.print_stats)
     window = MainWindow()  # Create instance of our MainWindow class
     window.show()
+    QtCore.QTimer.singleShot(0, report_startup_time)  # Runs once the event loop has shown the window
     sys.exit(app.exec_())
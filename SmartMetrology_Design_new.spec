@@ -34,6 +34,23 @@ a = Analysis(
     (r'D:\siri\calipers\prometrix\prometrix\venv\Lib\site-packages\torchgen', 'torchgen'),
     (r'D:\siri\calipers\prometrix\prometrix\venv\Lib\site-packages\matplotlib', 'matplotlib'),
     (r'D:\siri\calipers\prometrix\prometrix\highlight_manager.py', '.'),
+    (r'D:\siri\calipers\prometrix\prometrix\model_service.py', '.'),
+    (r'D:\siri\calipers\prometrix\prometrix\inference_backends.py', '.'),
+    (r'D:\siri\calipers\prometrix\prometrix\box_ops.py', '.'),
+    (r'D:\siri\calipers\prometrix\prometrix\page_cache.py', '.'),
+    (r'D:\siri\calipers\prometrix\prometrix\tiled_canvas.py', '.'),
+    (r'D:\siri\calipers\prometrix\prometrix\render_service.py', '.'),
+    (r'D:\siri\calipers\prometrix\prometrix\drawing_cache.py', '.'),
+    (r'D:\siri\calipers\prometrix\prometrix\http_transport.py', '.'),
+    (r'D:\siri\calipers\prometrix\prometrix\batch_submit.py', '.'),
+    (r'D:\siri\calipers\prometrix\prometrix\order_directory.py', '.'),
+    (r'D:\siri\calipers\prometrix\prometrix\instrument_catalogue.py', '.'),
+    (r'D:\siri\calipers\prometrix\prometrix\order_search.py', '.'),
+    (r'D:\siri\calipers\prometrix\prometrix\lazy_imports.py', '.'),
+    (r'D:\siri\calipers\prometrix\prometrix\warmup.py', '.'),
+    (r'D:\siri\calipers\prometrix\prometrix\zone_grid.py', '.'),
+    (r'D:\siri\calipers\prometrix\prometrix\detection_engine.py', '.'),
+    (r'D:\siri\calipers\prometrix\prometrix\app_settings.py', '.'),
     (r'D:\siri\calipers\prometrix\prometrix\venv\Lib\site-packages\ultralytics\cfg\default.yaml', 'ultralytics/cfg'),
     (r'D:\siri\calipers\prometrix\prometrix\best.pt', '.'),
     (r'D:\siri\calipers\prometrix\prometrix\ui_smart_metrology.py', '.')],
@@ -41,6 +58,8 @@ a = Analysis(
            'PyQt5', 'PyQt5.QtCore', 'PyQt5.QtWidgets', 'PyQt5.QtGui',
     'PyQt5.sip',
     'qasync', 'bleak', 'asyncio',
+    # Imported on first use through lazy_imports, invisible to the import analysis
+    'fitz', 'pymupdf', 'cv2', 'requests', 'urllib3', 'nest_asyncio', 'multiprocessing.shared_memory',
     'torch',
     'torch.nn',
      'pyparsing',
@@ -1,34 +1,17 @@
-import requests
 from typing import Dict, List, Optional, Union, Tuple
 from dataclasses import dataclass
 import os
-from dotenv import load_dotenv
+import shutil
+from drawing_cache import drawing_cache
+from http_transport import HTTPTransport
+from lazy_imports import lazy_import
 
+requests = lazy_import('requests')  # Imported with the first request
 
-# Get the directory containing the script
-current_dir = os.path.dirname(os.path.abspath(__file__))
-env_path = os.path.join(current_dir, '.env')
-
-# Load environment variables from .env file
-print(f"Looking for .env file at: {env_path}")
-if not os.path.exists(env_path):
-    raise FileNotFoundError(f".env file not found at {env_path}")
-
-load_dotenv(env_path)
-
-# Get and validate API base URL
-api_base_url = os.getenv('API_BASE_URL')
-if not api_base_url or api_base_url == 'API_BASE_URL':
-    raise ValueError("Invalid API_BASE_URL in .env file. Should be like: http://172.18.7.93:9999/api/v1")
-
-if not api_base_url.startswith(('http://', 'https://')):
-    raise ValueError("API_BASE_URL must start with http:// or https://")
-
-print(f"Loaded API_BASE_URL: {api_base_url}")
 
 @dataclass
 class APIEndpoints:
-    BASE_URL: str = api_base_url
+    BASE_URL: str = os.getenv('API_BASE_URL', '')  # From .env, see app_settings.load_settings
     
     # Auth endpoints
     AUTH_LOGIN = "/auth/login"
@@ -74,12 +57,14 @@ class APIHandler:
         self.token = None
         self.username = None
         self.operator_id = None
+        # Pooled keep-alive session with timeouts, retries and latency statistics
+        self.http = HTTPTransport(base_url)
         
     def check_health(self) -> bool:
         """Check if the API server is responding"""
         try:
             # Try the root endpoint instead of /health
-            response = requests.get(f"{self.base_url}", timeout=5)
+            response = self.http.get(f"{self.base_url}")
             print(f"Health check response: {response.status_code}")  # Debug print
             # Accept any 2xx status code as success
             return 200 <= response.status_code < 300
@@ -100,14 +85,13 @@ class APIHandler:
             # Debug print
             print(f"Attempting login to: {self.base_url}{APIEndpoints.AUTH_LOGIN}")
             
-            response = requests.post(
+            response = self.http.post(
                 f"{self.base_url}{APIEndpoints.AUTH_LOGIN}",
                 data=login_data,
                 headers={
                     "Content-Type": "application/x-www-form-urlencoded",
                     "Accept": "application/json"
-                },
-                timeout=10
+                }
             )
             
             # Debug print
@@ -144,8 +128,8 @@ class APIHandler:
                     pass
             return False
             
-    def _make_request(self, endpoint, stream=False, params=None, method="GET", data=None):
-        """Make a request to the API"""
+    def _make_request(self, endpoint, stream=False, params=None, method="GET", data=None, label=None):
+        """Make a request to the API (label: endpoint template for timeouts and statistics)"""
         try:
             url = f"{self.base_url}{endpoint}"
             print(f"Making {method} request to: {url}")
@@ -157,7 +141,7 @@ class APIHandler:
             
             if stream:
                 # For file downloads
-                response = requests.get(url, headers=headers, stream=True)
+                response = self.http.get(url, label=label, headers=headers, stream=True)
                 print(f"Response status: {response.status_code}")
                 
                 if response.status_code == 200:
@@ -168,9 +152,9 @@ class APIHandler:
             else:
                 # For regular JSON responses
                 if method.upper() == "GET":
-                    response = requests.get(url, headers=headers, params=params)
+                    response = self.http.get(url, label=label, headers=headers, params=params)
                 elif method.upper() == "POST":
-                    response = requests.post(url, headers=headers, json=data)
+                    response = self.http.post(url, label=label, headers=headers, json=data)
                 else:
                     raise ValueError(f"Unsupported HTTP method: {method}")
                     
@@ -186,6 +170,85 @@ class APIHandler:
             print(f"Request error: {e}")
             return None
             
+    def _cached_download(self, cache_key: str, url: str, params: Optional[Dict] = None,
+                         immutable: bool = False, latest_key: Optional[str] = None) -> Optional[str]:
+        """
+        Download a PDF through the local drawing cache
+
+        Immutable entries (keyed by document version) are reused without asking
+        the server. Other cached copies are revalidated with a conditional request
+        (If-None-Match / If-Modified-Since) and reused on 304. The downloaded file
+        is also indexed under latest_key, which serves as the fallback when the
+        server cannot be reached or answers with an error.
+
+        Returns:
+            Path of the cached file, or None if nothing could be downloaded
+        """
+        entry = drawing_cache.lookup(cache_key)
+        if entry and immutable:
+            print(f"Using cached drawing: {cache_key}")
+            return drawing_cache.touch(cache_key)
+
+        headers = {
+            "Authorization": f"Bearer {self.token}",
+            "Accept": "application/pdf"
+        }
+        headers.update(drawing_cache.validators(cache_key))
+
+        try:
+            response = self.http.get(url, params=params, headers=headers, stream=True)
+            print(f"Response status: {response.status_code}")
+
+            if response.status_code == 304 and entry:
+                print(f"Cached drawing is up to date: {cache_key}")
+                return drawing_cache.touch(cache_key)
+
+            if response.status_code != 200:
+                print(f"Error response: {response.text}")
+                return self._cached_fallback(cache_key, latest_key)
+
+            path = drawing_cache.store(
+                cache_key,
+                response.iter_content(chunk_size=65536),
+                etag=response.headers.get('ETag'),
+                last_modified=response.headers.get('Last-Modified')
+            )
+            if latest_key:
+                drawing_cache.link(latest_key, cache_key)
+            return path
+
+        except requests.RequestException as e:
+            print(f"Server unreachable ({str(e)})")
+            path = self._cached_fallback(cache_key, latest_key)
+            if path:
+                return path
+            raise
+
+    @staticmethod
+    def _cached_fallback(cache_key: str, latest_key: Optional[str] = None) -> Optional[str]:
+        """Cached file of a failed download: the requested key, else the last drawing served for latest_key"""
+        for key in (cache_key, latest_key):
+            if key:
+                path = drawing_cache.touch(key)
+                if path:
+                    print(f"Using cached drawing: {key}")
+                    return path
+        return None
+
+    def _latest_version_key(self, production_order: str) -> Optional[str]:
+        """
+        Cache key part of the newest document version of a production order
+
+        Returns None if the versions cannot be fetched, the download is then
+        revalidated against the server instead.
+        """
+        versions = self.get_document_versions(production_order)
+        versions = [v for v in versions or [] if v.get('id') is not None]
+        if not versions:
+            return None
+        latest = max(versions, key=lambda v: v['id'])
+        return drawing_cache.make_key(latest.get('document_id'), latest['id'])
+
     def get_all_orders(self) -> List[Dict]:
         """
         Get all production orders
@@ -274,27 +337,23 @@ class APIHandler:
             }
             
             url = f"{self.base_url}{APIEndpoints.DOCUMENT_DOWNLOAD}"
-            headers = {
-                "Authorization": f"Bearer {self.token}",
-                "Accept": "application/pdf"
-            }
-            
             print(f"Downloading document from: {url}")
-            # print(f"Headers: {headers}")
             
-            response = requests.get(
+            # Keyed by the current version, so an unchanged drawing is not downloaded again
+            latest_key = drawing_cache.make_key('document', production_order, 'latest')
+            version_key = self._latest_version_key(production_order)
+            cached_path = self._cached_download(
+                drawing_cache.make_key('document', version_key) if version_key else latest_key,
                 url,
                 params=params,
-                headers=headers,
-                stream=True  # Stream the response for large files
+                immutable=version_key is not None,
+                latest_key=latest_key if version_key else None
             )
-            response.raise_for_status()
+            if not cached_path:
+                return False
             
-            # Save the file
-            with open(save_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
+            # Copy out of the cache, the caller owns (and may delete) save_path
+            shutil.copyfile(cached_path, save_path)
             
             return True
             
@@ -321,25 +380,19 @@ class APIHandler:
             )
             
             url = f"{self.base_url}{endpoint}"
-            headers = {
-                "Authorization": f"Bearer {self.token}",
-                "Accept": "application/pdf"
-            }
-            
             print(f"Downloading specific version from: {url}")
             
-            response = requests.get(
+            # A stored version never changes, a cached copy needs no revalidation
+            cached_path = self._cached_download(
+                drawing_cache.make_key('document', doc_id, version_id),
                 url,
-                headers=headers,
-                stream=True
+                immutable=True
             )
-            response.raise_for_status()
+            if not cached_path:
+                return False
             
-            # Save the file
-            with open(save_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
+            # Copy out of the cache, the caller owns (and may delete) save_path
+            shutil.copyfile(cached_path, save_path)
             
             return True
             
@@ -370,16 +423,23 @@ class APIHandler:
         """
         Get IPID drawing using the new endpoint
         """
+        path = self.get_ipid_drawing_file(production_order, operation_number)
+        if not path:
+            return None
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def get_ipid_drawing_file(self, production_order: str, operation_number: str) -> Optional[str]:
+        """
+        Get the IPID drawing as a file in the local drawing cache
+
+        The file belongs to the cache and must not be deleted by the caller.
+        """
         try:
             print(f"\nAPI get_ipid_drawing called with:")
             print(f"Production Order: {production_order}")
             print(f"Operation Number: {operation_number}")
             
-            headers = {
-                'Authorization': f'Bearer {self.token}',
-                'Accept': 'application/pdf'
-            }
-            
             url = f"{self.base_url}{APIEndpoints.IPID_DRAWING.format(production_order=production_order)}"
             params = {
                 'operation_number': operation_number
@@ -388,17 +448,20 @@ class APIHandler:
             print(f"Making request to: {url}")
             print(f"With params: {params}")
             
-            response = requests.get(url, headers=headers, params=params)
-            
-            print(f"Response status code: {response.status_code}")
-            if response.status_code != 200:
-                print(f"Response text: {response.text}")
-            
-            if response.status_code == 200:
-                return response.content
-            
-            print(f"Failed to get IPID drawing: {response.text}")
-            return None
+            # Keyed by the current version, so an unchanged drawing is not downloaded again
+            latest_key = drawing_cache.make_key('ipid', production_order, operation_number, 'latest')
+            version_key = self._latest_version_key(production_order)
+            path = self._cached_download(
+                drawing_cache.make_key('ipid', production_order, operation_number, version_key)
+                if version_key else latest_key,
+                url,
+                params=params,
+                immutable=version_key is not None,
+                latest_key=latest_key if version_key else None
+            )
+            if not path:
+                print("Failed to get IPID drawing")
+            return path
             
         except Exception as e:
             print(f"Error getting IPID drawing: {str(e)}")
@@ -423,7 +486,7 @@ class APIHandler:
 
         try:
             endpoint = APIEndpoints.AUTH_USER_ROLE.format(username=self.username)
-            response = self._make_request(endpoint)
+            response = self._make_request(endpoint, label=APIEndpoints.AUTH_USER_ROLE)
             
             if response and isinstance(response, dict):
                 self.operator_id = response.get('id')
@@ -440,7 +503,7 @@ class APIHandler:
         """Get user role from the API"""
         try:
             endpoint = APIEndpoints.AUTH_USER_ROLE.format(username=username)
-            response = self._make_request(endpoint)
+            response = self._make_request(endpoint, label=APIEndpoints.AUTH_USER_ROLE)
             
             if response and isinstance(response, dict):
                 role = response.get('role_name', '').lower()
@@ -503,7 +566,7 @@ class APIHandler:
     def create_master_boc(self, payload: dict) -> Optional[dict]:
         """Create master BOC entry"""
         try:
-            response = requests.post(
+            response = self.http.post(
                 f"{self.base_url}{APIEndpoints.QUALITY_MASTER_BOC}",
                 json=payload,
                 headers={
@@ -528,7 +591,7 @@ class APIHandler:
     def create_stage_inspection(self, payload: dict) -> Optional[dict]:
         """Create stage inspection entry"""
         try:
-            response = requests.post(
+            response = self.http.post(
                 f"{self.base_url}/quality/stage-inspection/",
                 json=payload,
                 headers={
@@ -562,10 +625,9 @@ class APIHandler:
             }
             
             # Make request with custom headers
-            response = requests.get(
+            response = self.http.get(
                 f"{self.base_url}{APIEndpoints.INVENTORY_CALIBRATIONS}",
-                headers=headers,
-                timeout=30  # Increased timeout for larger data sets
+                headers=headers
             )
             
             if response.status_code == 200:
@@ -605,7 +667,7 @@ class APIHandler:
                     "Authorization": f"Bearer {self.token}"
                 }
                 
-                response = requests.post(url, headers=headers, data=data, files=files)
+                response = self.http.post(url, headers=headers, data=data, files=files)
                 print(f"Upload response status: {response.status_code}")
                 print(f"Upload response: {response.text}")
                 
@@ -638,7 +700,7 @@ class APIHandler:
                     "Authorization": f"Bearer {self.token}"
                 }
                 
-                response = requests.post(url, headers=headers, data=data, files=files)
+                response = self.http.post(url, headers=headers, data=data, files=files)
                 print(f"Report upload response status: {response.status_code}")
                 print(f"Report upload response: {response.text}")
                 
@@ -678,7 +740,7 @@ class APIHandler:
             print(f"Using URL: {url}")
             print(f"With headers: {headers}")
             
-            response = requests.post(url, headers=headers, json=data)
+            response = self.http.post(url, headers=headers, json=data)
             print(f"Create folder response: {response.status_code}")
             print(f"Response content: {response.text}")
             
@@ -701,7 +763,7 @@ class APIHandler:
         """Check if a quantity is completed for a given order and IPID"""
         try:
             endpoint = f"/quality/ftp/{order_id}/{ipid}"
-            response = requests.get(
+            response = self.http.get(
                 f"{self.base_url}{endpoint}",
                 headers={
                     "Authorization": f"Bearer {self.token}",
@@ -0,0 +1,28 @@
+import os
+
+from dotenv import load_dotenv
+
+
+# Settings file next to the application
+ENV_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env')
+
+
+def load_settings(env_path=ENV_PATH):
+    """Load the .env file into the environment and validate API_BASE_URL.
+
+    Called once at startup, before the modules whose services read their
+    settings from the environment are imported. Returns the API base URL.
+    """
+    if not os.path.exists(env_path):
+        raise FileNotFoundError(f".env file not found at {env_path}")
+
+    load_dotenv(env_path)
+
+    api_base_url = os.getenv('API_BASE_URL')
+    if not api_base_url or api_base_url == 'API_BASE_URL':
+        raise ValueError("Invalid API_BASE_URL in .env file. Should be like: http://172.18.7.93:9999/api/v1")
+
+    if not api_base_url.startswith(('http://', 'https://')):
+        raise ValueError("API_BASE_URL must start with http:// or https://")
+
+    return api_base_url
@@ -0,0 +1,434 @@
+"""Balloon folders of drawings without the GUI.
+
+Usage:
+    python batch_balloon.py DRAWINGS [DRAWINGS ...] -o OUTPUT [--workers 4] [--no-symbols]
+                            [--model best.pt] [--restart] [--verbose]
+
+Every PDF found under the given folders (or given directly) is run through the
+detection engine on a pool of worker processes, each with its own detector.
+For a drawing <name>.pdf the output folder gets, at the same relative path:
+
+    <name>.json            Dimension records of every page
+    <name>.csv             The same records, one row per dimension
+    <name>_ballooned.pdf   The drawing with the boxes and numbered balloons drawn in
+
+Finished drawings are logged in OUTPUT/batch_state.jsonl as they complete, so a
+run that was interrupted or crashed continues where it stopped when started
+again with the same output folder (--restart processes everything again).
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+from lazy_imports import lazy_import
+
+fitz = lazy_import('fitz')  # Imported on first use
+
+
+# Batch ballooning, can be overridden in .env
+#   BATCH_WORKERS: Worker processes, each loads its own copy of the detector
+DEFAULT_BATCH_WORKERS = max(1, min(4, (os.cpu_count() or 2) // 2))
+
+STATE_FILE = 'batch_state.jsonl'
+
+CSV_COLUMNS = ['page', 'serial', 'zone', 'nominal', 'upper_tol', 'lower_tol', 'dim_type', 'text',
+               'yolo_class', 'yolo_confidence', 'x1', 'y1', 'x2', 'y2']
+
+# Balloon geometry of HighlightManager.create_balloon, in scene units
+BALLOON_RADIUS = 29
+BALLOON_POINTER_BASE = 16
+BALLOON_POINTER_HEIGHT = 20
+BALLOON_COLOR = (30 / 255, 144 / 255, 1.0)
+HIGHLIGHT_COLOR = (1.0, 0.0, 0.0)
+BALLOON_FONT_SIZE = 13  # Points
+
+# Detection engine of this worker process, created by _init_worker
+_worker_engine = None
+
+
+class _ErrorsToStderr:
+    """Worker stdout that drops the progress output but passes lines reporting an error to stderr"""
+
+    def __init__(self):
+        self._line = ''
+
+    def write(self, text):
+        self._line += text
+        *lines, self._line = self._line.split('\n')
+        for line in lines:
+            if line.lstrip().startswith('Error'):
+                sys.stderr.write(f"[worker {os.getpid()}] {line}\n")
+        return len(text)
+
+    def flush(self):
+        sys.stderr.flush()
+
+
+def create_detector(model_path=None, num_threads=None):
+    """Detector of the given weights (the default model if None), loaded on first use"""
+    from model_service import YOLOModelService
+    return YOLOModelService(model_path, num_threads=num_threads) if model_path else \
+        YOLOModelService(num_threads=num_threads)
+
+
+def _init_worker(model_path, num_threads, detect_symbols, verbose):
+    """Create this worker's engine and load its detector once, before the first drawing"""
+    global _worker_engine
+    if not verbose:
+        # The engine reports every span it clusters
+        sys.stdout = _ErrorsToStderr()
+
+    from detection_engine import DetectionEngine
+
+    detector = create_detector(model_path, num_threads)
+    _worker_engine = DetectionEngine(detector)
+    if detect_symbols and detector.get_model() is None:
+        # Breaks the pool before any drawing starts, so the drawings are marked failed instead of done
+        raise RuntimeError(f"Could not load the detector: {detector.load_error}")
+
+
+def _process_drawing(path, output_base, detect_symbols):
+    """Detect, balloon and write the outputs of one drawing; returns its summary"""
+    start = time.perf_counter()
+    os.makedirs(os.path.dirname(output_base) or '.', exist_ok=True)
+
+    # Left behind only if this process dies, which tells the parent which drawing took it down
+    running_marker = f"{output_base}.running"
+    with open(running_marker, 'w'):
+        pass
+
+    doc = fitz.open(path)
+    try:
+        pages = []
+        serial = 1
+        for page in doc:
+            result = _worker_engine.detect_page(page, detect_symbols=detect_symbols)
+            draw_balloons(page, result.records, serial)
+            pages.append({
+                'page_number': page.number,
+                'rotation': page.rotation,
+                'first_serial': serial,
+                'records': [record.to_dict() for record in result.records],
+                'timings': result.timings
+            })
+            serial += len(result.records)
+
+        _write_atomic(f"{output_base}_ballooned.pdf", lambda tmp: doc.save(tmp, garbage=3, deflate=True))
+    finally:
+        doc.close()
+
+    seconds = time.perf_counter() - start
+    _write_atomic(f"{output_base}.json", lambda tmp: _write_json(tmp, {
+        'file': path,
+        'seconds': seconds,
+        'pages': pages
+    }))
+    _write_atomic(f"{output_base}.csv", lambda tmp: _write_csv(tmp, pages))
+    os.remove(running_marker)
+
+    return {
+        'pages': len(pages),
+        'records': sum(len(page['records']) for page in pages),
+        'seconds': seconds,
+        'worker': os.getpid()
+    }
+
+
+def draw_balloons(page, records, first_serial=1):
+    """Draw the box and a numbered balloon of each record into the page (scene coordinates)"""
+    from detection_engine import SCENE_SCALE
+
+    def to_page(x, y):
+        # Scene coordinates follow the displayed (rotated) page, drawing happens unrotated
+        return fitz.Point(x / SCENE_SCALE, y / SCENE_SCALE) * page.derotation_matrix
+
+    shape = page.new_shape()
+    for serial, record in enumerate(records, first_serial):
+        shape.draw_polyline([to_page(x, y) for x, y in record.bbox] + [to_page(*record.bbox[0])])
+        shape.finish(color=HIGHLIGHT_COLOR, width=1, closePath=True)
+
+        balloon_x = max(x for x, _ in record.bbox)
+        balloon_y = max(y for _, y in record.bbox)
+        center_x = balloon_x + BALLOON_POINTER_HEIGHT + BALLOON_RADIUS
+        center_y = balloon_y
+
+        shape.draw_circle(to_page(center_x, center_y), BALLOON_RADIUS / SCENE_SCALE)
+        shape.finish(color=BALLOON_COLOR, width=1.5)
+
+        shape.draw_polyline([
+            to_page(center_x - BALLOON_RADIUS, center_y - BALLOON_POINTER_BASE / 2),
+            to_page(center_x - BALLOON_RADIUS - BALLOON_POINTER_HEIGHT, center_y),
+            to_page(center_x - BALLOON_RADIUS, center_y + BALLOON_POINTER_BASE / 2)
+        ])
+        shape.finish(color=BALLOON_COLOR, fill=BALLOON_COLOR, width=1.5, closePath=True)
+
+        text = str(serial)
+        text_width = fitz.get_text_length(text, fontname='hebo', fontsize=BALLOON_FONT_SIZE) * SCENE_SCALE
+        baseline = to_page(center_x - text_width / 2, center_y + BALLOON_FONT_SIZE * 0.35 * SCENE_SCALE)
+        shape.insert_text(baseline, text, fontname='hebo', fontsize=BALLOON_FONT_SIZE, color=BALLOON_COLOR,
+                          rotate=page.rotation)
+    shape.commit()
+
+
+def _write_atomic(path, write):
+    """Write through a temporary file so an interrupted run never leaves a partial output"""
+    tmp = f"{path}.tmp"
+    write(tmp)
+    os.replace(tmp, path)
+
+
+def _write_json(path, data):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+
+
+def _write_csv(path, pages):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_COLUMNS)
+        for page in pages:
+            for serial, record in enumerate(page['records'], page['first_serial']):
+                xs = [x for x, _ in record['bbox']]
+                ys = [y for _, y in record['bbox']]
+                writer.writerow([page['page_number'] + 1, serial, record['zone'], record['nominal'],
+                                 record['upper_tol'], record['lower_tol'], record['dim_type'], record['text'],
+                                 record['yolo_class'] or '', record['yolo_confidence'] or '',
+                                 min(xs), min(ys), max(xs), max(ys)])
+
+
+def find_drawings(inputs):
+    """(path, path relative to its input folder) of every PDF, in a stable order.
+
+    The relative path names the outputs and the resume log entry, so two
+    different drawings with the same relative path (x.pdf in two of the given
+    folders) raise a ValueError instead of overwriting each other's outputs.
+    """
+    drawings = []
+    for source in inputs:
+        if os.path.isfile(source):
+            drawings.append((source, os.path.basename(source)))
+            continue
+        for folder, _, files in os.walk(source):
+            for name in sorted(files):
+                if name.lower().endswith('.pdf'):
+                    path = os.path.join(folder, name)
+                    drawings.append((path, os.path.relpath(path, source)))
+
+    unique = {}
+    clashes = []
+    for path, relative in drawings:
+        # Output names differ only by the extension's case on case-insensitive file systems
+        output_name = os.path.splitext(relative)[0].lower()
+        other = unique.setdefault(output_name, (path, relative))
+        if os.path.abspath(other[0]) != os.path.abspath(path):
+            clashes.append(f"{other[0]} and {path}")
+    if clashes:
+        raise ValueError("Drawings with the same output name, process them in separate runs or output "
+                         "folders:\n  " + "\n  ".join(clashes))
+    return sorted(unique.values(), key=lambda drawing: drawing[1])
+
+
+def file_key(path):
+    """Changes when the drawing is replaced, so edited drawings are processed again on resume"""
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def load_state(output_dir):
+    """{relative path: last logged entry} of a previous run"""
+    state = {}
+    path = os.path.join(output_dir, STATE_FILE)
+    if not os.path.exists(path):
+        return state
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # Line cut short by a crash
+            state[entry['file']] = entry
+    return state
+
+
+class BatchRun:
+    """One batch over a list of drawings, logging each finished drawing as it completes"""
+
+    def __init__(self, drawings, output_dir, workers, model_path=None, detect_symbols=True, verbose=False):
+        self.drawings = drawings
+        self.output_dir = output_dir
+        self.workers = workers
+        self.model_path = model_path
+        self.detect_symbols = detect_symbols
+        self.verbose = verbose
+
+        self.done = []  # Summaries of the drawings finished in this run
+        self.failed = []  # (relative path, error)
+        self._state_file = None
+
+    def run(self, restart=False):
+        os.makedirs(self.output_dir, exist_ok=True)
+        state = {} if restart else load_state(self.output_dir)
+        pending = []
+        skipped = 0
+        for path, relative in self.drawings:
+            entry = state.get(relative)
+            if entry and entry.get('status') == 'done' and entry.get('key') == file_key(path) and \
+                    os.path.exists(self._output_base(relative) + '.json'):
+                skipped += 1
+            else:
+                pending.append((path, relative))
+
+        print(f"{len(self.drawings)} drawings, {skipped} already done, {len(pending)} to process "
+              f"on {self.workers} workers")
+        if skipped:
+            print("(pass --restart to process all again)")
+
+        start = time.perf_counter()
+        with open(os.path.join(self.output_dir, STATE_FILE), 'w' if restart else 'a', encoding='utf-8') as f:
+            self._state_file = f
+            while pending:
+                # A crashed worker breaks the pool. The drawings that were being processed are tried
+                # again one at a time, so only the one that crashes is given up; queued ones go to a new pool
+                completed = len(self.done) + len(self.failed)
+                pending, interrupted = self._run_pool(pending, self.workers)
+                for drawing in interrupted:
+                    not_started, crashed = self._run_pool([drawing], 1)
+                    for path, relative in crashed:
+                        self._failed(path, relative, "worker process crashed")
+                    for path, relative in not_started:
+                        self._failed(path, relative, "worker process failed to start")
+                # A pool that broke before any drawing was started (e.g. the worker initializer
+                # failed) would break again on every retry
+                if pending and not interrupted and len(self.done) + len(self.failed) == completed:
+                    for path, relative in pending:
+                        self._failed(path, relative, "worker process failed to start")
+                    pending = []
+        self._state_file = None
+
+        self.report(time.perf_counter() - start, skipped)
+        return not self.failed
+
+    def _run_pool(self, pending, workers):
+        """Process the pending drawings; returns (queued, running) drawings left when the pool broke"""
+        # Spawned workers behave the same on Windows and Linux and never inherit a loaded model
+        executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(self.model_path, max(1, (os.cpu_count() or 1) // workers), self.detect_symbols,
+                      self.verbose)
+        )
+        futures = {
+            executor.submit(_process_drawing, path, self._output_base(relative), self.detect_symbols): (path, relative)
+            for path, relative in pending
+        }
+        queued = []
+        running = []
+        try:
+            for future in as_completed(futures):
+                path, relative = futures[future]
+                try:
+                    summary = future.result()
+                except BrokenProcessPool:
+                    (running if self._remove_marker(relative) else queued).append((path, relative))
+                    continue
+                except Exception as e:
+                    self._remove_marker(relative)
+                    self._failed(path, relative, str(e))
+                    continue
+                self._finished(path, relative, summary)
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+        return queued, running
+
+    def _output_base(self, relative):
+        return os.path.join(self.output_dir, os.path.splitext(relative)[0])
+
+    def _remove_marker(self, relative):
+        """Remove the marker of a drawing that was being processed; False if there was none"""
+        running_marker = self._output_base(relative) + '.running'
+        if not os.path.exists(running_marker):
+            return False
+        os.remove(running_marker)
+        return True
+
+    def _log(self, entry):
+        self._state_file.write(json.dumps(entry) + '\n')
+        self._state_file.flush()
+        os.fsync(self._state_file.fileno())
+
+    def _finished(self, path, relative, summary):
+        summary = {'file': relative, **summary}
+        self.done.append(summary)
+        self._log({**summary, 'status': 'done', 'key': file_key(path)})
+        pages_per_minute = summary['pages'] / summary['seconds'] * 60 if summary['seconds'] else 0
+        print(f"[{len(self.done) + len(self.failed)}] {relative}: {summary['pages']} pages, "
+              f"{summary['records']} dimensions in {summary['seconds']:.1f}s ({pages_per_minute:.1f} pages/min)")
+
+    def _failed(self, path, relative, error):
+        self.failed.append((relative, error))
+        self._log({'file': relative, 'status': 'failed', 'error': error, 'key': file_key(path)})
+        print(f"[{len(self.done) + len(self.failed)}] Error processing {relative}: {error}")
+
+    def report(self, elapsed, skipped=0):
+        pages = sum(summary['pages'] for summary in self.done)
+        records = sum(summary['records'] for summary in self.done)
+        busy = sum(summary['seconds'] for summary in self.done)
+        print(f"\nProcessed {len(self.done)} drawings ({pages} pages, {records} dimensions) in {elapsed:.1f}s, "
+              f"{len(self.failed)} failed, {skipped} skipped")
+        if pages and elapsed:
+            print(f"Throughput: {pages / elapsed * 60:.1f} pages/min overall, "
+                  f"{busy / pages:.2f}s per page per worker")
+        for relative, error in self.failed:
+            print(f"  failed: {relative} ({error})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('inputs', nargs='+', help="Folders (searched recursively) or PDF files")
+    parser.add_argument('-o', '--output', required=True, help="Output folder, also holds the resume log")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (BATCH_WORKERS)")
+    parser.add_argument('--model', default=None, help="Detector weights instead of the default model")
+    parser.add_argument('--no-symbols', action='store_true', help="Only cluster the text, without the detector")
+    parser.add_argument('--restart', action='store_true', help="Ignore the resume log and process everything")
+    parser.add_argument('--verbose', action='store_true', help="Show the output of the workers")
+    args = parser.parse_args()
+
+    # Same settings as the application, e.g. YOLO_BACKEND or YOLO_TILED
+    env_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env')
+    if os.path.exists(env_path):
+        from dotenv import load_dotenv
+        load_dotenv(env_path)
+
+    try:
+        drawings = find_drawings(args.inputs)
+    except ValueError as e:
+        print(str(e), file=sys.stderr)
+        return 1
+    if not drawings:
+        print("No PDF drawings found")
+        return 1
+
+    if not args.no_symbols:
+        # Checked once up front, a drawing without symbols would otherwise be logged as done
+        detector = create_detector(args.model)
+        if detector.get_model() is None:
+            print(f"Could not load the detector from {detector.model_path} ({detector.load_error}), "
+                  f"pass --model or --no-symbols", file=sys.stderr)
+            return 1
+        detector.unload()
+
+    workers = args.workers or int(os.getenv('BATCH_WORKERS', DEFAULT_BATCH_WORKERS))
+    batch = BatchRun(drawings, args.output, workers, model_path=args.model,
+                     detect_symbols=not args.no_symbols, verbose=args.verbose)
+    return 0 if batch.run(restart=args.restart) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,82 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from PyQt5 import QtCore
+
+
+# Concurrent row submission, can be overridden in .env
+#   SUBMIT_WORKERS: Rows sent to the server at the same time
+DEFAULT_SUBMIT_WORKERS = 4
+
+_NOT_SENT = object()  # Result of a row skipped after cancel
+
+
+class RowSubmissionWorker(QtCore.QThread):
+    """Send table rows to the API on a bounded pool of worker threads.
+
+    rows is a list of (row number, payload) and submit_fn the API call for one
+    payload (e.g. api.create_master_boc); a row fails when the call returns None
+    or raises. Progress is reported per row; cancel() stops rows that were not
+    sent yet, rows already in flight still complete.
+    """
+    row_finished = QtCore.pyqtSignal(int, bool)  # (row number, success)
+    progress = QtCore.pyqtSignal(int, int)  # (rows done, rows total)
+    # (failed row numbers, success count, row numbers not sent because of cancel)
+    submission_finished = QtCore.pyqtSignal(list, int, list)
+
+    def __init__(self, rows, submit_fn, max_workers=None, parent=None):
+        super().__init__(parent)
+        self.rows = list(rows)
+        self.submit_fn = submit_fn
+        self.max_workers = max_workers or int(os.getenv('SUBMIT_WORKERS', DEFAULT_SUBMIT_WORKERS))
+        self._cancel_event = threading.Event()
+
+        self.failed_rows = []
+        self.success_count = 0
+        self.cancelled_rows = []
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def is_cancelled(self):
+        return self._cancel_event.is_set()
+
+    def run(self):
+        total = len(self.rows)
+        done = 0
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self._submit_row, payload): row for row, payload in self.rows}
+
+            for future in as_completed(futures):
+                row = futures[future]
+                if future.cancelled() or future.result() is _NOT_SENT:
+                    self.cancelled_rows.append(row)
+                    continue
+
+                ok = future.result() is not None
+                if ok:
+                    self.success_count += 1
+                else:
+                    self.failed_rows.append(row)
+                done += 1
+                self.row_finished.emit(row, ok)
+                self.progress.emit(done, total)
+
+                if self._cancel_event.is_set():
+                    for pending in futures:
+                        pending.cancel()
+
+        self.failed_rows.sort()
+        self.cancelled_rows.sort()
+        self.submission_finished.emit(self.failed_rows, self.success_count, self.cancelled_rows)
+
+    def _submit_row(self, payload):
+        if self._cancel_event.is_set():
+            return _NOT_SENT
+        try:
+            return self.submit_fn(payload)
+        except Exception as e:
+            print(f"Error submitting row: {str(e)}")
+            return None
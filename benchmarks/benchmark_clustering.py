@@ -0,0 +1,107 @@
+"""Benchmark PDF-span to YOLO-box association on synthetic dense pages.
+
+Usage:
+    python benchmarks/benchmark_clustering.py [--spans 2500] [--yolo 300] [--seed 0]
+
+Compares checking every YOLO box per span (the previous behaviour of
+ClusterDetector.cluster_detections) with the SpatialGrid lookup, and verifies
+both pick the same YOLO box for every span.
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from algorithms import ClusterDetector  # noqa: E402
+
+
+def make_box(x, y, w, h):
+    return [[x, y], [x + w, y], [x + w, y + h], [x, y + h]]
+
+
+def make_page(num_spans, num_yolo, seed, width=6740, height=4768):
+    """Scene-sized A1 page with text spans, some placed right next to a GD&T symbol"""
+    rng = random.Random(seed)
+    yolo = []
+    for _ in range(num_yolo):
+        w, h = rng.uniform(15, 40), rng.uniform(15, 40)
+        x, y = rng.uniform(0, width - w), rng.uniform(0, height - h)
+        yolo.append({'box': make_box(x, y, w, h), 'class_name': rng.choice('ABCDEF')})
+
+    spans = []
+    for i in range(num_spans):
+        if yolo and i % 4 == 0:
+            symbol = yolo[rng.randrange(len(yolo))]['box']
+            (x1, y1), (x2, y2) = symbol[0], symbol[2]
+            if rng.random() < 0.5:
+                # Text to the right of the symbol
+                spans.append(make_box(x2 + rng.uniform(1, 35), (y1 + y2) / 2 - 10 + rng.uniform(-15, 15),
+                                      rng.uniform(30, 120), 20))
+            else:
+                # Tall text above the symbol
+                spans.append(make_box((x1 + x2) / 2 - 8 + rng.uniform(-10, 10), y1 - 60 - rng.uniform(0, 45), 16, 60))
+        else:
+            w, h = rng.uniform(20, 150), rng.uniform(12, 60)
+            spans.append(make_box(rng.uniform(0, width - w), rng.uniform(0, height - h), w, h))
+    return spans, yolo
+
+
+def associate_brute_force(spans, yolo):
+    results = []
+    for pdf_box in spans:
+        match = (None, None)
+        for yolo_det in yolo:
+            is_associated, assoc_type = ClusterDetector.check_yolo_association(pdf_box, yolo_det['box'])
+            if is_associated:
+                match = (yolo_det, assoc_type)
+                break
+        results.append(match)
+    return results
+
+
+def associate_indexed(spans, yolo):
+    yolo_index = ClusterDetector.build_yolo_index(yolo)
+    return [ClusterDetector.find_yolo_association(pdf_box, yolo, yolo_index) for pdf_box in spans]
+
+
+def timed(func, *args):
+    # check_yolo_association prints debug output for vertical candidates
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+    return result, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--spans', type=int, default=2500, help="Text spans on the page")
+    parser.add_argument('--yolo', type=int, default=300, help="YOLO detections on the page")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    spans, yolo = make_page(args.spans, args.yolo, args.seed)
+
+    brute, brute_time = timed(associate_brute_force, spans, yolo)
+    indexed, indexed_time = timed(associate_indexed, spans, yolo)
+
+    mismatches = sum(
+        1 for (b_det, b_type), (i_det, i_type) in zip(brute, indexed)
+        if b_det is not i_det or b_type != i_type
+    )
+    associated = sum(1 for det, _ in brute if det is not None)
+
+    print(f"{len(spans)} spans, {len(yolo)} YOLO boxes, {associated} associations")
+    print(f"all boxes:    {brute_time * 1000:9.1f} ms")
+    print(f"spatial grid: {indexed_time * 1000:9.1f} ms  ({brute_time / indexed_time:.1f}x)")
+    print(f"mismatches:   {mismatches}")
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,160 @@
+"""Compare latency and box agreement of the YOLO inference backends.
+
+Usage:
+    python benchmarks/benchmark_inference.py drawing.pdf [more.pdf|image.png ...]
+        [--backends torch onnx openvino] [--threads 4] [--int8] [--runs 5] [--conf 0.75]
+
+PDF pages are rendered at 300 DPI like DetectionEngine.detect_page. The torch
+backend is the reference: every other backend is scored by how many of the
+torch boxes it reproduces (same class, IoU >= 0.5) and by the mean IoU of those
+matches.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from inference_backends import create_backend  # noqa: E402
+from model_service import DEFAULT_MODEL_PATH  # noqa: E402
+
+
+def load_images(paths, dpi=300, max_pages=None):
+    """Render PDF pages / read images into BGR arrays"""
+    images = []
+    for path in paths:
+        if path.lower().endswith('.pdf'):
+            import fitz
+            doc = fitz.open(path)
+            for page_index, page in enumerate(doc):
+                if max_pages is not None and page_index >= max_pages:
+                    break
+                pix = page.get_pixmap(matrix=fitz.Matrix(dpi / 72, dpi / 72))
+                img = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, pix.n)
+                images.append((f"{os.path.basename(path)}#{page_index + 1}", img[..., :3].copy()))
+        else:
+            img = cv2.imread(path)
+            if img is None:
+                print(f"Skipping unreadable image: {path}")
+                continue
+            images.append((os.path.basename(path), img))
+    return images
+
+
+def box_iou(boxes1, boxes2):
+    """Pairwise IoU of two (N, 4) / (M, 4) xyxy arrays"""
+    boxes1 = np.asarray(boxes1, dtype=np.float64).reshape(-1, 4)
+    boxes2 = np.asarray(boxes2, dtype=np.float64).reshape(-1, 4)
+    x1 = np.maximum(boxes1[:, None, 0], boxes2[None, :, 0])
+    y1 = np.maximum(boxes1[:, None, 1], boxes2[None, :, 1])
+    x2 = np.minimum(boxes1[:, None, 2], boxes2[None, :, 2])
+    y2 = np.minimum(boxes1[:, None, 3], boxes2[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area1 = (boxes1[:, 2] - boxes1[:, 0]) * (boxes1[:, 3] - boxes1[:, 1])
+    area2 = (boxes2[:, 2] - boxes2[:, 0]) * (boxes2[:, 3] - boxes2[:, 1])
+    union = area1[:, None] + area2[None, :] - inter
+    return np.where(union > 0, inter / np.maximum(union, 1e-9), 0.0)
+
+
+def match_detections(reference, candidate, iou_threshold=0.5):
+    """Greedy same-class matching; returns (matched, mean IoU of matches)"""
+    if not reference or not candidate:
+        return 0, 0.0
+
+    iou = box_iou([d['box'] for d in reference], [d['box'] for d in candidate])
+    same_class = np.array([[r['class'] == c['class'] for c in candidate] for r in reference])
+    iou = np.where(same_class, iou, 0.0)
+
+    matched_ious = []
+    used = set()
+    for ref_idx in np.argsort(-iou.max(axis=1)):
+        for cand_idx in np.argsort(-iou[ref_idx]):
+            if cand_idx in used or iou[ref_idx, cand_idx] < iou_threshold:
+                continue
+            used.add(cand_idx)
+            matched_ious.append(iou[ref_idx, cand_idx])
+            break
+
+    return len(matched_ious), float(np.mean(matched_ious)) if matched_ious else 0.0
+
+
+def benchmark_backend(backend, images, runs, conf):
+    """Return (per-image latencies in seconds, detections of the last run per image)"""
+    latencies = []
+    detections = []
+
+    # Warm-up run so allocation and graph optimization are not timed
+    backend.detect(images[0][1], conf)
+
+    for _, image in images:
+        image_times = []
+        result = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            result = backend.detect(image, conf)
+            image_times.append(time.perf_counter() - start)
+        latencies.append(statistics.median(image_times))
+        detections.append(result)
+    return latencies, detections
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('inputs', nargs='+', help="PDF files or images")
+    parser.add_argument('--model', default=DEFAULT_MODEL_PATH, help="Path to best.pt")
+    parser.add_argument('--backends', nargs='+', default=['torch', 'onnx'], help="torch, onnx, openvino")
+    parser.add_argument('--threads', type=int, default=None, help="CPU threads per backend")
+    parser.add_argument('--int8', action='store_true', help="Use INT8 graphs for onnx/openvino")
+    parser.add_argument('--runs', type=int, default=5, help="Timed runs per image")
+    parser.add_argument('--conf', type=float, default=0.75, help="Confidence threshold")
+    parser.add_argument('--max-pages', type=int, default=None, help="Pages rendered per PDF")
+    args = parser.parse_args()
+
+    images = load_images(args.inputs, max_pages=args.max_pages)
+    if not images:
+        print("No images to benchmark")
+        return 1
+    print(f"Benchmarking {len(images)} image(s), {args.runs} run(s) each\n")
+
+    backends = list(dict.fromkeys(['torch'] + args.backends))
+    results = {}
+    for name in backends:
+        start = time.perf_counter()
+        backend = create_backend(name, args.model, num_threads=args.threads, int8=args.int8)
+        load_time = time.perf_counter() - start
+        latencies, detections = benchmark_backend(backend, images, args.runs, args.conf)
+        results[name] = {'load_time': load_time, 'latencies': latencies, 'detections': detections}
+
+    reference = results['torch']
+    print(f"{'backend':<10} {'load (s)':>9} {'median (ms)':>12} {'mean (ms)':>10} {'speedup':>8} "
+          f"{'boxes':>6} {'recall':>7} {'precision':>9} {'mean IoU':>9}")
+    for name, result in results.items():
+        median_ms = statistics.median(result['latencies']) * 1000
+        mean_ms = statistics.mean(result['latencies']) * 1000
+        speedup = statistics.mean(reference['latencies']) / statistics.mean(result['latencies'])
+
+        total_ref = sum(len(d) for d in reference['detections'])
+        total_cand = sum(len(d) for d in result['detections'])
+        matched = 0
+        weighted_iou = 0.0
+        for ref_dets, cand_dets in zip(reference['detections'], result['detections']):
+            count, mean_iou = match_detections(ref_dets, cand_dets)
+            matched += count
+            weighted_iou += count * mean_iou
+        recall = matched / total_ref if total_ref else 1.0
+        precision = matched / total_cand if total_cand else 1.0
+        mean_iou = weighted_iou / matched if matched else 0.0
+
+        print(f"{name:<10} {result['load_time']:>9.2f} {median_ms:>12.1f} {mean_ms:>10.1f} {speedup:>7.2f}x "
+              f"{total_cand:>6} {recall:>7.3f} {precision:>9.3f} {mean_iou:>9.3f}")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,136 @@
+"""Profile the import cost of the application and the time until the main window is shown.
+
+Usage:
+    python benchmarks/benchmark_startup.py [--runs 5] [--top 20] [--budget-ms 1500] [--no-window]
+
+Every run starts a fresh interpreter. The import profile comes from
+`python -X importtime -c "import SmartMetrology_Design_new"` and lists the
+median self and cumulative time of the costliest modules. The window run
+imports the application, creates MainWindow, shows it and stops once the first
+frame is painted, reporting the modules that were loaded on first use before
+that point. The exit code is 1 when the median window time exceeds the budget.
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_MODULE = 'SmartMetrology_Design_new'
+
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$')
+
+WINDOW_SCRIPT = """
+import time
+start = time.perf_counter()
+import sys
+import {module} as app_module
+from PyQt5 import QtCore, QtWidgets
+
+app = QtWidgets.QApplication(sys.argv)
+window = app_module.MainWindow()
+window.show()
+
+def shown():
+    print(f"WINDOW_MS {{(time.perf_counter() - start) * 1000:.1f}}")
+    print("LOADED_ON_FIRST_USE " + ",".join(app_module.load_times))
+    app.quit()
+
+QtCore.QTimer.singleShot(0, shown)
+app.exec_()
+"""
+
+
+def run_python(args, env=None):
+    return subprocess.run([sys.executable] + args, cwd=ROOT, env=env, capture_output=True, text=True)
+
+
+def profile_imports():
+    """{module: (self us, cumulative us)} of the application imports in one `-X importtime` run"""
+    result = run_python(['-X', 'importtime', '-c', f"import {APP_MODULE}"])
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {APP_MODULE} failed:\n{result.stderr[-2000:]}")
+
+    # Lines are printed as imports finish, so the application's imports are the
+    # ones between the previous top level import (interpreter startup) and itself
+    modules = {}
+    subtree = {}
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        subtree[name] = (int(self_us), int(cumulative_us))
+        if len(indent) == 1:
+            if name == APP_MODULE:
+                modules = subtree
+            subtree = {}
+    return modules
+
+
+def time_window(env):
+    """(ms until the main window is shown, modules loaded on first use before that)"""
+    result = run_python(['-c', WINDOW_SCRIPT.format(module=APP_MODULE)], env=env)
+    window_ms = None
+    loaded = []
+    for line in result.stdout.splitlines():
+        if line.startswith('WINDOW_MS '):
+            window_ms = float(line.split()[1])
+        elif line.startswith('LOADED_ON_FIRST_USE '):
+            loaded = [name for name in line.split(' ', 1)[1].split(',') if name]
+    if window_ms is None:
+        raise RuntimeError(f"Main window was not shown:\n{result.stderr[-2000:]}")
+    return window_ms, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5, help="Fresh interpreters per measurement")
+    parser.add_argument('--top', type=int, default=20, help="Modules listed in the import profile")
+    parser.add_argument('--budget-ms', type=float, default=1500, help="Budget until the main window is shown")
+    parser.add_argument('--no-window', action='store_true', help="Only profile the imports")
+    args = parser.parse_args()
+
+    self_times = defaultdict(list)
+    cumulative_times = defaultdict(list)
+    totals = []
+    for _ in range(args.runs):
+        modules = profile_imports()
+        for name, (self_us, cumulative_us) in modules.items():
+            self_times[name].append(self_us)
+            cumulative_times[name].append(cumulative_us)
+        totals.append(modules[APP_MODULE][1])
+
+    print(f"Import of {APP_MODULE}: median {statistics.median(totals) / 1000:.1f} ms "
+          f"over {args.runs} run(s)\n")
+
+    # Cumulative time includes the imports a module triggers, self time only its own body
+    print(f"{'module':<45} {'self (ms)':>10} {'cumulative (ms)':>16}")
+    ranked = sorted(cumulative_times, key=lambda name: statistics.median(cumulative_times[name]), reverse=True)
+    for name in [name for name in ranked if name != APP_MODULE][:args.top]:
+        print(f"{name:<45} {statistics.median(self_times[name]) / 1000:>10.1f} "
+              f"{statistics.median(cumulative_times[name]) / 1000:>16.1f}")
+
+    if args.no_window:
+        return 0
+
+    env = dict(os.environ)
+    env.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    window_times = []
+    loaded = []
+    for _ in range(args.runs):
+        window_ms, loaded = time_window(env)
+        window_times.append(window_ms)
+
+    median_ms = statistics.median(window_times)
+    print(f"\nMain window shown after: median {median_ms:.0f} ms, max {max(window_times):.0f} ms "
+          f"(budget {args.budget_ms:.0f} ms)")
+    print(f"Deferred modules loaded before the window was shown: {', '.join(loaded) or 'none'}")
+    return 0 if median_ms <= args.budget_ms else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
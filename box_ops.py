@@ -0,0 +1,119 @@
+import numpy as np
+
+
+def to_xyxy(boxes):
+    """Convert boxes to an (N, 4) float array of x1, y1, x2, y2.
+
+    Accepts a list of point-list polygons ([[x, y], ...], the scene format used
+    throughout the app), a list of [x1, y1, x2, y2] boxes, or an (N, 4) array.
+    """
+    if isinstance(boxes, np.ndarray) and boxes.ndim == 2 and boxes.shape[1] == 4:
+        return boxes.astype(np.float64, copy=False)
+
+    boxes = list(boxes)
+    if not boxes:
+        return np.empty((0, 4), dtype=np.float64)
+
+    try:
+        points = np.asarray(boxes, dtype=np.float64)
+    except ValueError:
+        points = None  # Polygons with different numbers of points
+
+    if points is not None and points.ndim == 2 and points.shape[1] == 4:
+        return points
+    if points is not None and points.ndim == 3:
+        return np.column_stack([points[:, :, 0].min(axis=1), points[:, :, 1].min(axis=1),
+                                points[:, :, 0].max(axis=1), points[:, :, 1].max(axis=1)])
+
+    xyxy = np.empty((len(boxes), 4), dtype=np.float64)
+    for i, box in enumerate(boxes):
+        box_points = np.asarray(box, dtype=np.float64).reshape(-1, 2)
+        xyxy[i, :2] = box_points.min(axis=0)
+        xyxy[i, 2:] = box_points.max(axis=0)
+    return xyxy
+
+
+def areas(boxes):
+    """Area of each box of an (N, 4) array"""
+    boxes = to_xyxy(boxes)
+    return (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+
+
+def widths(boxes):
+    """Width of each box of an (N, 4) array"""
+    boxes = to_xyxy(boxes)
+    return boxes[:, 2] - boxes[:, 0]
+
+
+def pairwise_iou(boxes1, boxes2):
+    """(N, M) matrix of Intersection over Union between two sets of boxes"""
+    boxes1, boxes2 = to_xyxy(boxes1), to_xyxy(boxes2)
+
+    inter_w = np.minimum(boxes1[:, None, 2], boxes2[None, :, 2]) - np.maximum(boxes1[:, None, 0], boxes2[None, :, 0])
+    inter_h = np.minimum(boxes1[:, None, 3], boxes2[None, :, 3]) - np.maximum(boxes1[:, None, 1], boxes2[None, :, 1])
+    # Touching or disjoint boxes have no intersection
+    intersection = np.where((inter_w > 0) & (inter_h > 0), inter_w * inter_h, 0.0)
+
+    union = areas(boxes1)[:, None] + areas(boxes2)[None, :] - intersection
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where((intersection > 0) & (union > 0), intersection / union, 0.0)
+
+
+def pairwise_containment(inner_boxes, outer_boxes, margin=1):
+    """(N, M) boolean matrix, True where inner box i lies within outer box j.
+
+    A small margin (1 pixel by default) absorbs floating point differences.
+    """
+    inner, outer = to_xyxy(inner_boxes), to_xyxy(outer_boxes)
+    return ((inner[:, None, 0] >= outer[None, :, 0] - margin) &
+            (inner[:, None, 2] <= outer[None, :, 2] + margin) &
+            (inner[:, None, 1] >= outer[None, :, 1] - margin) &
+            (inner[:, None, 3] <= outer[None, :, 3] + margin))
+
+
+def iou(box1, box2):
+    """Intersection over Union between two single boxes"""
+    return float(pairwise_iou([box1], [box2])[0, 0])
+
+
+def is_contained(inner_box, outer_box, margin=1):
+    """pairwise_containment for a single pair of boxes"""
+    return bool(pairwise_containment([inner_box], [outer_box], margin)[0, 0])
+
+
+def overlaps_any(boxes, others, threshold):
+    """(N,) boolean array, True where a box has IoU above threshold with any of the others"""
+    boxes = to_xyxy(boxes)
+    others = to_xyxy(others)
+    if len(boxes) == 0 or len(others) == 0:
+        return np.zeros(len(boxes), dtype=bool)
+    return (pairwise_iou(boxes, others) > threshold).any(axis=1)
+
+
+def greedy_suppression(boxes, threshold, priority=None):
+    """Greedy NMS-style suppression, returns the indices of the kept boxes.
+
+    Boxes are visited by descending priority (ties keep their input order), or in
+    input order when no priority is given. A box is kept unless its IoU with an
+    already kept box is above threshold. The kept indices are returned in visiting
+    order.
+    """
+    boxes = to_xyxy(boxes)
+    if len(boxes) == 0:
+        return np.empty(0, dtype=np.int64)
+
+    if priority is None:
+        order = np.arange(len(boxes))
+    else:
+        order = np.argsort(-np.asarray(priority, dtype=np.float64), kind='stable')
+
+    overlaps = pairwise_iou(boxes[order], boxes[order]) > threshold
+    suppressed = np.zeros(len(order), dtype=bool)
+    keep = []
+    for i in range(len(order)):
+        if suppressed[i]:
+            continue
+        keep.append(i)
+        suppressed[i + 1:] |= overlaps[i, i + 1:]
+
+    return order[keep]
@@ -0,0 +1,1049 @@
+import math
+import re
+import threading
+import time
+import weakref
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+import box_ops
+from lazy_imports import lazy_import
+from model_service import yolo_service
+from zone_grid import ZoneGridDetector
+
+# Imported on first use
+fitz = lazy_import('fitz')
+cv2 = lazy_import('cv2')
+
+
+# Scene coordinates are PDF points times this factor (the viewer renders pages at 144 DPI)
+SCENE_SCALE = 2
+
+
+class DimensionParser:
+    DIMENSIONAL_PATTERN = r'^-?\d*\.?\d+$|^-?\d+,\d+$'
+    TOLERANCE_PATTERN = r'±?\d*\.?\d+|\+\d*\.?\d+/-\d*\.?\d+'
+    THREAD_PATTERN = r'M(\d{1,2})'
+    _patterns = None
+
+    @staticmethod
+    def compile_patterns():
+        """Compiled patterns, compiled on first use (or ahead of time by the warm-up)"""
+        if DimensionParser._patterns is None:
+            DimensionParser._patterns = {
+                'dimensional': re.compile(DimensionParser.DIMENSIONAL_PATTERN),
+                'tolerance': re.compile(DimensionParser.TOLERANCE_PATTERN),
+                'thread': re.compile(DimensionParser.THREAD_PATTERN)
+            }
+        return DimensionParser._patterns
+
+    @staticmethod
+    def is_dimensional_value(text):
+        """Check if text likely represents a dimensional value"""
+        text = text.strip().lower()
+
+        # Skip single + or - characters
+        if text in ['+', '-']:
+            return False
+
+        # Check if it's a tolerance value starting with + or -
+        if text.startswith('+') or text.startswith('-'):
+            try:
+                float(text.replace(',', '.'))
+                return True
+            except ValueError:
+                return False
+
+        # Remove common prefixes for dimension check
+        for prefix in ['ø', 'r', 'm', '±', '∅']:
+            text = text.replace(prefix, '')
+
+        if '°' in text:
+            text = text.replace('°', '')
+            try:
+                float(text)
+                return True
+            except ValueError:
+                return False
+
+        patterns = DimensionParser.compile_patterns()
+        text = text.replace(',', '.')
+        return bool(patterns['dimensional'].match(text) or patterns['tolerance'].match(text))
+
+    @staticmethod
+    def determine_dimension_type(text, nominal_value):
+        """Determine the dimension type based on the text and nominal value"""
+        # Check for Radius
+        if text.startswith('R') or text.startswith('r'):
+            return "Radius"
+
+        # Check for Reference dimensions (in parentheses)
+        if text.startswith("(") and text.endswith(")"):
+            inner_text = text[1:-1].strip()
+            if inner_text.startswith('R') or inner_text.startswith('r'):
+                return "Radius-Reference"
+            elif '°' in inner_text:
+                return "Angular-Reference"
+            else:
+                return "Length-Reference"
+
+        # Check for Angular dimensions
+        if '°' in text:
+            if 'x' in text.lower():
+                return "Chamfer"
+            return "Angular"
+
+        # Check for Thread dimensions
+        match = DimensionParser.compile_patterns()['thread'].search(text)
+        if match:
+            return "Thread"
+
+        # Default to Length
+        return "Length"
+
+    @staticmethod
+    def parse_dimension(text):
+        """Parse dimension text to extract nominal value, tolerances, and type"""
+        try:
+            text = text.strip()
+            nominal_value = ""
+            upper_tol = ""
+            lower_tol = ""
+            dim_type = "Length"  # default type
+
+            # Remove spaces
+            text = ''.join(text.split())
+
+            # Handle pure tolerance values
+            if text.startswith('+'):
+                nominal_value = ""
+                upper_tol = text  # Keep the entire text including +
+                lower_tol = "0"
+                dim_type = "Tolerance"
+                return dim_type, upper_tol, lower_tol, nominal_value
+
+            # Handle THRU dimensions
+            if "THRU" in text.upper():
+                numeric_part = text.upper().split("THRU")[0].strip()
+                return "THRU", "0", "0", numeric_part
+
+            if '±' in text:
+                parts = text.split('±')
+                nominal_value = parts[0].strip()
+                if len(parts) > 1:
+                    tol = parts[1].strip().split()[0]
+                    upper_tol = f"+{tol}"
+                    lower_tol = f"-{tol}"
+
+            elif '+' in text and not text.startswith('+'):
+                # Handle + similar to ± symbol
+                parts = text.split('+')
+                nominal_value = parts[0].strip()
+                if len(parts) > 1:
+                    tol = parts[1].strip().split()[0]
+                    upper_tol = f"+{tol}"
+                    lower_tol = f"0"
+
+            elif '+' in text and text.startswith('+'):
+                # Handle pure tolerance values
+                nominal_value = ""
+                upper_tol = text  # Keep the entire text including + as upper tolerance
+                lower_tol = "0"
+                dim_type = "Tolerance"
+
+            else:
+                nominal_value = text
+                upper_tol = "0"
+                lower_tol = "0"
+
+            # Clean up nominal value
+            nominal_value = ''.join(nominal_value.split())
+
+            # Special handling for reference dimensions
+            if text.startswith("(") and text.endswith(")"):
+                nominal_value = text  # Keep the full text including parentheses
+                upper_tol = ""
+                lower_tol = ""
+
+            # Determine dimension type
+            dim_type = DimensionParser.determine_dimension_type(text, nominal_value)
+
+            return dim_type, upper_tol, lower_tol, nominal_value
+
+        except Exception as e:
+            print(f"Error parsing dimension: {str(e)}")
+            return "Length", "0", "0", text
+
+
+class SpatialGrid:
+    """Uniform grid over axis-aligned boxes for fast window queries"""
+
+    def __init__(self, bounds, cell_size=64):
+        # bounds: (N, 4) array of x1, y1, x2, y2
+        self.bounds = np.asarray(bounds, dtype=np.float64).reshape(-1, 4)
+        self.cell_size = cell_size
+        self.cells = {}
+
+        if len(self.bounds) == 0:
+            return
+
+        # Boxes with non-finite bounds are never returned by queries
+        valid = np.isfinite(self.bounds).all(axis=1)
+        cell_bounds = np.floor(np.where(valid[:, None], self.bounds, 0) / cell_size).astype(np.int64)
+        for index, (cx1, cy1, cx2, cy2) in enumerate(cell_bounds.tolist()):
+            if not valid[index]:
+                continue
+            for cx in range(cx1, cx2 + 1):
+                for cy in range(cy1, cy2 + 1):
+                    self.cells.setdefault((cx, cy), []).append(index)
+
+    @staticmethod
+    def box_bounds(boxes):
+        """Convert a list of 4-point polygon boxes to an (N, 4) bounds array"""
+        if not boxes:
+            return np.empty((0, 4))
+        points = np.asarray(boxes, dtype=np.float64)
+        return np.column_stack([points[:, :, 0].min(axis=1), points[:, :, 1].min(axis=1),
+                                points[:, :, 0].max(axis=1), points[:, :, 1].max(axis=1)])
+
+    def query(self, x1, y1, x2, y2):
+        """Return the sorted indices of all boxes intersecting the window (edges inclusive)"""
+        if not self.cells:
+            return []
+
+        cx1, cy1 = int(math.floor(x1 / self.cell_size)), int(math.floor(y1 / self.cell_size))
+        cx2, cy2 = int(math.floor(x2 / self.cell_size)), int(math.floor(y2 / self.cell_size))
+
+        candidates = set()
+        for cx in range(cx1, cx2 + 1):
+            for cy in range(cy1, cy2 + 1):
+                candidates.update(self.cells.get((cx, cy), ()))
+
+        return sorted(
+            i for i in candidates
+            if self.bounds[i, 0] <= x2 and self.bounds[i, 2] >= x1 and
+            self.bounds[i, 1] <= y2 and self.bounds[i, 3] >= y1
+        )
+
+
+@dataclass
+class TextSpan:
+    """A text span of the page, box as 4 [x, y] scene points"""
+    text: str
+    box: List[List[float]]
+    rotation: int = 0
+
+    def to_dict(self) -> Dict:
+        # PyMuPDF doesn't provide confidence scores
+        return {'text': self.text, 'box': self.box, 'confidence': 1.0, 'rotation': self.rotation}
+
+
+@dataclass
+class SymbolDetection:
+    """A detector box of a GD&T symbol, box as 4 [x, y] scene points"""
+    box: List[List[float]]
+    class_name: str
+    confidence: float
+    class_id: Optional[int] = None
+
+    def to_dict(self) -> Dict:
+        return {'box': self.box, 'confidence': self.confidence, 'class': self.class_id,
+                'class_name': self.class_name}
+
+
+@dataclass
+class DimensionRecord:
+    """One row of the dimension table, independent of any widget"""
+    bbox: List[List[float]]
+    text: str
+    nominal: str
+    upper_tol: str
+    lower_tol: str
+    dim_type: str
+    zone: Optional[str] = None
+    yolo_class: Optional[str] = None
+    yolo_confidence: Optional[float] = None
+    midpoint: Optional[Tuple[float, float]] = None
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+@dataclass
+class PageDetections:
+    """Result of processing a page or an area of it"""
+    records: List[DimensionRecord]
+    spans: List[TextSpan]
+    symbols: List[SymbolDetection]
+    page_number: Optional[int] = None
+    rotation: int = 0
+    timings: Dict[str, float] = field(default_factory=dict)
+
+
+class PageSpanStore:
+    """Text layer of one page, extracted once, in scene coordinates.
+
+    The spans are kept in extraction order in a record array (SPAN_DTYPE) with a
+    SpatialGrid over their boxes, so area selection, clustering and duplicate
+    checks query the index instead of parsing the page's text again.
+    """
+    SPAN_DTYPE = np.dtype([
+        ('text', object),
+        ('x1', np.float64), ('y1', np.float64), ('x2', np.float64), ('y2', np.float64),
+        ('size', np.float32),  # Font size in points
+        ('dir_x', np.float32), ('dir_y', np.float32)  # Writing direction in the scene, (1, 0) for horizontal text
+    ])
+
+    def __init__(self, spans, rotation=0):
+        self.spans = spans
+        self.rotation = rotation
+        self.boxes = np.column_stack([spans['x1'], spans['y1'], spans['x2'], spans['y2']])
+        self.index = SpatialGrid(self.boxes)
+        self._center_index = None
+
+    @classmethod
+    def from_page(cls, page):
+        """Parse the text layer of the page; empty spans are left out"""
+        # Text is extracted in unrotated page coordinates, the scene shows the page rotated
+        to_scene = page.rotation_matrix * SCENE_SCALE
+        rotate = fitz.Matrix(page.rotation_matrix.a, page.rotation_matrix.b,
+                             page.rotation_matrix.c, page.rotation_matrix.d, 0, 0)
+        rows = []
+        for block in page.get_text("dict")['blocks']:
+            for line in block.get('lines', []):
+                dir_x, dir_y = fitz.Point(line['dir']) * rotate
+                for span in line['spans']:
+                    text = span['text'].strip()
+                    if not text:  # Skip empty text
+                        continue
+                    # MuPDF computes in single precision, rounding drops the float32 noise (76.3499984741211)
+                    x1, y1, x2, y2 = (round(v, 3) for v in fitz.Rect(span['bbox']) * to_scene)
+                    rows.append((text, x1, y1, x2, y2, span['size'], dir_x, dir_y))
+        return cls(np.array(rows, dtype=cls.SPAN_DTYPE), page.rotation)
+
+    def __len__(self):
+        return len(self.spans)
+
+    def to_spans(self, indices=None):
+        """TextSpans of the given indices (all by default), boxes as 4 [x, y] points"""
+        indices = range(len(self.spans)) if indices is None else indices
+        spans = []
+        for i in indices:
+            x1, y1, x2, y2 = self.boxes[i].tolist()
+            spans.append(TextSpan(self.spans['text'][i], [[x1, y1], [x2, y1], [x2, y2], [x1, y2]]))
+        return spans
+
+    def in_area(self, x1, y1, x2, y2):
+        """Indices of the spans whose center lies inside the scene rect, in extraction order"""
+        candidates = np.asarray(self.index.query(x1, y1, x2, y2), dtype=np.int64)
+        if not len(candidates):
+            return candidates
+        centers = self.center_index()[0][candidates]
+        inside = ((centers[:, 0] >= x1) & (centers[:, 0] <= x2) &
+                  (centers[:, 1] >= y1) & (centers[:, 1] <= y2))
+        return candidates[inside]
+
+    def overlapping(self, boxes, threshold):
+        """Indices of the spans with IoU above threshold with any of the boxes, e.g. rows already in the table"""
+        found = set()
+        for box in box_ops.to_xyxy(boxes):
+            candidates = self.index.query(*box)
+            if candidates:
+                overlaps = box_ops.overlaps_any(self.boxes[candidates], box[None, :], threshold)
+                found.update(index for index, is_overlapping in zip(candidates, overlaps) if is_overlapping)
+        return np.array(sorted(found), dtype=np.int64)
+
+    def center_index(self):
+        """(centers, SpatialGrid) over all spans, as DimensionClusterer.build_span_center_index returns it"""
+        if self._center_index is None:
+            # Same arithmetic as the mean of the 4 box points
+            x1, y1, x2, y2 = self.boxes.T
+            centers = np.column_stack([(x1 + x2 + x2 + x1) / 4, (y1 + y1 + y2 + y2) / 4])
+            self._center_index = (centers, SpatialGrid(np.hstack([centers, centers])))
+        return self._center_index
+
+
+class DimensionClusterer:
+    """Clustering of text spans and symbol detections into dimension boxes (no GUI involved)"""
+
+    # Geometric rules of check_yolo_association
+    ASSOC_CLUSTER_X = 30  # Horizontal clustering threshold
+    ASSOC_CLUSTER_Y_HORIZONTAL = 20  # Vertical threshold for horizontal clustering
+    ASSOC_CLUSTER_Y_VERTICAL = 40  # Increased vertical threshold for vertical GDT
+
+    @staticmethod
+    def check_yolo_association(pdf_box, yolo_box):
+        """Check if PDF box and YOLO box are associated based on geometric rules"""
+        CLUSTER_X = DimensionClusterer.ASSOC_CLUSTER_X
+        CLUSTER_Y_HORIZONTAL = DimensionClusterer.ASSOC_CLUSTER_Y_HORIZONTAL
+        CLUSTER_Y_VERTICAL = DimensionClusterer.ASSOC_CLUSTER_Y_VERTICAL
+        
+        # Get box bounds
+        pdf_x1 = min(p[0] for p in pdf_box)
+        pdf_y1 = min(p[1] for p in pdf_box)
+        pdf_x2 = max(p[0] for p in pdf_box)
+        pdf_y2 = max(p[1] for p in pdf_box)
+        
+        yolo_x1 = min(p[0] for p in yolo_box)
+        yolo_y1 = min(p[1] for p in yolo_box)
+        yolo_x2 = max(p[0] for p in yolo_box)
+        yolo_y2 = max(p[1] for p in yolo_box)
+
+        # Calculate centers
+        pdf_center_x = (pdf_x1 + pdf_x2) / 2
+        pdf_center_y = (pdf_y1 + pdf_y2) / 2
+        yolo_center_x = (yolo_x1 + yolo_x2) / 2
+        yolo_center_y = (yolo_y1 + yolo_y2) / 2
+
+        # Calculate box dimensions to determine if GDT is vertical
+        pdf_height = pdf_y2 - pdf_y1
+        pdf_width = pdf_x2 - pdf_x1
+        is_vertical_gdt = pdf_height > pdf_width * 1.2  # GDT symbol is taller than wide
+
+        if is_vertical_gdt:
+            # For vertical GDT, check for text above only
+            if pdf_y2 < yolo_y1:  # Text must be above GDT
+                x_dist = abs(pdf_center_x - yolo_center_x)  # Horizontal alignment check
+                y_dist = yolo_y1 - pdf_y2   # Vertical distance between text bottom and GDT top
+                
+                # Print debug information
+                print(f"Vertical GDT check:")
+                print(f"x_dist: {x_dist}, y_dist: {y_dist}")
+                print(f"Text bounds: ({pdf_x1}, {pdf_y1}) to ({pdf_x2}, {pdf_y2})")
+                print(f"GDT bounds: ({yolo_x1}, {yolo_y1}) to ({yolo_x2}, {yolo_y2})")
+                
+                # Stricter horizontal alignment for vertical GDT
+                if (x_dist <= CLUSTER_X * 0.5 and  # Tighter horizontal alignment
+                    0 <= y_dist <= CLUSTER_Y_VERTICAL):  # Vertical spacing check
+                    print("Vertical GDT association found!")
+                    return True, "vertical"
+        else:
+            # For horizontal symbols, check for text on right side only
+            if pdf_x1 > yolo_x2:  # Text is on right side
+                x_dist = pdf_x1 - yolo_x2  # Distance between symbol right edge and text left edge
+                y_dist = abs(pdf_center_y - yolo_center_y)  # Vertical alignment
+                
+                if 0 <= x_dist <= CLUSTER_X and y_dist <= CLUSTER_Y_HORIZONTAL:
+                    return True, "horizontal"
+
+        return False, None
+
+    @staticmethod
+    def build_yolo_index(normalized_yolo):
+        """Build a spatial index over normalized (4-point) YOLO boxes"""
+        return SpatialGrid(SpatialGrid.box_bounds([det['box'] for det in normalized_yolo]))
+
+    @staticmethod
+    def find_yolo_association(pdf_box, normalized_yolo, yolo_index):
+        """Return (yolo_det, association_type) of the first associated YOLO box, or (None, None).
+
+        Only boxes inside the association window of pdf_box are checked, in their
+        original order, so the result matches checking every box.
+        """
+        pdf_x1 = min(p[0] for p in pdf_box)
+        pdf_y1 = min(p[1] for p in pdf_box)
+        pdf_x2 = max(p[0] for p in pdf_box)
+        pdf_y2 = max(p[1] for p in pdf_box)
+
+        if pdf_y2 - pdf_y1 > (pdf_x2 - pdf_x1) * 1.2:
+            # Vertical GDT: YOLO top edge below the text, centers horizontally aligned
+            center_x = (pdf_x1 + pdf_x2) / 2
+            half_width = DimensionClusterer.ASSOC_CLUSTER_X * 0.5
+            window = (center_x - half_width, pdf_y2,
+                      center_x + half_width, pdf_y2 + DimensionClusterer.ASSOC_CLUSTER_Y_VERTICAL)
+        else:
+            # Horizontal: YOLO right edge left of the text, centers vertically aligned
+            center_y = (pdf_y1 + pdf_y2) / 2
+            window = (pdf_x1 - DimensionClusterer.ASSOC_CLUSTER_X,
+                      center_y - DimensionClusterer.ASSOC_CLUSTER_Y_HORIZONTAL,
+                      pdf_x1, center_y + DimensionClusterer.ASSOC_CLUSTER_Y_HORIZONTAL)
+
+        for index in yolo_index.query(*window):
+            yolo_det = normalized_yolo[index]
+            is_associated, assoc_type = DimensionClusterer.check_yolo_association(pdf_box, yolo_det['box'])
+            if is_associated:
+                return yolo_det, assoc_type
+
+        return None, None
+
+    @staticmethod
+    def build_span_center_index(pdf_results):
+        """Return an (N, 2) array of span centers and a SpatialGrid over those points"""
+        centers = np.full((len(pdf_results), 2), np.nan)
+        for i, det in enumerate(pdf_results):
+            box = det.get('box')
+            if box:
+                centers[i] = (sum(p[0] for p in box) / len(box), sum(p[1] for p in box) / len(box))
+
+        # Spans without a box have NaN centers and are left out of the grid
+        return centers, SpatialGrid(np.hstack([centers, centers]))
+
+    @staticmethod
+    def get_dimension_type(yolo_class):
+        """Convert YOLO class to dimension type"""
+        if yolo_class == 'A':
+            return "Diameter"
+        elif yolo_class in [chr(c) for c in range(ord('B'), ord('Z') + 1)]:
+            return "Length"
+        else:
+            return f"GDT:{yolo_class}"
+
+    @staticmethod
+    def cluster(pdf_results, yolo_detections, dimension_parser=DimensionParser, span_center_index=None):
+        """Merge text spans with nearby symbol detections.
+
+        Takes span dicts ({'text', 'box'}) and detector dicts ({'box', 'class_name', ...})
+        and returns (box, (text, dim_type), yolo_det) tuples in detection order, with
+        yolo_det None for boxes made of text alone. span_center_index can pass the
+        build_span_center_index result of pdf_results when it is already known
+        (PageSpanStore.center_index for all spans of a page).
+        """
+        # Initialize empty lists if inputs are None
+        pdf_results = pdf_results or []
+        yolo_detections = yolo_detections or []
+
+        print("\n=== Starting Clustering Process ===")
+        print(f"Processing {len(pdf_results)} PDF results and {len(yolo_detections)} YOLO detections")
+
+        # Adjust clustering thresholds
+        CLUSTER_X = 100  # Increased for better horizontal matching
+        CLUSTER_Y = 20
+        OVERLAP_THRESHOLD = 0.3  # IOU threshold for overlap detection
+
+        # (box, (text, dim_type), is_merged, yolo_det) in detection order, overlaps are resolved afterwards
+        candidates = []
+
+        # Normalize YOLO boxes to polygon format
+        normalized_yolo = []
+        for yolo_det in yolo_detections:
+            box = yolo_det['box']
+            if not isinstance(box[0], list):  # If box is in [x1,y1,x2,y2] format
+                x1, y1, x2, y2 = box
+                normalized_box = [
+                    [x1, y1],
+                    [x2, y1],
+                    [x2, y2],
+                    [x1, y2]
+                ]
+                normalized_yolo.append({
+                    **yolo_det,
+                    'box': normalized_box
+                })
+            else:
+                normalized_yolo.append(yolo_det)
+
+        yolo_index = DimensionClusterer.build_yolo_index(normalized_yolo)
+
+        # Span centers for the tolerance search, built on the first '+'/'-' span
+        span_centers, span_index = span_center_index or (None, None)
+
+        # Process each PDF text detection
+        for pdf_det in pdf_results:
+            try:
+                text = pdf_det['text'].strip()
+                if not text:
+                    continue
+
+                pdf_box = pdf_det['box']
+                if not pdf_box:
+                    continue
+
+                # Skip if not a dimensional value
+                if not (text.startswith('+') or dimension_parser.is_dimensional_value(text)):
+                    continue
+
+                print(f"\nProcessing PDF detection: {text}")
+                print(f"PDF box: {pdf_box}")
+
+                # Get PDF box bounds
+                pdf_x1 = min(p[0] for p in pdf_box)
+                pdf_y1 = min(p[1] for p in pdf_box)
+                pdf_x2 = max(p[0] for p in pdf_box)
+                pdf_y2 = max(p[1] for p in pdf_box)
+                pdf_center_x = (pdf_x1 + pdf_x2) / 2
+                pdf_center_y = (pdf_y1 + pdf_y2) / 2
+
+                # Handle potential tolerance values
+                if text in ['+', '-']:
+                    pdf_center_y = sum(p[1] for p in pdf_box) / len(pdf_box)
+                    pdf_center_x = sum(p[0] for p in pdf_box) / len(pdf_box)
+
+                    # Store info about all nearby text elements
+                    nearby_texts = []
+
+                    # Look for text near this + symbol, only among spans whose
+                    # centers fall inside the clustering window
+                    if span_centers is None:
+                        span_centers, span_index = DimensionClusterer.build_span_center_index(pdf_results)
+
+                    for other_index in span_index.query(pdf_center_x - CLUSTER_X, pdf_center_y - CLUSTER_Y,
+                                                        pdf_center_x + CLUSTER_X, pdf_center_y + CLUSTER_Y):
+                        other_det = pdf_results[other_index]
+                        if other_det == pdf_det:
+                            continue
+
+                        other_text = other_det['text'].strip()
+                        if other_text in ['+', '-']:
+                            continue
+
+                        other_box = other_det['box']
+                        other_center_x, other_center_y = span_centers[other_index].tolist()
+
+                        # Check both vertical and horizontal alignments
+                        if abs(other_center_x - pdf_center_x) < CLUSTER_X:
+                            # Vertical alignment check
+                            y_dist = abs(other_center_y - pdf_center_y)
+                            if y_dist < CLUSTER_Y:
+                                if dimension_parser.is_dimensional_value(other_text):
+                                    nearby_texts.append({
+                                        'text': other_text,
+                                        'box': other_box,
+                                        'center_y': other_center_y,
+                                        'center_x': other_center_x,
+                                        'distance': y_dist,
+                                        'alignment': 'vertical'
+                                    })
+                        elif abs(other_center_y - pdf_center_y) < CLUSTER_Y:
+                            # Horizontal alignment check
+                            x_dist = abs(other_center_x - pdf_center_x)
+                            if x_dist < CLUSTER_X:
+                                if dimension_parser.is_dimensional_value(other_text):
+                                    nearby_texts.append({
+                                        'text': other_text,
+                                        'box': other_box,
+                                        'center_y': other_center_y,
+                                        'center_x': other_center_x,
+                                        'distance': x_dist,
+                                        'alignment': 'horizontal'
+                                    })
+
+                    # Sort nearby texts based on their position
+                    # For vertical alignment, sort by Y coordinate
+                    vertical_texts = [t for t in nearby_texts if t['alignment'] == 'vertical']
+                    vertical_texts.sort(key=lambda x: x['center_y'])
+
+                    # For horizontal alignment, sort by X coordinate
+                    horizontal_texts = [t for t in nearby_texts if t['alignment'] == 'horizontal']
+                    horizontal_texts.sort(key=lambda x: x['center_x'])
+
+                    # Use either vertical or horizontal texts based on which has more matches
+                    nearby_texts = vertical_texts if len(vertical_texts) >= len(horizontal_texts) else horizontal_texts
+
+                    # First text found is nominal, second is tolerance
+                    if len(nearby_texts) >= 2:
+                        nominal_text = nearby_texts[0]['text']
+                        upper_tol = f"+{nearby_texts[1]['text']}"
+                        all_points = nearby_texts[0]['box'] + pdf_box + nearby_texts[1]['box']
+                    elif len(nearby_texts) == 1:
+                        nominal_text = ""
+                        upper_tol = f"+{nearby_texts[0]['text']}"
+                        all_points = pdf_box + nearby_texts[0]['box']
+                    else:
+                        continue
+
+                    # Create merged bbox containing all elements
+                    x_coords = [p[0] for p in all_points]
+                    y_coords = [p[1] for p in all_points]
+
+                    pdf_box = [
+                        [min(x_coords), min(y_coords)],
+                        [max(x_coords), min(y_coords)],
+                        [max(x_coords), max(y_coords)],
+                        [min(x_coords), max(y_coords)]
+                    ]
+
+                    # Combine text appropriately
+                    text = f"{nominal_text}{upper_tol}" if nominal_text else upper_tol
+                    print(f"Combined dimension: {text}")
+
+                # Skip if not a dimensional value after potential merging
+                if not (text.startswith('+') or dimension_parser.is_dimensional_value(text)):
+                    continue
+
+                # Find associated YOLO detection among the boxes near the text
+                associated_yolo, association_type = DimensionClusterer.find_yolo_association(
+                    pdf_box, normalized_yolo, yolo_index
+                )
+                if associated_yolo:
+                    print(f"Found {association_type} association with YOLO class: {associated_yolo['class_name']}")
+
+                # Create merged bounding box if there's a YOLO association
+                if associated_yolo:
+                    merged_box = DimensionClusterer._create_merged_box(pdf_box, associated_yolo['box'])
+
+                    # Convert YOLO class to dimension type
+                    dim_type = DimensionClusterer.get_dimension_type(associated_yolo['class_name'])
+                    candidates.append((merged_box, (text, dim_type), True, associated_yolo))
+                else:
+                    candidates.append((pdf_box, (text, None), False, None))
+
+            except Exception as e:
+                print(f"Error processing detection: {str(e)}")
+                import traceback
+                traceback.print_exc()
+                continue
+
+        all_bboxes, merged_boxes = DimensionClusterer._resolve_overlaps(candidates, OVERLAP_THRESHOLD)
+
+        print(f"\nClustering complete:")
+        print(f"- Found {len(all_bboxes)} valid detections")
+        print(f"- Created {len(merged_boxes)} merged boxes")
+
+        return all_bboxes
+
+    @staticmethod
+    def _resolve_overlaps(candidates, overlap_threshold):
+        """Return (all_bboxes, merged_boxes) from the (box, (text, dim_type), is_merged, yolo_det) candidates.
+
+        A merged box is dropped when it overlaps an earlier kept merged box, and a
+        PDF-only box is dropped when it lies within a merged box kept before it.
+        """
+        merged_flags = [is_merged for _, _, is_merged, _ in candidates]
+        merged_positions = np.array([i for i, is_merged in enumerate(merged_flags) if is_merged], dtype=np.int64)
+        keep = merged_positions[box_ops.greedy_suppression(
+            [candidates[i][0] for i in merged_positions], overlap_threshold
+        )] if len(merged_positions) else merged_positions
+        merged_boxes = [candidates[i][0] for i in keep]
+
+        pdf_positions = np.array([i for i, is_merged in enumerate(merged_flags) if not is_merged], dtype=np.int64)
+        if len(pdf_positions) and len(keep):
+            contained = box_ops.pairwise_containment([candidates[i][0] for i in pdf_positions], merged_boxes)
+            contained &= keep[None, :] < pdf_positions[:, None]
+            pdf_keep = pdf_positions[~contained.any(axis=1)]
+        else:
+            pdf_keep = pdf_positions
+
+        all_bboxes = []
+        for i in sorted(keep.tolist() + pdf_keep.tolist()):
+            box, (text, dim_type), is_merged, yolo_det = candidates[i]
+            if is_merged:
+                print(f"Adding merged box with dimension type: {dim_type}")
+            else:
+                print("Adding PDF-only box")
+            all_bboxes.append((box, (text, dim_type), yolo_det))
+
+        return all_bboxes, merged_boxes
+
+    @staticmethod
+    def _create_merged_box(pdf_box, yolo_box):
+        """Create a merged bounding box from PDF and YOLO boxes with padding"""
+        try:
+            # Extract all points from both boxes
+            all_points = pdf_box + yolo_box
+            
+            # Get min/max coordinates
+            x_coords = [p[0] for p in all_points]
+            y_coords = [p[1] for p in all_points]
+            
+            # Add padding
+            padding = 5
+            merged_x1 = min(x_coords) - padding
+            merged_y1 = min(y_coords) - padding
+            merged_x2 = max(x_coords) + padding
+            merged_y2 = max(y_coords) + padding
+            
+            # Create merged box in polygon format
+            merged_box = [
+                [merged_x1, merged_y1],
+                [merged_x2, merged_y1],
+                [merged_x2, merged_y2],
+                [merged_x1, merged_y2]
+            ]
+            
+            return merged_box
+            
+        except Exception as e:
+            print(f"Error creating merged box: {str(e)}")
+            return pdf_box  # Fall back to PDF box if merge fails
+
+    @staticmethod
+    def calculate_merged_box_midpoint(merged_box):
+        """Calculate the midpoint of a merged bounding box"""
+        try:
+            # Extract all x and y coordinates
+            x_coords = [p[0] for p in merged_box]
+            y_coords = [p[1] for p in merged_box]
+
+            # Calculate midpoint
+            midpoint_x = sum(x_coords) / len(merged_box)
+            midpoint_y = sum(y_coords) / len(merged_box)
+
+            return (midpoint_x, midpoint_y)
+        except Exception as e:
+            print(f"Error calculating merged box midpoint: {str(e)}")
+            return None
+
+    @staticmethod
+    def build_records(all_bboxes, dimension_parser=DimensionParser):
+        """Parse the clustered boxes into DimensionRecords, zones left unassigned"""
+        # Drop bboxes overlapping a wider one by more than 30%; the kept ones come widest first
+        boxes = box_ops.to_xyxy([bbox for bbox, _, _ in all_bboxes])
+        keep = box_ops.greedy_suppression(boxes, 0.3, priority=box_ops.widths(boxes))
+        all_bboxes = [all_bboxes[i] for i in keep]
+
+        records = []
+        for bbox, (text, yolo_class), yolo_det in all_bboxes:
+            # Process the text to separate nominal and tolerance
+            if text.strip() in ['+', '-']:
+                continue  # Skip single + or - characters
+
+            # Check if this is already a combined dimension with + sign
+            if '+' in text and not text.startswith('+'):
+                parts = text.split('+')
+                nominal_text = parts[0].strip()
+                tol_part = parts[1].strip()
+                dim_type = "Length"
+                upper_tol = f"+{tol_part}"
+                lower_tol = "0"
+            # Handle pure tolerance values
+            elif text.startswith('+'):
+                nominal_text = ""
+                dim_type = "Tolerance"
+                upper_tol = text  # Keep full text including +
+                lower_tol = "0"
+            else:
+                # Normal dimension parsing
+                dim_type, upper_tol, lower_tol, nominal_text = dimension_parser.parse_dimension(text)
+
+                # Skip if nominal value is 0 (parse_dimension returned None)
+                if dim_type is None:
+                    continue
+
+            if yolo_class:
+                # Set dimension type as GDT: yolo_class
+                if yolo_class == 'A':
+                    dim_type = "Diameter"
+                elif yolo_class.startswith('GDT:'):
+                    dim_type = yolo_class  # Keep as is if already in GDT format
+                else:
+                    dim_type = f"GDT: {yolo_class}"  # Add GDT prefix for other YOLO classes
+
+            records.append(DimensionRecord(
+                bbox=bbox,
+                text=text,
+                nominal=nominal_text,
+                upper_tol=upper_tol,
+                lower_tol=lower_tol,
+                dim_type=dim_type,
+                yolo_class=yolo_det['class_name'] if yolo_det else None,
+                yolo_confidence=yolo_det.get('confidence') if yolo_det else None,
+                midpoint=DimensionClusterer.calculate_merged_box_midpoint(bbox)
+            ))
+
+        return records
+
+
+class DetectionEngine:
+    """Turns a PDF page into DimensionRecords without any GUI involved.
+
+    Boxes are in scene coordinates (PDF points * SCENE_SCALE), the ones the table
+    stores and the viewer draws in, so the GUI only has to display the records.
+    Nothing here touches Qt, so pages can be processed in worker processes and
+    tests. The detector can be any object with the YOLOModelService interface.
+    """
+    AREA_CONFIDENCE = 0.5  # Detector threshold inside a selected area
+    PAGE_CONFIDENCE = 0.75  # Detector threshold for a whole page
+    PAGE_DPI = 300  # Whole pages are detected at this resolution
+    EXCLUDE_OVERLAP = 0.3  # Overlap with an existing box above which a detection is skipped
+
+    def __init__(self, detector=None, dimension_parser=DimensionParser):
+        self.detector = yolo_service if detector is None else detector
+        self.dimension_parser = dimension_parser
+
+        # PageSpanStore per page object, dropped with the page
+        self._span_stores = weakref.WeakKeyDictionary()
+        self._span_store_lock = threading.Lock()
+
+    def span_store(self, page):
+        """PageSpanStore of the page, extracted on first use and again after a rotation change"""
+        with self._span_store_lock:
+            store = self._span_stores.get(page)
+            if store is None or store.rotation != page.rotation:
+                store = PageSpanStore.from_page(page)
+                self._span_stores[page] = store
+            return store
+
+    def extract_spans(self, page, clip=None):
+        """Non-empty text spans of the page, optionally only those centered inside a scene rect (x0, y0, x1, y1)"""
+        store = self.span_store(page)
+        return store.to_spans(store.in_area(*clip) if clip is not None else None)
+
+    @staticmethod
+    def render(page, scale, clip=None):
+        """BGR image of the page (or of a PDF rect of it) at scale pixels per point"""
+        pix = page.get_pixmap(matrix=fitz.Matrix(scale, scale),
+                              clip=fitz.Rect(clip) if clip is not None else None, alpha=False)
+        samples = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.stride)
+        image = samples[:, :pix.width * pix.n].reshape(pix.height, pix.width, pix.n)
+        return cv2.cvtColor(image, cv2.COLOR_GRAY2BGR if pix.n == 1 else cv2.COLOR_RGB2BGR)
+
+    def detect_symbols(self, page, clip=None, conf_threshold=None):
+        """Detector boxes of the page, or of a scene rect (x0, y0, x1, y1) of it"""
+        if not self.detector.get_model():
+            return []
+
+        if clip is not None:
+            # The area at viewer resolution, as the user sees it
+            image = self.render(page, SCENE_SCALE, [value / SCENE_SCALE for value in clip])
+            detections = self.detector.detect(image, conf_threshold=conf_threshold or self.AREA_CONFIDENCE)
+            offset_x, offset_y = clip[0], clip[1]
+            factor = 1.0
+        else:
+            scale = self.PAGE_DPI / 72
+            image = self.render(page, scale)
+            mask, _ = ZoneGridDetector.find_innermost_boundary(image)
+            if mask is None:
+                return []
+            contours, _ = cv2.findContours(mask, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
+            cv2.drawContours(image, contours, -1, (0, 255, 0), 2)
+
+            conf_threshold = conf_threshold or self.PAGE_CONFIDENCE
+            # Tiles keep small symbols at full resolution instead of downscaling the whole sheet
+            if self.detector.get_tile_settings()['enabled']:
+                detections = self.detector.detect_tiled(image, mask=mask, conf_threshold=conf_threshold)
+            else:
+                detections = self.detector.detect(image, conf_threshold=conf_threshold)
+            offset_x = offset_y = 0
+            factor = SCENE_SCALE / scale
+
+        symbols = []
+        for detection in detections:
+            x1, y1, x2, y2 = (value * factor for value in detection['box'])
+            x1, x2 = x1 + offset_x, x2 + offset_x
+            y1, y2 = y1 + offset_y, y2 + offset_y
+            symbols.append(SymbolDetection(
+                box=[[x1, y1], [x2, y1], [x2, y2], [x1, y2]],
+                class_name=detection['class_name'],
+                confidence=detection.get('confidence'),
+                class_id=detection.get('class')
+            ))
+        return symbols
+
+    def cluster(self, spans, symbols, span_center_index=None):
+        """DimensionRecords of clustered spans and symbols"""
+        all_bboxes = DimensionClusterer.cluster([span.to_dict() for span in spans],
+                                                [symbol.to_dict() for symbol in symbols],
+                                                self.dimension_parser, span_center_index)
+        return DimensionClusterer.build_records(all_bboxes, self.dimension_parser)
+
+    def detect_area(self, page, rect, exclude_boxes=None, detect_symbols=True, zone_grid=None):
+        """Process a scene rect (x0, y0, x1, y1) of the page.
+
+        Spans and symbols overlapping any of exclude_boxes (e.g. the rows already
+        in the table) are skipped. Zones are only assigned when a zone_grid is given.
+        """
+        timings = {}
+        exclude_xyxy = box_ops.to_xyxy(exclude_boxes or [])
+
+        start = time.perf_counter()
+        store = self.span_store(page)
+        indices = store.in_area(*rect)
+        if len(exclude_xyxy) and len(indices):
+            kept = np.setdiff1d(indices, store.overlapping(exclude_xyxy, self.EXCLUDE_OVERLAP))
+            if len(kept) < len(indices):
+                print(f"Skipping {len(indices) - len(kept)} PDF detections - overlap with existing boxes")
+            indices = kept
+        spans = store.to_spans(indices)
+        timings['text'] = time.perf_counter() - start
+
+        symbols = []
+        if detect_symbols:
+            start = time.perf_counter()
+            symbols = self._exclude(self.detect_symbols(page, clip=rect), exclude_xyxy)
+            timings['symbols'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        records = self.cluster(spans, symbols) if spans or symbols else []
+        timings['cluster'] = time.perf_counter() - start
+
+        if zone_grid is not None:
+            self.assign_zones(records, zone_grid)
+
+        return PageDetections(records, spans, symbols, page_number=page.number, rotation=page.rotation,
+                              timings=timings)
+
+    def detect_page(self, page, detect_symbols=True, zones=True):
+        """Process the whole page: text, symbols, clustering and zones"""
+        timings = {}
+
+        start = time.perf_counter()
+        store = self.span_store(page)
+        spans = store.to_spans()
+        timings['text'] = time.perf_counter() - start
+
+        symbols = []
+        if detect_symbols:
+            start = time.perf_counter()
+            symbols = self.detect_symbols(page)
+            timings['symbols'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        records = self.cluster(spans, symbols, store.center_index())
+        timings['cluster'] = time.perf_counter() - start
+
+        if zones:
+            start = time.perf_counter()
+            self.assign_zones(records, self.build_zone_grid(page))
+            timings['zones'] = time.perf_counter() - start
+
+        return PageDetections(records, spans, symbols, page_number=page.number, rotation=page.rotation,
+                              timings=timings)
+
+    def build_zone_grid(self, page, image=None):
+        """ZoneGrid of the page in scene coordinates, or None if no field division is found.
+
+        image is the page at SCENE_SCALE as an RGB array, e.g. an already decoded
+        raster of the viewer; the page is rendered when none is given.
+        """
+        image = self.render(page, SCENE_SCALE) if image is None else cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
+        return ZoneGridDetector.build_zone_grid(image)
+
+    @staticmethod
+    def assign_zones(records, zone_grid):
+        """Fill in the zone of each record: "??" without a midpoint, "__" without a zone grid"""
+        located = [record for record in records if record.midpoint]
+        for record in records:
+            if not record.midpoint:
+                record.zone = "??"
+        if not located:
+            return records
+
+        if zone_grid is None:
+            zones = ["__"] * len(located)
+        else:
+            zones = zone_grid.assign_zones([record.midpoint for record in located])
+        for record, zone in zip(located, zones):
+            record.zone = str(zone)
+        return records
+
+    @staticmethod
+    def unique_indices(boxes, existing_boxes, overlap_threshold=EXCLUDE_OVERLAP):
+        """Indices of boxes overlapping neither existing_boxes nor an earlier kept box"""
+        boxes = box_ops.to_xyxy(boxes)
+        is_duplicate_of_existing = box_ops.overlaps_any(boxes, existing_boxes, overlap_threshold)
+
+        # Only boxes sharing a grid cell can overlap, so each box is compared with its accepted neighbours
+        index = SpatialGrid(boxes)
+        accepted = np.zeros(len(boxes), dtype=bool)
+        for i in np.flatnonzero(~is_duplicate_of_existing):
+            neighbours = [j for j in index.query(*boxes[i]) if accepted[j]]
+            if neighbours and box_ops.overlaps_any(boxes[i:i + 1], boxes[neighbours], overlap_threshold)[0]:
+                continue
+            accepted[i] = True
+        return np.flatnonzero(accepted).tolist()
+
+    def _exclude(self, items, exclude_xyxy):
+        """Items whose box does not overlap the excluded boxes"""
+        if not items or not len(exclude_xyxy):
+            return items
+        overlapping = box_ops.overlaps_any([item.box for item in items], exclude_xyxy, self.EXCLUDE_OVERLAP)
+        kept = [item for item, is_overlapping in zip(items, overlapping) if not is_overlapping]
+        if len(kept) < len(items):
+            print(f"Skipping {len(items) - len(kept)} detections - overlap with existing boxes")
+        return kept
+
+
+# Create singleton instance
+detection_engine = DetectionEngine()
@@ -4,22 +4,25 @@ from PyQt5.QtGui import QIcon, QKeySequence, QDoubleValidator, QColor, QStandard
 from PyQt5.QtWidgets import (
     QDialog, QVBoxLayout, QListWidget, QPushButton, QLabel, 
     QLineEdit, QWidget, QHBoxLayout, QAbstractItemView, 
-    QListWidgetItem, QShortcut, QStyle, QFrame, QStyledItemDelegate, 
+    QListWidgetItem, QShortcut, QStyle, QStyledItemDelegate, 
     QMessageBox, QFormLayout, QComboBox, QGroupBox, QGridLayout,
-    QProgressBar, QTreeView
+    QProgressBar, QTreeView, QListView
 )
-import fitz
-import requests
+import numpy as np
 import json
-from api_endpoints import api
+from collections import OrderedDict
+from api_endpoints import api, APIEndpoints
+from order_directory import order_directory
+from instrument_catalogue import instrument_catalogue
+from render_service import render_service
 from typing import Optional, Dict
 import os
 import tempfile
 import uuid
 from datetime import datetime
-import asyncio
-import nest_asyncio
-from bleak import BleakScanner, BleakClient
+from lazy_imports import lazy_import
+
+fitz = lazy_import('fitz')  # Imported on first use
 
 
 class GDTSymbolButton(QtWidgets.QPushButton):
@@ -314,15 +317,29 @@ class DimensionDialog(QtWidgets.QDialog):
         return data
 
 class PDFPreviewDialog(QtWidgets.QDialog):
+    PREVIEW_DPI = 300
+    THUMBNAIL_SIZE = 96  # Longest edge of a thumbnail in pixels
+    THUMBNAIL_JOBS = 2  # Thumbnails rendered at a time, keeps the pool free for the shown page
+    PREFETCH_PAGES = 1  # Pages prefetched on each side of the shown page
+    PAGE_CACHE_BYTES = 512 * 1024 * 1024  # Budget of cached full resolution pages
+
     def __init__(self, pdf_path, parent=None):
         super().__init__(parent)
         self.pdf_path = pdf_path
         self.current_page = 0
         self.rotation = 0
         self.pdf_doc = fitz.open(pdf_path)
-        
+        self.render_job = None  # Render job of the page being shown
+        self.page_pixmaps = OrderedDict()  # Page index -> unrotated preview pixmap (most recent last)
+        self.prefetch_jobs = {}  # Render job id -> page index
+        self.thumbnail_jobs = {}  # Render job id -> page index
+        self.pending_thumbnails = list(range(len(self.pdf_doc)))
+        render_service.rendered.connect(self._on_page_rendered)
+        render_service.failed.connect(self._on_render_failed)
+
         self.setup_ui()
         self.load_current_page()
+        self.load_thumbnails()
 
     def setup_ui(self):
         self.setWindowTitle("PDF Preview")
@@ -397,6 +414,7 @@ class PDFPreviewDialog(QtWidgets.QDialog):
         
         self.scene = QtWidgets.QGraphicsScene()
         self.view = QtWidgets.QGraphicsView(self.scene)
+        self.view.setRenderHint(QtGui.QPainter.SmoothPixmapTransform)
         
         # Add shadow effect to preview
         shadow = QtWidgets.QGraphicsDropShadowEffect()
@@ -406,6 +424,36 @@ class PDFPreviewDialog(QtWidgets.QDialog):
         self.view.setGraphicsEffect(shadow)
         
         preview_layout.addWidget(self.view)
+
+        # Thumbnail strip, filled in as the thumbnails are rendered
+        self.thumbnail_list = QtWidgets.QListWidget()
+        self.thumbnail_list.setViewMode(QtWidgets.QListView.IconMode)
+        self.thumbnail_list.setFlow(QtWidgets.QListView.LeftToRight)
+        self.thumbnail_list.setWrapping(False)
+        self.thumbnail_list.setMovement(QtWidgets.QListView.Static)
+        self.thumbnail_list.setIconSize(QtCore.QSize(self.THUMBNAIL_SIZE, self.THUMBNAIL_SIZE))
+        self.thumbnail_list.setFixedHeight(self.THUMBNAIL_SIZE + 40)
+        self.thumbnail_list.setSpacing(4)
+        self.thumbnail_list.setStyleSheet("""
+            QListWidget {
+                border: 1px solid #e0e0e0;
+                border-radius: 3px;
+                background-color: white;
+            }
+            QListWidget::item:selected {
+                background-color: #e3f2fd;
+                color: #333333;
+            }
+        """)
+        placeholder = QtGui.QPixmap(self.THUMBNAIL_SIZE, self.THUMBNAIL_SIZE)
+        placeholder.fill(QtGui.QColor("#f5f5f5"))
+        for page_index in range(len(self.pdf_doc)):
+            self.thumbnail_list.addItem(QtWidgets.QListWidgetItem(QIcon(placeholder), str(page_index + 1)))
+        self.thumbnail_list.setCurrentRow(0)
+        self.thumbnail_list.currentRowChanged.connect(self.thumbnail_selected)
+        self.thumbnail_list.setVisible(len(self.pdf_doc) > 1)
+
+        preview_layout.addWidget(self.thumbnail_list)
         layout.addWidget(preview_frame)
 
         # Controls layout
@@ -509,33 +557,156 @@ class PDFPreviewDialog(QtWidgets.QDialog):
         layout.addLayout(button_layout)
 
     def load_current_page(self):
-        page = self.pdf_doc[self.current_page]
-        pix = page.get_pixmap(matrix=fitz.Matrix(300/72, 300/72).prerotate(self.rotation))
-        
-        # Convert to QImage
-        img = QtGui.QImage(pix.samples, pix.width, pix.height, pix.stride, QtGui.QImage.Format_RGB888)
-        
-        # Create pixmap and add to scene
+        # Pages already rendered (prefetched or visited) are shown at once
+        pixmap = self.page_pixmaps.get(self.current_page)
+        if pixmap is not None:
+            self.page_pixmaps.move_to_end(self.current_page)
+            render_service.cancel_group(('preview', id(self)))
+            self.render_job = None
+            self.show_pixmap(pixmap)
+            self.prefetch_neighbors()
+            return
+
+        # Show the thumbnail until the full page arrives
+        thumbnail = self.thumbnail_list.item(self.current_page).data(Qt.UserRole)
+        if thumbnail is not None:
+            self.show_pixmap(thumbnail)
+
+        # Use a running prefetch of this page, otherwise render it in the background;
+        # a newer request (fast page flipping) cancels this one
+        for job_id, page_index in self.prefetch_jobs.items():
+            if page_index == self.current_page:
+                del self.prefetch_jobs[job_id]
+                render_service.cancel_group(('preview', id(self)))
+                self.render_job = job_id
+                break
+        else:
+            page = self.pdf_doc[self.current_page]
+            self.render_job = render_service.submit(page, scale=self.PREVIEW_DPI / 72,
+                                                    group=('preview', id(self)))
+        self.prefetch_neighbors()
+
+    def prefetch_neighbors(self):
+        """Render the pages next to the current one in the background"""
+        wanted = {
+            page_index
+            for page_index in range(self.current_page - self.PREFETCH_PAGES, self.current_page + self.PREFETCH_PAGES + 1)
+            if 0 <= page_index < len(self.pdf_doc) and page_index != self.current_page
+        }
+
+        # Drop prefetches the user has paged away from
+        for job_id, page_index in list(self.prefetch_jobs.items()):
+            if page_index not in wanted:
+                render_service.cancel(job_id)
+                del self.prefetch_jobs[job_id]
+
+        requested = set(self.prefetch_jobs.values())
+        for page_index in sorted(wanted - requested - set(self.page_pixmaps)):
+            job_id = render_service.submit(self.pdf_doc[page_index], scale=self.PREVIEW_DPI / 72)
+            self.prefetch_jobs[job_id] = page_index
+
+    def load_thumbnails(self):
+        """Keep a few thumbnail renders queued until every page has one"""
+        while self.pending_thumbnails and len(self.thumbnail_jobs) < self.THUMBNAIL_JOBS:
+            page_index = self.pending_thumbnails.pop(0)
+            page = self.pdf_doc[page_index]
+            scale = self.THUMBNAIL_SIZE / max(page.rect.width, page.rect.height)
+            job_id = render_service.submit(page, scale=scale)
+            self.thumbnail_jobs[job_id] = page_index
+
+    def _on_page_rendered(self, job_id, result):
+        if job_id in self.thumbnail_jobs:
+            page_index = self.thumbnail_jobs.pop(job_id)
+            thumbnail = result.to_pixmap()
+            item = self.thumbnail_list.item(page_index)
+            item.setIcon(QIcon(thumbnail))
+            item.setData(Qt.UserRole, thumbnail)
+            if page_index == self.current_page and self.render_job is not None:
+                self.show_pixmap(thumbnail)
+            self.load_thumbnails()
+            return
+
+        if job_id in self.prefetch_jobs:
+            self.cache_pixmap(self.prefetch_jobs.pop(job_id), result.to_pixmap())
+            return
+
+        if job_id != self.render_job:
+            return
+        self.render_job = None
+
+        pixmap = result.to_pixmap()
+        self.cache_pixmap(self.current_page, pixmap)
+        self.show_pixmap(pixmap)
+
+    def _on_render_failed(self, job_id, message):
+        if job_id in self.thumbnail_jobs:
+            del self.thumbnail_jobs[job_id]
+            self.load_thumbnails()
+        self.prefetch_jobs.pop(job_id, None)
+        if job_id == self.render_job:
+            self.render_job = None
+
+    def cache_pixmap(self, page_index, pixmap):
+        """Keep a rendered page, dropping the least recently shown ones over budget"""
+        self.page_pixmaps[page_index] = pixmap
+        self.page_pixmaps.move_to_end(page_index)
+        total = sum(p.width() * p.height() * 4 for p in self.page_pixmaps.values())
+        for cached_index in list(self.page_pixmaps):
+            if total <= self.PAGE_CACHE_BYTES:
+                break
+            if cached_index == self.current_page:
+                continue
+            cached = self.page_pixmaps.pop(cached_index)
+            total -= cached.width() * cached.height() * 4
+
+    def show_pixmap(self, pixmap):
+        """Show a page pixmap; thumbnails are scaled up to the full page size"""
+        page_rect = self.pdf_doc[self.current_page].rect
+        full_width = page_rect.width * self.PREVIEW_DPI / 72
+
         self.scene.clear()
-        pixmap = QtGui.QPixmap.fromImage(img)
-        self.scene.addPixmap(pixmap)
-        self.scene.setSceneRect(self.scene.itemsBoundingRect())
-        
-        # Fit view to page
+        item = self.scene.addPixmap(pixmap)
+        item.setTransformationMode(Qt.SmoothTransformation)
+        item.setScale(full_width / pixmap.width())
+        self.scene.setSceneRect(item.sceneBoundingRect())
+        self.fit_view()
+
+    def fit_view(self):
+        # Rotation is a view transform, the cached page raster is never re-rendered for it
+        self.view.setTransform(QtGui.QTransform().rotate(self.rotation))
         self.view.fitInView(self.scene.sceneRect(), Qt.KeepAspectRatio)
 
+    def thumbnail_selected(self, row):
+        if row >= 0:
+            self.page_spin.setValue(row + 1)
+
     def page_changed(self, value):
         self.current_page = value - 1
+        self.thumbnail_list.blockSignals(True)
+        self.thumbnail_list.setCurrentRow(self.current_page)
+        self.thumbnail_list.blockSignals(False)
         self.load_current_page()
 
     def rotate_page(self, angle):
         self.rotation = (self.rotation + angle) % 360
-        self.load_current_page()
+        if self.scene.items():
+            self.fit_view()
 
     def resizeEvent(self, event):
         super().resizeEvent(event)
         if self.scene.items():
-            self.view.fitInView(self.scene.sceneRect(), Qt.KeepAspectRatio)
+            self.fit_view()
+
+    def done(self, result):
+        # Nothing rendered for this dialog is needed anymore
+        render_service.cancel_group(('preview', id(self)))
+        for job_id in list(self.prefetch_jobs) + list(self.thumbnail_jobs):
+            render_service.cancel(job_id)
+        self.prefetch_jobs.clear()
+        self.thumbnail_jobs.clear()
+        self.pending_thumbnails.clear()
+        self.page_pixmaps.clear()
+        super().done(result)
 
     def get_selected_page(self):
         return self.current_page
@@ -545,19 +716,180 @@ class PDFPreviewDialog(QtWidgets.QDialog):
     
 # Add this new class for background loading
 class DataLoaderThread(QThread):
-    data_loaded = pyqtSignal(list)
+    data_loaded = pyqtSignal(object)  # OrderSearchIndex over the orders
     error_occurred = pyqtSignal(str)
     
     def run(self):
         try:
-            data = api.get_all_orders()
-            if data is not None:
-                self.data_loaded.emit(data)
+            # Shared with the main window, only fetched again when the cached list is stale
+            search_index = order_directory.get_search_index()
+            if search_index is not None:
+                self.data_loaded.emit(search_index)
             else:
                 self.error_occurred.emit("Failed to fetch data from API")
         except Exception as e:
             self.error_occurred.emit(f"Error loading data: {str(e)}")
 
+class InstrumentLoaderThread(QThread):
+    data_loaded = pyqtSignal(list, list)  # (subcategories, instruments)
+    error_occurred = pyqtSignal(str)
+
+    def __init__(self, force=False, parent=None):
+        super().__init__(parent)
+        self.force = force
+
+    def run(self):
+        try:
+            subcategories, instruments = instrument_catalogue.get(force=self.force)
+            self.data_loaded.emit(subcategories, instruments)
+        except Exception as e:
+            self.error_occurred.emit(f"Error loading instruments: {str(e)}")
+
+class OrderListModel(QtCore.QAbstractListModel):
+    """Production orders as two parallel string lists, rows are only read when painted"""
+    PartNumberRole = Qt.UserRole + 1
+    ProductionOrderRole = Qt.UserRole + 2
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.part_numbers = []
+        self.production_orders = []
+
+    def set_orders(self, part_numbers, production_orders):
+        self.beginResetModel()
+        self.part_numbers = part_numbers
+        self.production_orders = production_orders
+        self.endResetModel()
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.part_numbers)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = index.row()
+        if role == Qt.UserRole:
+            return (self.part_numbers[row], self.production_orders[row])
+        if role == self.PartNumberRole:
+            return self.part_numbers[row]
+        if role == self.ProductionOrderRole:
+            return self.production_orders[row]
+        if role in (Qt.DisplayRole, Qt.ToolTipRole):
+            return f"{self.part_numbers[row]} - {self.production_orders[row]}"
+        return None
+
+
+class OrderFilterProxyModel(QtCore.QAbstractProxyModel):
+    """Shows the source rows listed in an array, set from an OrderSearchIndex result.
+
+    Unlike QSortFilterProxyModel no per-row Python callback runs when the filter
+    changes, so a keystroke costs one index lookup and a model reset.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.rows = np.empty(0, dtype=np.int32)
+
+    def set_rows(self, rows):
+        self.beginResetModel()
+        self.rows = rows
+        self.endResetModel()
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else 1
+
+    def index(self, row, column=0, parent=QtCore.QModelIndex()):
+        # Called for every row on each layout of the view, keep it cheap
+        if column or row < 0 or row >= len(self.rows) or parent.isValid():
+            return QtCore.QModelIndex()
+        return self.createIndex(row, 0)
+
+    def parent(self, index=None):
+        return QtCore.QModelIndex()
+
+    def mapToSource(self, proxy_index):
+        if not proxy_index.isValid() or self.sourceModel() is None:
+            return QtCore.QModelIndex()
+        return self.sourceModel().index(int(self.rows[proxy_index.row()]), 0)
+
+    def mapFromSource(self, source_index):
+        if not source_index.isValid():
+            return QtCore.QModelIndex()
+        row = int(np.searchsorted(self.rows, source_index.row()))
+        if row < len(self.rows) and self.rows[row] == source_index.row():
+            return self.createIndex(row, 0)
+        return QtCore.QModelIndex()
+
+
+class OrderCardDelegate(QStyledItemDelegate):
+    """Paints an order as a two-line card: part number | production order"""
+    ROW_HEIGHT = 44
+    PADDING = 8
+    COLUMN_SPACING = 12
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.caption_font = QtGui.QFont()
+        self.caption_font.setPixelSize(10)
+        self.part_font = QtGui.QFont()
+        self.part_font.setPixelSize(13)
+        self.part_font.setBold(True)
+        self.order_font = QtGui.QFont()
+        self.order_font.setPixelSize(13)
+        self.caption_height = QtGui.QFontMetrics(self.caption_font).height()
+
+    def sizeHint(self, option, index):
+        return QtCore.QSize(option.rect.width(), self.ROW_HEIGHT)
+
+    def paint(self, painter, option, index):
+        painter.save()
+        rect = option.rect
+
+        # Background and row separator
+        if option.state & QStyle.State_Selected:
+            painter.fillRect(rect, QColor("#e3f2fd"))
+            border = QColor("#bbdefb")
+        else:
+            painter.fillRect(rect, QColor("#f5f9ff") if option.state & QStyle.State_MouseOver else QColor("white"))
+            border = QColor("#f0f0f0")
+        painter.setPen(border)
+        painter.drawLine(rect.bottomLeft(), rect.bottomRight())
+
+        content = rect.adjusted(self.PADDING, 4, -self.PADDING, -4)
+        column_width = (content.width() - self.COLUMN_SPACING) // 2
+        part_rect = QtCore.QRect(content.left(), content.top(), column_width, content.height())
+        order_rect = QtCore.QRect(part_rect.right() + self.COLUMN_SPACING, content.top(),
+                                  content.right() - part_rect.right() - self.COLUMN_SPACING, content.height())
+
+        # Separator between the columns
+        separator_x = part_rect.right() + self.COLUMN_SPACING // 2
+        painter.setPen(QColor("#e0e0e0"))
+        painter.drawLine(separator_x, content.top() + 2, separator_x, content.bottom() - 2)
+
+        self._draw_column(painter, part_rect, "Part Number",
+                          index.data(OrderListModel.PartNumberRole), self.part_font)
+        self._draw_column(painter, order_rect, "Production Order",
+                          index.data(OrderListModel.ProductionOrderRole), self.order_font)
+        painter.restore()
+
+    def _draw_column(self, painter, rect, caption, value, value_font):
+        caption_rect = QtCore.QRect(rect.left(), rect.top(), rect.width(), self.caption_height)
+        value_rect = QtCore.QRect(rect.left(), caption_rect.bottom() + 1, rect.width(),
+                                  rect.bottom() - caption_rect.bottom())
+
+        painter.setFont(self.caption_font)
+        painter.setPen(QColor("#666666"))
+        painter.drawText(caption_rect, Qt.AlignLeft | Qt.AlignVCenter, caption)
+
+        painter.setFont(value_font)
+        painter.setPen(QColor("#2c3e50"))
+        value = QtGui.QFontMetrics(value_font).elidedText(value or '', Qt.ElideRight, rect.width())
+        painter.drawText(value_rect, Qt.AlignLeft | Qt.AlignVCenter, value)
+
+
 class PartNumberDialog(QDialog):
     def __init__(self, parent=None):
         """Initialize dialog and load data from API"""
@@ -610,29 +942,29 @@ class PartNumberDialog(QDialog):
         search_layout.addWidget(self.search_box)
         layout.addWidget(search_container)
         
-        # List widget with improved styling
-        self.list_widget = QListWidget(self)
-        self.list_widget.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
-        self.list_widget.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
-        self.list_widget.setSelectionMode(QAbstractItemView.SingleSelection)
-        self.list_widget.setStyleSheet("""
-            QListWidget {
+        # Order list: model with a painted card per row, only visible rows are drawn
+        self.order_model = OrderListModel(self)
+        self.filter_model = OrderFilterProxyModel(self)
+        self.filter_model.setSourceModel(self.order_model)
+        self.search_index = None
+        self.list_view = QListView(self)
+        self.list_view.setModel(self.filter_model)
+        self.list_view.setItemDelegate(OrderCardDelegate(self.list_view))
+        self.list_view.setUniformItemSizes(True)
+        # Lay out large result sets in slices so a keystroke never waits for all rows
+        self.list_view.setLayoutMode(QListView.Batched)
+        self.list_view.setBatchSize(256)
+        self.list_view.setMouseTracking(True)
+        self.list_view.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.list_view.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.list_view.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.list_view.setStyleSheet("""
+            QListView {
                 border: 1px solid #e0e0e0;
                 border-radius: 4px;
                 background-color: white;
                 outline: none;
             }
-            QListWidget::item {
-                padding: 2px;
-                border-bottom: 1px solid #f0f0f0;
-            }
-            QListWidget::item:selected {
-                background-color: #e3f2fd;
-                border-bottom: 1px solid #bbdefb;
-            }
-            QListWidget::item:hover:!selected {
-                background-color: #f5f9ff;
-            }
         """)
         
         # Loading indicator with improved styling
@@ -649,8 +981,8 @@ class PartNumberDialog(QDialog):
         """)
         layout.addWidget(self.loading_label)
         
-        self.list_widget.setVisible(False)
-        layout.addWidget(self.list_widget)
+        self.list_view.setVisible(False)
+        layout.addWidget(self.list_view)
         
         # Status bar with improved styling
         self.status_label = QLabel("")
@@ -716,7 +1048,7 @@ class PartNumberDialog(QDialog):
         QShortcut(QKeySequence("Escape"), self, self.reject)
         
         # Connect double-click signal
-        self.list_widget.itemDoubleClicked.connect(self.handle_item_activation)
+        self.list_view.doubleClicked.connect(self.handle_item_activation)
         
         # Initialize attributes for PDF handling
         self.downloaded_file = None
@@ -734,62 +1066,14 @@ class PartNumberDialog(QDialog):
         self.loader_thread.error_occurred.connect(self.on_loading_error)
         self.loader_thread.start()
         
-    def on_data_loaded(self, data):
+    def on_data_loaded(self, search_index):
         """Handle the loaded data"""
         self.loading_label.hide()
-        self.list_widget.setVisible(True)
-        
-        for order in data:
-            item_widget = QWidget()
-            item_layout = QHBoxLayout(item_widget)
-            item_layout.setContentsMargins(8, 4, 8, 4)
-            item_layout.setSpacing(12)
-            
-            # Part number container
-            part_container = QWidget()
-            part_layout = QVBoxLayout(part_container)
-            part_layout.setContentsMargins(0, 0, 0, 0)
-            part_layout.setSpacing(0)
-            
-            part_label = QLabel("Part Number")
-            part_label.setStyleSheet("color: #666; font-size: 10px;")
-            part_number_value = QLabel(order.get('part_number', ''))
-            part_number_value.setStyleSheet("font-size: 13px; font-weight: bold; color: #2c3e50;")
-            
-            part_layout.addWidget(part_label)
-            part_layout.addWidget(part_number_value)
-            item_layout.addWidget(part_container)
-            
-            # Separator
-            separator = QFrame()
-            separator.setFrameShape(QFrame.VLine)
-            separator.setStyleSheet("color: #e0e0e0;")
-            item_layout.addWidget(separator)
-            
-            # Production order container
-            order_container = QWidget()
-            order_layout = QVBoxLayout(order_container)
-            order_layout.setContentsMargins(0, 0, 0, 0)
-            order_layout.setSpacing(0)
-            
-            order_label = QLabel("Production Order")
-            order_label.setStyleSheet("color: #666; font-size: 10px;")
-            order_value = QLabel(order.get('production_order', ''))
-            order_value.setStyleSheet("font-size: 13px; color: #2c3e50;")
-            
-            order_layout.addWidget(order_label)
-            order_layout.addWidget(order_value)
-            item_layout.addWidget(order_container)
-            
-            # Add to list widget
-            list_item = QListWidgetItem()
-            list_item.setSizeHint(item_widget.sizeHint())
-            list_item.setData(Qt.UserRole, (order.get('part_number', ''), order.get('production_order', '')))
-            
-            self.list_widget.addItem(list_item)
-            self.list_widget.setItemWidget(list_item, item_widget)
-        
-        self.update_status()
+        self.list_view.setVisible(True)
+        
+        self.search_index = search_index
+        self.order_model.set_orders(search_index.part_numbers, search_index.production_orders)
+        self.filter_items()
         
     def on_loading_error(self, error_message):
         """Handle loading errors"""
@@ -804,38 +1088,30 @@ class PartNumberDialog(QDialog):
 
     def filter_items(self):
         """Filter items based on search text"""
-        search_text = self.search_box.text().lower()
-        visible_count = 0
-        
-        for i in range(self.list_widget.count()):
-            item = self.list_widget.item(i)
-            part_number, production_order = item.data(Qt.UserRole)
-            matches = (search_text in part_number.lower() or 
-                      search_text in production_order.lower())
-                
-            item.setHidden(not matches)
-            if matches:
-                visible_count += 1
+        if self.search_index is None:
+            return
+        search_text = self.search_box.text()
+        self.filter_model.set_rows(self.search_index.search(search_text))
         
         if search_text:
-            self.status_label.setText(f"Found {visible_count} matching items")
+            self.status_label.setText(f"Found {self.filter_model.rowCount()} matching items")
         else:
             self.update_status()
     
     def update_status(self):
         """Update status label"""
-        total_items = self.list_widget.count()
-        visible_items = sum(1 for i in range(total_items) if not self.list_widget.item(i).isHidden())
+        total_items = self.order_model.rowCount()
+        visible_items = self.filter_model.rowCount()
         self.status_label.setText(f"Showing {visible_items} of {total_items} items")
     
-    def handle_item_activation(self, item=None):
+    def handle_item_activation(self, index=None):
         """Handle item selection via double-click or select button"""
-        if not item:
-            item = self.list_widget.currentItem()
-        if not item:
+        if not isinstance(index, QtCore.QModelIndex) or not index.isValid():
+            index = self.list_view.currentIndex()
+        if not index.isValid():
             return
             
-        selected_data = item.data(Qt.UserRole)
+        selected_data = index.data(Qt.UserRole)
         if not selected_data:
             return
             
@@ -845,7 +1121,7 @@ class PartNumberDialog(QDialog):
 
     def handle_return_key(self):
         """Handle Return/Enter key press"""
-        if self.list_widget.currentItem():
+        if self.list_view.currentIndex().isValid():
             self.handle_item_activation()
 
     def get_selected_part_number(self):
@@ -858,11 +1134,11 @@ class PartNumberDialog(QDialog):
 
     def keyPressEvent(self, event):
         """Handle keyboard navigation"""
-        if event.key() == Qt.Key_Up and self.list_widget.currentRow() == 0:
+        if event.key() == Qt.Key_Up and self.list_view.currentIndex().row() == 0:
             self.search_box.setFocus()
         elif event.key() == Qt.Key_Down and self.search_box.hasFocus():
-            self.list_widget.setFocus()
-            self.list_widget.setCurrentRow(0)
+            self.list_view.setFocus()
+            self.list_view.setCurrentIndex(self.filter_model.index(0))
         else:
             super().keyPressEvent(event)
 
@@ -1298,8 +1574,9 @@ class LoginDialog(QDialog):
         if response.status_code == 200:
             # Get user role
             username = self.username_edit.text()
-            role_response = requests.get(
+            role_response = api.http.get(
                 f"{api.base_url}/auth/users/{username}/role",
+                label=APIEndpoints.AUTH_USER_ROLE,
                 headers={"Authorization": f"Bearer {api.token}"}
             )
             
@@ -1550,33 +1827,23 @@ class OperationsDialog(QDialog):
             print(f"\nMaking API request:")
             print(f"URL will be: {api.base_url}/document-management/documents/download-latest_new/{self.production_order}/ENGINEERING_DRAWING")
             
-            pdf_content = api.get_ipid_drawing(
+            # Served from the local drawing cache when the server reports no change
+            drawing_path = api.get_ipid_drawing_file(
                 self.production_order,
                 operation_number
             )
             
-            if pdf_content:
-                # Save to temp file
-                temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.pdf')
-                temp_file.write(pdf_content)
-                temp_file.close()
-                
+            if drawing_path:
                 # Show PDF Preview Dialog
-                preview_dialog = PDFPreviewDialog(temp_file.name, self)
+                preview_dialog = PDFPreviewDialog(drawing_path, self)
                 if preview_dialog.exec_() == QDialog.Accepted:
-                    self.downloaded_file = temp_file.name
+                    self.downloaded_file = drawing_path
                     self.selected_operation = operation_data
                     self.selected_page = preview_dialog.get_selected_page()
                     self.selected_rotation = preview_dialog.get_rotation()
                     # Generate IPID string using part number for the identifier
                     self.ipid = f"IPID-{self.part_number}-{operation_number}"
                     self.accept()
-                else:
-                    # Clean up temp file if preview was cancelled
-                    try:
-                        os.remove(temp_file.name)
-                    except:
-                        pass
             else:
                 QMessageBox.warning(
                     self, 
@@ -2084,22 +2351,35 @@ class MeasurementInstrumentDialog(QDialog):
 
         return widget
 
-    def load_instruments(self):
-        """Load instruments from the API"""
-        try:
-            # Show loading indicator
-            self.loading_label.setText("Loading instruments...")
-            self.loading_label.show()
-            self.instrument_list.setVisible(False)
+    def load_instruments(self, force=False):
+        """Load instruments, at once from the shared catalogue or in the background"""
+        cached = None if force else instrument_catalogue.cached()
+        if cached is not None:
+            self.populate_instruments(*cached)
+            return
+
+        loader = getattr(self, 'loader_thread', None)
+        if loader is not None and loader.isRunning():
+            return  # Already loading
+
+        # Show loading indicator
+        self.loading_label.setText("Loading instruments...")
+        self.loading_label.show()
+        self.instrument_list.setVisible(False)
 
-            # Use fixed category ID 5 for Instruments
-            instruments_category_id = 5
+        self.loader_thread = InstrumentLoaderThread(force, self)
+        self.loader_thread.data_loaded.connect(self.populate_instruments)
+        self.loader_thread.error_occurred.connect(self.on_loading_error)
+        self.loader_thread.start()
 
-            # Get subcategories for Instruments category
-            subcategories = api.get_inventory_subcategories(instruments_category_id)
-            if not subcategories:
-                raise Exception("Failed to fetch subcategories")
+    def on_loading_error(self, error_msg):
+        self.loading_label.setText(error_msg)
+        self.loading_label.show()
+        print(error_msg)
 
+    def populate_instruments(self, subcategories, all_instruments):
+        """Fill the subcategory filter and the instrument list"""
+        try:
             # Store subcategories for filtering
             self.subcategories = subcategories
 
@@ -2107,8 +2387,7 @@ class MeasurementInstrumentDialog(QDialog):
             self.subcategory_combo.clear()
             self.subcategory_combo.addItem("All Categories")
             for subcategory in subcategories:
-                if subcategory.get('category_id') == instruments_category_id:
-                    self.subcategory_combo.addItem(subcategory['name'], subcategory['id'])
+                self.subcategory_combo.addItem(subcategory['name'], subcategory['id'])
 
             # For admin users, only show categories
             if self.is_admin:
@@ -2117,24 +2396,23 @@ class MeasurementInstrumentDialog(QDialog):
                 added_categories = set()
                 
                 for subcategory in subcategories:
-                    if subcategory.get('category_id') == instruments_category_id:
-                        category_name = subcategory['name']
-                        if category_name not in added_categories:
-                            added_categories.add(category_name)
-                            
-                            item = QListWidgetItem()
-                            widget = self.create_instrument_widget({
-                                'name': category_name,
-                                'id': subcategory['id'],
-                                'subcategory_id': subcategory['id'],
-                                'instrument_code': category_name,
-                                'item_code': None,
-                                'dynamic_data': {},
-                                'calibration': None
-                            })
-                            item.setSizeHint(widget.sizeHint())
-                            self.instrument_list.addItem(item)
-                            self.instrument_list.setItemWidget(item, widget)
+                    category_name = subcategory['name']
+                    if category_name not in added_categories:
+                        added_categories.add(category_name)
+                        
+                        item = QListWidgetItem()
+                        widget = self.create_instrument_widget({
+                            'name': category_name,
+                            'id': subcategory['id'],
+                            'subcategory_id': subcategory['id'],
+                            'instrument_code': category_name,
+                            'item_code': None,
+                            'dynamic_data': {},
+                            'calibration': None
+                        })
+                        item.setSizeHint(widget.sizeHint())
+                        self.instrument_list.addItem(item)
+                        self.instrument_list.setItemWidget(item, widget)
 
                 # Show list and hide loading
                 self.loading_label.hide()
@@ -2146,83 +2424,6 @@ class MeasurementInstrumentDialog(QDialog):
                 return
 
             # For operators, show full instrument details
-            # Get all calibration data
-            calibrations = api.get_calibrations()
-            if not calibrations:
-                print("Warning: No calibration data found")
-                calibrations = []
-
-            # Create a lookup dictionary for calibrations by inventory_item_id
-            calibration_lookup = {
-                cal['inventory_item_id']: cal
-                for cal in calibrations
-            }
-
-            # Process calibration data to add status
-            from datetime import datetime
-            current_date = datetime.now()
-
-            for cal_id, cal_data in calibration_lookup.items():
-                if cal_data.get('next_calibration'):
-                    try:
-                        next_cal_date = datetime.fromisoformat(cal_data['next_calibration'].replace('Z', '+00:00'))
-
-                        # Calculate days remaining
-                        days_remaining = (next_cal_date - current_date).days
-
-                        # Set status based on days remaining
-                        if days_remaining < 0:
-                            cal_data['status'] = 'overdue'
-                        elif days_remaining <= 10:  # Due within 10 days
-                            cal_data['status'] = 'due'
-                        else:
-                            cal_data['status'] = 'valid'
-
-                        # Add days remaining for sorting
-                        cal_data['days_remaining'] = days_remaining
-
-                    except Exception as e:
-                        print(f"Error processing calibration date: {str(e)}")
-                        cal_data['status'] = 'unknown'
-                else:
-                    cal_data['status'] = 'unknown'
-
-            # Get items for each subcategory
-            all_instruments = []
-            for subcategory in subcategories:
-                # Only process subcategories with category_id 5
-                if subcategory.get('category_id') == instruments_category_id:
-                    items = api.get_inventory_items(subcategory['id'])
-                    if items:
-                        for item in items:
-                            # Get instrument code from dynamic_data
-                            dynamic_data = item.get('dynamic_data', {})
-                            instrument_code = dynamic_data.get('Instrument code')
-
-                            # Skip items without an instrument code
-                            if not instrument_code:
-                                continue
-
-                            # Get calibration info for this item
-                            item_id = item.get('id')
-                            calibration_info = calibration_lookup.get(item_id)
-
-                            # Format display name
-                            display_name = f"{subcategory['name']} - {instrument_code}"
-
-                            all_instruments.append({
-                                'name': display_name,
-                                'id': item.get('id'),
-                                'subcategory_id': subcategory['id'],
-                                'instrument_code': instrument_code,
-                                'item_code': item.get('item_code'),
-                                'dynamic_data': dynamic_data,
-                                'calibration': calibration_info
-                            })
-
-            # Sort instruments by instrument code
-            all_instruments.sort(key=lambda x: x['instrument_code'])
-
             # Clear and populate list
             self.instrument_list.clear()
             for instrument in all_instruments:
@@ -2241,9 +2442,7 @@ class MeasurementInstrumentDialog(QDialog):
             self.count_label.setText(f"Total: {total_instruments}")
 
         except Exception as e:
-            error_msg = f"Error loading instruments: {str(e)}"
-            self.loading_label.setText(error_msg)
-            print(error_msg)
+            self.on_loading_error(f"Error loading instruments: {str(e)}")
 
     def get_selected_instrument(self):
         """Get the selected instrument(s)"""
@@ -2956,22 +3155,35 @@ class BluetoothDialog(QDialog):
             print(f"Error handling scan completion: {str(e)}")
             self.on_scan_error("Failed to update device list after scan completion")
 
-    def load_instruments(self):
-        """Load instruments from the API"""
+    def load_instruments(self, force=False):
+        """Load instruments, at once from the shared catalogue or in the background"""
+        cached = None if force else instrument_catalogue.cached()
+        if cached is not None:
+            self.populate_instruments(*cached)
+            return
+
+        loader = getattr(self, 'loader_thread', None)
+        if loader is not None and loader.isRunning():
+            return  # Already loading
+
+        # Show loading indicator
+        self.loading_label.setText("Loading instruments...")
+        self.loading_label.show()
+        self.instrument_list.setVisible(False)
+
+        self.loader_thread = InstrumentLoaderThread(force, self)
+        self.loader_thread.data_loaded.connect(self.populate_instruments)
+        self.loader_thread.error_occurred.connect(self.on_loading_error)
+        self.loader_thread.start()
+
+    def on_loading_error(self, error_msg):
+        self.loading_label.setText(error_msg)
+        self.loading_label.show()
+        print(error_msg)
+
+    def populate_instruments(self, subcategories, all_instruments):
+        """Fill the subcategory filter and the instrument list"""
         try:
-            # Show loading indicator
-            self.loading_label.setText("Loading instruments...")
-            self.loading_label.show()
-            self.instrument_list.setVisible(False)
-            
-            # Use fixed category ID 5 for Instruments
-            instruments_category_id = 5
-            
-            # Get subcategories for Instruments category
-            subcategories = api.get_inventory_subcategories(instruments_category_id)
-            if not subcategories:
-                raise Exception("Failed to fetch subcategories")
-            
             # Store subcategories for filtering
             self.subcategories = subcategories
             
@@ -2979,56 +3191,7 @@ class BluetoothDialog(QDialog):
             self.subcategory_combo.clear()
             self.subcategory_combo.addItem("All Categories")
             for subcategory in subcategories:
-                if subcategory.get('category_id') == instruments_category_id:
-                    self.subcategory_combo.addItem(subcategory['name'], subcategory['id'])
-            
-            # Get all calibration data
-            calibrations = api.get_calibrations()
-            if not calibrations:
-                print("Warning: No calibration data found")
-                calibrations = []
-            
-            # Create a lookup dictionary for calibrations by inventory_item_id
-            calibration_lookup = {
-                cal['inventory_item_id']: cal 
-                for cal in calibrations
-            }
-            
-            # Get items for each subcategory
-            all_instruments = []
-            for subcategory in subcategories:
-                # Only process subcategories with category_id 5
-                if subcategory.get('category_id') == instruments_category_id:
-                    items = api.get_inventory_items(subcategory['id'])
-                    if items:
-                        for item in items:
-                            # Get instrument code from dynamic_data
-                            dynamic_data = item.get('dynamic_data', {})
-                            instrument_code = dynamic_data.get('Instrument code')
-                            
-                            # Skip items without an instrument code
-                            if not instrument_code:
-                                continue
-                            
-                            # Get calibration info for this item
-                            item_id = item.get('id')
-                            calibration_info = calibration_lookup.get(item_id)
-                            
-                            # Format display name
-                            display_name = f"{subcategory['name']} - {instrument_code}"
-                            
-                            all_instruments.append({
-                                'name': display_name,
-                                'id': item.get('id'),
-                                'subcategory_id': subcategory['id'],
-                                'instrument_code': instrument_code,
-                                'item_code': item.get('item_code'),
-                                'dynamic_data': dynamic_data,
-                                'calibration': calibration_info
-                            })
-            
-            # Sort instruments by instrument code
-            all_instruments.sort(key=lambda x: x['instrument_code'])
+                self.subcategory_combo.addItem(subcategory['name'], subcategory['id'])
             
             # Clear and populate list
             self.instrument_list.clear()
@@ -3048,9 +3211,7 @@ class BluetoothDialog(QDialog):
             self.count_label.setText(f"Total: {total_instruments}")
             
         except Exception as e:
-            error_msg = f"Error loading instruments: {str(e)}"
-            self.loading_label.setText(error_msg)
-            print(error_msg)
+            self.on_loading_error(f"Error loading instruments: {str(e)}")
 
     def clean_path(self, path):
         """Clean up the path by removing duplicate folder names"""
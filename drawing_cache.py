@@ -0,0 +1,236 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+
+# Local drawing cache, can be overridden in .env
+#   DRAWING_CACHE_DIR: Folder of the cache (default ~/.smartmetrology/drawings)
+#   DRAWING_CACHE_MB: Megabytes of drawings kept on disk before the least recently used are removed
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".smartmetrology", "drawings")
+DEFAULT_CACHE_MB = 1024
+
+
+class DrawingCache:
+    """Content-addressed on-disk cache of downloaded drawings.
+
+    Files are stored once per SHA-256 of their content under objects/. An index
+    maps cache keys such as ('ipid', production order, operation, version) to a
+    file together with the ETag / Last-Modified validators of the response, so
+    the server can answer a revalidation with 304 Not Modified. Files are evicted
+    least recently used first when the cache grows over its size budget.
+    """
+
+    INDEX_FILE = "index.json"
+
+    def __init__(self, cache_dir=None, max_bytes=None):
+        self.cache_dir = cache_dir or os.getenv('DRAWING_CACHE_DIR', DEFAULT_CACHE_DIR)
+        if max_bytes is None:
+            max_bytes = int(float(os.getenv('DRAWING_CACHE_MB', DEFAULT_CACHE_MB)) * 1024 * 1024)
+        self.max_bytes = max_bytes
+        self._lock = threading.RLock()
+        self._index = None
+
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(*parts):
+        """Index key of a drawing, e.g. make_key('ipid', production_order, operation_number, version_id)"""
+        return "/".join(str(part) for part in parts)
+
+    def lookup(self, key):
+        """Cached entry of a key ({'path', 'etag', 'last_modified', ...}) or None"""
+        with self._lock:
+            entry = self._get_entry(key)
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return entry
+
+    def validators(self, key):
+        """Conditional request headers for revalidating a cached key"""
+        with self._lock:
+            entry = self._get_entry(key)
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def touch(self, key):
+        """Mark a key as just used and return its file path (None if not cached)"""
+        with self._lock:
+            entry = self._get_entry(key)
+            if entry is None:
+                return None
+            index = self._load_index()
+            index['objects'][entry['sha256']]['last_used'] = time.time()
+            self._save_index()
+            return entry['path']
+
+    def link(self, key, source_key):
+        """Index the file of source_key under key as well, e.g. a version as the latest drawing"""
+        with self._lock:
+            entry = self._get_entry(source_key)
+            if entry is None:
+                return
+            entry.pop('path')
+            self._load_index()['keys'][key] = entry
+            self._save_index()
+
+    def store(self, key, chunks, etag=None, last_modified=None):
+        """Write the content of a response (iterable of bytes) and index it under key.
+
+        Returns the path of the cached file.
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        sha256 = hashlib.sha256()
+        size = 0
+
+        fd, temp_path = tempfile.mkstemp(suffix='.part', dir=self.cache_dir)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in chunks:
+                    if chunk:
+                        f.write(chunk)
+                        sha256.update(chunk)
+                        size += len(chunk)
+
+            digest = sha256.hexdigest()
+            path = self._object_path(digest)
+            if os.path.isfile(path):
+                os.remove(temp_path)  # Same content already stored
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(temp_path, path)
+        except Exception:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+
+        with self._lock:
+            index = self._load_index()
+            index['keys'][key] = {
+                'sha256': digest,
+                'etag': etag,
+                'last_modified': last_modified,
+                'stored': time.time()
+            }
+            index['objects'][digest] = {'size': size, 'last_used': time.time()}
+            self._evict(keep=digest)
+            self._save_index()
+        return path
+
+    def contains(self, path):
+        """Check if a path is a file owned by the cache (callers must not delete those)"""
+        if not path:
+            return False
+        objects_dir = os.path.abspath(os.path.join(self.cache_dir, "objects"))
+        return os.path.abspath(path).startswith(objects_dir + os.sep)
+
+    def clear(self):
+        with self._lock:
+            index = self._load_index()
+            for digest in list(index['objects']):
+                self._remove_object(digest)
+            index['keys'].clear()
+            self._save_index()
+
+    def get_stats(self):
+        with self._lock:
+            index = self._load_index()
+            return {
+                'keys': len(index['keys']),
+                'files': len(index['objects']),
+                'bytes': sum(obj['size'] for obj in index['objects'].values()),
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+    def _get_entry(self, key):
+        """Entry of a key with the path of its file, without counting a hit or miss"""
+        index = self._load_index()
+        entry = index['keys'].get(key)
+        if entry is None:
+            return None
+
+        path = self._object_path(entry['sha256'])
+        if not os.path.isfile(path):
+            # File removed behind our back
+            del index['keys'][key]
+            index['objects'].pop(entry['sha256'], None)
+            self._save_index()
+            return None
+        return dict(entry, path=path)
+
+    def _evict(self, keep=None):
+        """Remove least recently used files until the cache fits the budget"""
+        index = self._index
+        total = sum(obj['size'] for obj in index['objects'].values())
+        for digest, obj in sorted(index['objects'].items(), key=lambda item: item[1]['last_used']):
+            if total <= self.max_bytes:
+                break
+            if digest == keep or not self._remove_object(digest):
+                continue
+            total -= obj['size']
+
+    def _remove_object(self, digest):
+        """Delete a stored file and the keys pointing at it, False if the file is in use"""
+        try:
+            os.remove(self._object_path(digest))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            # Open in the viewer (Windows locks open files), try again on a later eviction
+            print(f"Error removing cached drawing: {str(e)}")
+            return False
+
+        index = self._index
+        index['objects'].pop(digest, None)
+        for key in [key for key, entry in index['keys'].items() if entry['sha256'] == digest]:
+            del index['keys'][key]
+        return True
+
+    def _object_path(self, digest):
+        return os.path.join(self.cache_dir, "objects", digest[:2], f"{digest}.pdf")
+
+    def _load_index(self):
+        if self._index is None:
+            self._index = {'keys': {}, 'objects': {}}
+            path = os.path.join(self.cache_dir, self.INDEX_FILE)
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self._index['keys'].update(data.get('keys', {}))
+                self._index['objects'].update(data.get('objects', {}))
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                print(f"Error reading drawing cache index: {str(e)}")
+        return self._index
+
+    def _save_index(self):
+        """Write the index atomically so a crash never leaves it half written"""
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = os.path.join(self.cache_dir, self.INDEX_FILE)
+            temp_path = f"{path}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._index, f)
+            os.replace(temp_path, path)
+        except Exception as e:
+            print(f"Error writing drawing cache index: {str(e)}")
+
+
+# Create singleton instance
+drawing_cache = DrawingCache()
@@ -1,22 +1,21 @@
-import fitz
 from PyQt5 import QtGui, QtCore, QtWidgets
-from PyQt5.QtCore import Qt, QRectF, QPointF
+from PyQt5.QtCore import Qt, QPointF
 from PyQt5.QtWidgets import (QGraphicsItem, QGraphicsView, QGraphicsPolygonItem, QGraphicsTextItem,
                              QTableWidgetItem, QGraphicsEllipseItem, QGraphicsRectItem, QMessageBox, QPushButton)
-from PyQt5.QtGui import QPainter, QPen, QColor, QBrush, QPainterPath, QPolygonF, QImage
-from ultralytics import YOLO
+from PyQt5.QtGui import QPainter, QPen, QColor, QBrush, QPainterPath, QPolygonF
 from events import EventHandler
 import os
-import cv2
-import numpy as np
 
 import types
 from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QFormLayout, QLineEdit,
                              QLabel, QDialogButtonBox, QComboBox)
 from PyQt5.QtGui import QBrush
 from highlight_manager import HighlightManager  # Update this import
-from algorithms import ClusterDetector, DimensionParser
+from algorithms import ClusterDetector
 from algorithms import ZoneDetector
+from detection_engine import detection_engine
+from tiled_canvas import TiledPageItem
+from PyQt5 import sip
 
 
 class CustomGraphicsView(QGraphicsView):
@@ -35,12 +34,6 @@ class CustomGraphicsView(QGraphicsView):
         self.stamp_start = None
         self.stamp_rect = None
 
-        try:
-            self.yolo_model = YOLO(r'D:\siri\calipers\prometrix\prometrix\best.pt')
-        except Exception as e:
-            print(f"Error loading YOLO model: {str(e)}")
-            self.yolo_model = None
-
         self.setRenderHints(
             QPainter.Antialiasing |
             QPainter.SmoothPixmapTransform |
@@ -73,6 +66,20 @@ class CustomGraphicsView(QGraphicsView):
         # Add editing flag
         self.is_editing = False
 
+        # Tiled page shown in the scene
+        self.page_item = None
+
+    def addPageItem(self, page):
+        """Add a PDF page to the scene as a tiled, multi-resolution item"""
+        if self.page_item is not None and not sip.isdeleted(self.page_item):
+            self.page_item.release()
+            if self.page_item.scene() is self.scene():
+                self.scene().removeItem(self.page_item)
+
+        self.page_item = TiledPageItem(page)
+        self.scene().addItem(self.page_item)
+        return self.page_item
+
     def clearOCRItems(self, clear_all=True):
         """Safely clear OCR items"""
         if clear_all:
@@ -199,8 +206,6 @@ class CustomGraphicsView(QGraphicsView):
             x1 = x0 + rect.width()
             y1 = y0 + rect.height()
 
-            clip_rect = fitz.Rect(x0 / 2, y0 / 2, x1 / 2, y1 / 2)
-
             # Get existing bounding boxes from the table
             existing_boxes = []
             for row in range(self.main_window.ui.dimtable.rowCount()):
@@ -212,122 +217,11 @@ class CustomGraphicsView(QGraphicsView):
 
             print(f"Found {len(existing_boxes)} existing bounding boxes")
 
-            # Get text using PyMuPDF
-            fitz_dict = self.main_window.loaded_page.get_text("dict", clip=clip_rect)['blocks']
-            pdf_results = []
-
-            # Process text blocks
-            for block in fitz_dict:
-                if 'lines' in block:
-                    for line in block['lines']:
-                        for span in line['spans']:
-                            dimension = span['text'].strip()
-                            if not dimension:  # Skip empty text
-                                continue
-                            bound_box = span['bbox']
-                            # Scale coordinates
-                            bound_box = [i * 2 for i in bound_box]
-                            # Convert to our standard format
-                            scene_box = [
-                                [bound_box[0], bound_box[1]],  # top-left
-                                [bound_box[2], bound_box[1]],  # top-right
-                                [bound_box[2], bound_box[3]],  # bottom-right
-                                [bound_box[0], bound_box[3]]  # bottom-left
-                            ]
-
-                            # Check if this detection overlaps with existing boxes
-                            is_overlapping = False
-                            for existing_box in existing_boxes:
-                                if self.calculate_iou(scene_box, existing_box) > 0.3:
-                                    print(f"Skipping PDF detection - overlaps with existing box")
-                                    is_overlapping = True
-                                    break
-
-                            if not is_overlapping:
-                                pdf_results.append({
-                                    'text': dimension,
-                                    'box': scene_box,
-                                    'confidence': 1.0,  # PyMuPDF doesn't provide confidence
-                                    'rotation': 0
-                                })
-
-            # Process YOLO detection for the selected area
-            yolo_results = []
-            if self.yolo_model:
-                try:
-                    # Convert scene coordinates to image coordinates
-                    scene_rect = QRectF(x0, y0, rect.width(), rect.height())
-
-                    # Create a QImage of the selected area with RGBA format
-                    width = int(rect.width())
-                    height = int(rect.height())
-                    image = QImage(width, height, QImage.Format_RGBA8888)
-                    image.fill(Qt.white)
-
-                    # Create painter to render the scene portion
-                    painter = QPainter(image)
-                    painter.setRenderHint(QPainter.Antialiasing)
-                    painter.setRenderHint(QPainter.SmoothPixmapTransform)
-
-                    # Set up the viewport transformation to render only the selected area
-                    self.scene().render(painter, QRectF(0, 0, width, height), scene_rect)
-                    painter.end()
-
-                    # Convert QImage to numpy array
-                    bits = image.constBits()
-                    bits.setsize(height * width * 4)  # 4 channels (RGBA)
-                    arr = np.frombuffer(bits, np.uint8).reshape(height, width, 4)
-
-                    # Convert RGBA to BGR for YOLO
-                    img_np = cv2.cvtColor(arr, cv2.COLOR_RGBA2BGR)
-
-                    # Save debug image
-                    cv2.imwrite('selected_area_debug.png', img_np)
-
-                    # Run YOLO detection
-                    results = self.yolo_model(img_np)
-                    for result in results:
-                        boxes = result.boxes
-                        for box in boxes:
-                            if box.conf.item() >= 0.5:  # Confidence threshold
-                                # Get coordinates
-                                x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-
-                                # Convert coordinates to scene coordinates
-                                scene_x1 = x0 + x1
-                                scene_y1 = y0 + y1
-                                scene_x2 = x0 + x2
-                                scene_y2 = y0 + y2
-
-                                yolo_box = [
-                                    [scene_x1, scene_y1],
-                                    [scene_x2, scene_y1],
-                                    [scene_x2, scene_y2],
-                                    [scene_x1, scene_y2]
-                                ]
-
-                                # Check if this detection overlaps with existing boxes
-                                is_overlapping = False
-                                for existing_box in existing_boxes:
-                                    if self.calculate_iou(yolo_box, existing_box) > 0.3:
-                                        print(f"Skipping YOLO detection - overlaps with existing box")
-                                        is_overlapping = True
-                                        break
-
-                                if not is_overlapping:
-                                    yolo_results.append({
-                                        'box': yolo_box,
-                                        'confidence': box.conf.item(),
-                                        'class': int(box.cls),
-                                        'class_name': result.names[int(box.cls)]
-                                    })
-
-                    print(f"Found {len(yolo_results)} new YOLO detections")
-
-                except Exception as e:
-                    print(f"Error in YOLO processing: {str(e)}")
-                    import traceback
-                    traceback.print_exc()
+            # Text and symbols of the area that don't overlap existing boxes, clustered into records
+            result = detection_engine.detect_area(self.main_window.current_page, (x0, y0, x1, y1),
+                                                  exclude_boxes=existing_boxes)
+            pdf_results = [span.to_dict() for span in result.spans]
+            yolo_results = [symbol.to_dict() for symbol in result.symbols]
 
             # Only add new detections that don't overlap with existing ones
             if pdf_results or yolo_results:
@@ -339,57 +233,14 @@ class CustomGraphicsView(QGraphicsView):
                 self.main_window.ocr_results.extend(pdf_results)
                 self.main_window.all_detections['yolo'].extend(yolo_results)
 
-                # Process results with clustering
-                ClusterDetector.cluster_detections(
-                    self.main_window,
-                    pdf_results,  # Only pass new PDF results
-                    yolo_results,  # Only pass new YOLO results
-                    DimensionParser,
-                    clear_existing=False  # Don't clear existing items
-                )
+                # Existing rows are kept, zones come from the window's cached grid
+                ClusterDetector.add_records_to_table(self.main_window, result.records)
 
         except Exception as e:
             print(f"Error processing selected area: {str(e)}")
             import traceback
             traceback.print_exc()
 
-    def calculate_iou(self, box1, box2):
-        """Calculate Intersection over Union between two bounding boxes"""
-        try:
-            # Convert boxes to QRectF for easier calculation
-            def box_to_rect(box):
-                x_coords = [p[0] for p in box]
-                y_coords = [p[1] for p in box]
-                return QRectF(
-                    min(x_coords),
-                    min(y_coords),
-                    max(x_coords) - min(x_coords),
-                    max(y_coords) - min(y_coords)
-                )
-
-            rect1 = box_to_rect(box1)
-            rect2 = box_to_rect(box2)
-
-            # Calculate intersection
-            intersection = rect1.intersected(rect2)
-            if intersection.isEmpty():
-                return 0.0
-
-            intersection_area = intersection.width() * intersection.height()
-
-            # Calculate areas
-            area1 = rect1.width() * rect1.height()
-            area2 = rect2.width() * rect2.height()
-
-            # Calculate IoU
-            union_area = area1 + area2 - intersection_area
-
-            return intersection_area / union_area if union_area > 0 else 0.0
-
-        except Exception as e:
-            print(f"Error calculating IoU: {str(e)}")
-            return 0.0
-
     def addCustomBBox(self, points, dimension_data):
         """Add custom bounding box with dimension data"""
         try:
@@ -0,0 +1,214 @@
+import bisect
+import os
+import re
+import threading
+import time
+from urllib.parse import urlsplit
+
+from lazy_imports import lazy_import
+
+requests = lazy_import('requests')  # Imported with the first request
+
+
+# HTTP transport settings, can be overridden in .env
+#   API_CONNECT_TIMEOUT: Seconds to wait for a connection to the server
+#   API_READ_TIMEOUT: Seconds to wait for a response, unless the endpoint has its own timeout
+#   API_RETRIES: Retries of idempotent requests (GET, HEAD, ...) and of failed connections
+#   API_POOL_SIZE: Keep-alive connections kept open to the server
+DEFAULT_CONNECT_TIMEOUT = 5
+DEFAULT_READ_TIMEOUT = 30
+DEFAULT_RETRIES = 3
+DEFAULT_POOL_SIZE = 10
+RETRY_BACKOFF = 0.5  # Seconds, doubled on every retry
+RETRY_STATUSES = (429, 502, 503, 504)
+
+# Read timeouts of slow endpoints (seconds), keyed by endpoint label
+ENDPOINT_READ_TIMEOUTS = {
+    "/": 5,
+    "/auth/login": 10,
+    "/documents/by-part-number/": 30,
+    "/documents/download-by-part-number": 120,
+    "/documents/{id}/download/{id}": 120,
+    "/document-management/documents/download-latest_new/{id}/IPID": 120,
+    "/document-management/documents/download-latest_new/{id}/ENGINEERING_DRAWING": 120,
+    "/document-management/ballooned-drawing/upload/": 300,
+    "/document-management/report/upload/": 300,
+}
+
+# Upper bounds of the latency histogram buckets in milliseconds (the last bucket is open)
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+
+class LatencyHistogram:
+    """Request latency distribution of one endpoint"""
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, elapsed_ms, error=False):
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        if error:
+            self.errors += 1
+
+    def percentile(self, fraction):
+        """Upper bound of the bucket holding the given fraction of requests"""
+        if not self.count:
+            return 0.0
+        target = fraction * self.count
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS_MS, self.buckets):
+            seen += count
+            if seen >= target:
+                return float(bound)
+        return self.max_ms
+
+    def to_dict(self):
+        labels = [f"<={bound}" for bound in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}"]
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'mean_ms': self.total_ms / self.count if self.count else 0.0,
+            'p50_ms': self.percentile(0.5),
+            'p95_ms': self.percentile(0.95),
+            'max_ms': self.max_ms,
+            'buckets': dict(zip(labels, self.buckets))
+        }
+
+
+class HTTPTransport:
+    """Shared requests.Session for all API calls.
+
+    Keeps connections to the server alive between calls, applies a timeout per
+    endpoint, retries idempotent requests with exponential backoff (and any
+    request whose connection could not be established), asks for gzip encoded
+    responses and records a latency histogram per endpoint.
+    """
+
+    def __init__(self, base_url, retries=None, pool_size=None):
+        self.base_url = base_url.rstrip('/')
+        self.connect_timeout = float(os.getenv('API_CONNECT_TIMEOUT', DEFAULT_CONNECT_TIMEOUT))
+        self.read_timeout = float(os.getenv('API_READ_TIMEOUT', DEFAULT_READ_TIMEOUT))
+        self.retries = int(os.getenv('API_RETRIES', DEFAULT_RETRIES)) if retries is None else retries
+        self.pool_size = int(os.getenv('API_POOL_SIZE', DEFAULT_POOL_SIZE)) if pool_size is None else pool_size
+        self.histograms = {}
+        self._lock = threading.Lock()
+        self._session = None
+
+    @property
+    def session(self):
+        """The pooled session, created on first use"""
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    self._session = self._create_session()
+        return self._session
+
+    def _create_session(self):
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        retry = Retry(
+            total=self.retries,
+            connect=self.retries,
+            read=self.retries,
+            status=self.retries,
+            backoff_factor=RETRY_BACKOFF,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,  # Idempotent methods only, never POST
+            raise_on_status=False,  # Hand the last response to the caller as before
+            respect_retry_after_header=True
+        )
+        adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size, max_retries=retry)
+
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers.update({"Accept-Encoding": "gzip, deflate"})
+        return session
+
+    def request(self, method, url, label=None, **kwargs):
+        """Send a request through the pooled session.
+
+        label names the endpoint for timeouts and statistics; by default it is
+        the URL path relative to the API with numeric parts replaced by {id}.
+        """
+        label = label or self.endpoint_label(url)
+        kwargs.setdefault('timeout', (self.connect_timeout, ENDPOINT_READ_TIMEOUTS.get(label, self.read_timeout)))
+
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, url, **kwargs)
+        except requests.RequestException:
+            self._record(method, label, time.perf_counter() - start, error=True)
+            raise
+        self._record(method, label, time.perf_counter() - start, error=response.status_code >= 400)
+        return response
+
+    def preconnect(self):
+        """Create the session and open a keep-alive connection to the server ahead of the first call.
+
+        A single attempt without retries, so an unreachable server costs at most
+        the connect timeout. Returns True if the server answered.
+        """
+        import urllib3
+
+        try:
+            # The pool requests will pick for this URL (its key includes the TLS settings)
+            adapter = self.session.get_adapter(self.base_url)
+            settings = self.session.merge_environment_settings(self.base_url, {}, None, None, None)
+            if hasattr(adapter, 'get_connection_with_tls_context'):
+                request = requests.Request("HEAD", self.base_url).prepare()
+                pool = adapter.get_connection_with_tls_context(request, settings['verify'], settings['proxies'],
+                                                               settings['cert'])
+            else:
+                pool = adapter.get_connection(self.base_url, settings['proxies'])
+            pool.urlopen("HEAD", urlsplit(self.base_url).path or "/", retries=False, redirect=False,
+                         timeout=urllib3.Timeout(connect=self.connect_timeout, read=ENDPOINT_READ_TIMEOUTS["/"]))
+            return True
+        except Exception as e:
+            print(f"Error connecting to {self.base_url}: {str(e)}")
+            return False
+
+    def get(self, url, label=None, **kwargs):
+        return self.request("GET", url, label=label, **kwargs)
+
+    def post(self, url, label=None, **kwargs):
+        return self.request("POST", url, label=label, **kwargs)
+
+    def endpoint_label(self, url):
+        """Endpoint of a URL for statistics, e.g. /quality/ftp/{id}/IPID-1-10 -> /quality/ftp/{id}/{id}"""
+        path = urlsplit(url).path
+        base_path = urlsplit(self.base_url).path.rstrip('/')
+        if base_path and path.startswith(base_path):
+            path = path[len(base_path):]
+        return re.sub(r'/(?=[^/]*\d)[^/]+', '/{id}', path) or "/"
+
+    def _record(self, method, label, elapsed, error=False):
+        with self._lock:
+            histogram = self.histograms.get((method, label))
+            if histogram is None:
+                histogram = self.histograms[(method, label)] = LatencyHistogram()
+            histogram.record(elapsed * 1000, error)
+
+    def get_stats(self):
+        """Latency histograms, keyed by 'METHOD endpoint'"""
+        with self._lock:
+            return {f"{method} {label}": histogram.to_dict()
+                    for (method, label), histogram in sorted(self.histograms.items())}
+
+    def print_stats(self):
+        for endpoint, stats in self.get_stats().items():
+            print(f"{endpoint}: {stats['count']} requests, {stats['errors']} errors, "
+                  f"mean {stats['mean_ms']:.0f} ms, p50 <= {stats['p50_ms']:.0f} ms, "
+                  f"p95 <= {stats['p95_ms']:.0f} ms, max {stats['max_ms']:.0f} ms")
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
@@ -0,0 +1,353 @@
+import ast
+import glob
+import os
+from abc import ABC, abstractmethod
+
+import cv2
+import numpy as np
+
+
+class TorchBackend:
+    """Reference backend running best.pt through ultralytics/PyTorch"""
+    name = 'torch'
+
+    def __init__(self, model_path, num_threads=None):
+        if num_threads:
+            import torch
+            torch.set_num_threads(num_threads)
+
+        from ultralytics import YOLO
+        self.model = YOLO(model_path)
+        self.names = self.model.names
+
+    def detect(self, image, conf_threshold=0.25):
+        """Run detection and return [{'box': [x1, y1, x2, y2], 'confidence', 'class', 'class_name'}]"""
+        return self.detect_batch([image], conf_threshold)[0]
+
+    def detect_batch(self, images, conf_threshold=0.25):
+        """Run detection on a list of images in one forward pass, one detection list per image"""
+        batch_detections = []
+        for result in self.model(list(images)):
+            detections = []
+            for x1, y1, x2, y2, conf, cls in result.boxes.data.tolist():
+                if conf >= conf_threshold:
+                    detections.append({
+                        'box': [x1, y1, x2, y2],
+                        'confidence': float(conf),
+                        'class': int(cls),
+                        'class_name': result.names[int(cls)]
+                    })
+            batch_detections.append(detections)
+        return batch_detections
+
+    def memory_bytes(self):
+        """Size of the parameters and buffers of the torch module"""
+        try:
+            module = self.model.model
+            tensors = list(module.parameters()) + list(module.buffers())
+            return sum(t.numel() * t.element_size() for t in tensors)
+        except Exception:
+            return None
+
+
+class ExportedBackend(ABC):
+    """Letterbox pre-processing and NMS post-processing shared by exported YOLOv8 graphs.
+
+    Mirrors the ultralytics predictor so boxes match the torch backend.
+    """
+    name = 'exported'
+    IOU_THRESHOLD = 0.7  # ultralytics default NMS IoU
+    MAX_DETECTIONS = 300
+    MAX_WH = 7680  # Class offset for class-aware NMS
+    PAD_VALUE = (114, 114, 114)
+
+    def __init__(self):
+        self.names = {}
+        self.input_size = (640, 640)  # (height, width)
+        self.dynamic_batch = False  # Graph accepts more than one image per run
+
+    def detect(self, image, conf_threshold=0.25):
+        """Run detection and return [{'box': [x1, y1, x2, y2], 'confidence', 'class', 'class_name'}]"""
+        blob, gain, pad = self._preprocess(image)
+        output = self._infer(blob)
+        return self._postprocess(output, gain, pad, image.shape[:2], conf_threshold)
+
+    def detect_batch(self, images, conf_threshold=0.25):
+        """Run detection on a list of images, one detection list per image.
+
+        Graphs exported with a fixed batch of 1 run the images one after another.
+        """
+        if not self.dynamic_batch or len(images) == 1:
+            return [self.detect(image, conf_threshold) for image in images]
+
+        prepared = [self._preprocess(image) for image in images]
+        output = np.asarray(self._infer(np.concatenate([blob for blob, _, _ in prepared])))
+        return [
+            self._postprocess(output[i:i + 1], gain, pad, image.shape[:2], conf_threshold)
+            for i, (image, (_, gain, pad)) in enumerate(zip(images, prepared))
+        ]
+
+    @abstractmethod
+    def _infer(self, blob):
+        """Run the graph on an NCHW float32 blob, returns its (N, 4 + nc, anchors) output"""
+
+    def memory_bytes(self):
+        return None
+
+    def _preprocess(self, image):
+        """Letterbox to the graph input size and convert to a normalized NCHW blob"""
+        height, width = image.shape[:2]
+        input_h, input_w = self.input_size
+        gain = min(input_h / height, input_w / width)
+
+        new_w, new_h = int(round(width * gain)), int(round(height * gain))
+        dw = (input_w - new_w) / 2
+        dh = (input_h - new_h) / 2
+
+        if (width, height) != (new_w, new_h):
+            image = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+
+        top, bottom = int(round(dh - 0.1)), int(round(dh + 0.1))
+        left, right = int(round(dw - 0.1)), int(round(dw + 0.1))
+        image = cv2.copyMakeBorder(image, top, bottom, left, right, cv2.BORDER_CONSTANT, value=self.PAD_VALUE)
+
+        # BGR HWC uint8 -> RGB CHW float32, same as the ultralytics predictor
+        blob = image[..., ::-1].transpose(2, 0, 1)
+        blob = np.ascontiguousarray(blob, dtype=np.float32)[None] / 255.0
+        return blob, gain, (left, top)
+
+    def _postprocess(self, output, gain, pad, image_shape, conf_threshold):
+        """Decode (1, 4 + nc, N) predictions, run class-aware NMS and scale back to the image"""
+        preds = np.asarray(output)[0].T  # (N, 4 + nc)
+        scores = preds[:, 4:]
+        class_ids = scores.argmax(axis=1)
+        confidences = scores[np.arange(len(scores)), class_ids]
+
+        keep = confidences >= conf_threshold
+        if not keep.any():
+            return []
+        preds, class_ids, confidences = preds[keep], class_ids[keep], confidences[keep]
+
+        # xywh (center) -> xyxy
+        boxes = np.empty((len(preds), 4), dtype=np.float32)
+        boxes[:, 0] = preds[:, 0] - preds[:, 2] / 2
+        boxes[:, 1] = preds[:, 1] - preds[:, 3] / 2
+        boxes[:, 2] = preds[:, 0] + preds[:, 2] / 2
+        boxes[:, 3] = preds[:, 1] + preds[:, 3] / 2
+
+        # Class-aware NMS by offsetting boxes of each class
+        offset = class_ids[:, None].astype(np.float32) * self.MAX_WH
+        nms_boxes = boxes + offset
+        rects = np.column_stack([nms_boxes[:, 0], nms_boxes[:, 1],
+                                 nms_boxes[:, 2] - nms_boxes[:, 0], nms_boxes[:, 3] - nms_boxes[:, 1]])
+        indices = cv2.dnn.NMSBoxes(rects.tolist(), confidences.tolist(), conf_threshold, self.IOU_THRESHOLD)
+        indices = np.asarray(indices, dtype=np.int64).reshape(-1)
+        indices = indices[np.argsort(-confidences[indices], kind='stable')][:self.MAX_DETECTIONS]
+
+        # Undo letterbox
+        boxes = boxes[indices]
+        boxes[:, [0, 2]] -= pad[0]
+        boxes[:, [1, 3]] -= pad[1]
+        boxes /= gain
+        height, width = image_shape
+        boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, width)
+        boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, height)
+
+        detections = []
+        for box, conf, cls in zip(boxes.tolist(), confidences[indices].tolist(), class_ids[indices].tolist()):
+            detections.append({
+                'box': box,
+                'confidence': float(conf),
+                'class': int(cls),
+                'class_name': self.names.get(int(cls), str(cls))
+            })
+        return detections
+
+    @staticmethod
+    def _parse_names(names):
+        """Names are stored as the repr of a dict in the export metadata"""
+        if isinstance(names, str):
+            names = ast.literal_eval(names)
+        return {int(k): v for k, v in (names or {}).items()}
+
+    @staticmethod
+    def _export(model_path, export_format, int8=False):
+        """Export best.pt once with ultralytics and reuse the exported file afterwards"""
+        stem, _ = os.path.splitext(model_path)
+        if export_format == 'onnx':
+            exported = f"{stem}.onnx"
+        else:
+            exported = f"{stem}_int8_openvino_model" if int8 else f"{stem}_openvino_model"
+
+        if not os.path.exists(exported):
+            from ultralytics import YOLO
+            print(f"Exporting {os.path.basename(model_path)} to {export_format}...")
+            kwargs = {'format': export_format}
+            if export_format == 'openvino' and int8:
+                kwargs['int8'] = True
+            exported = YOLO(model_path).export(**kwargs)
+        return str(exported)
+
+
+class OnnxBackend(ExportedBackend):
+    """CPU backend running the exported graph with ONNX Runtime"""
+    name = 'onnx'
+
+    def __init__(self, model_path, num_threads=None, int8=False):
+        super().__init__()
+        import onnxruntime as ort
+
+        onnx_path = model_path if model_path.endswith('.onnx') else self._export(model_path, 'onnx')
+        if int8:
+            onnx_path = self._quantize(onnx_path)
+        self.model_path = onnx_path
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+            options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(onnx_path, sess_options=options,
+                                            providers=['CPUExecutionProvider'])
+
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        self.dynamic_batch = not isinstance(model_input.shape[0], int)
+        if isinstance(model_input.shape[2], int) and isinstance(model_input.shape[3], int):
+            self.input_size = (model_input.shape[2], model_input.shape[3])
+
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        self.names = self._parse_names(metadata.get('names'))
+
+    def _infer(self, blob):
+        return self.session.run(None, {self.input_name: blob})[0]
+
+    def memory_bytes(self):
+        try:
+            return os.path.getsize(self.model_path)
+        except OSError:
+            return None
+
+    @staticmethod
+    def _quantize(onnx_path):
+        """Dynamic INT8 quantization of the weights, cached next to the float graph"""
+        stem, _ = os.path.splitext(onnx_path)
+        int8_path = f"{stem}.int8.onnx"
+        if not os.path.exists(int8_path):
+            from onnxruntime.quantization import quantize_dynamic, QuantType
+            print(f"Quantizing {os.path.basename(onnx_path)} to INT8...")
+            quantize_dynamic(onnx_path, int8_path, weight_type=QuantType.QUInt8)
+        return int8_path
+
+
+class OpenVINOBackend(ExportedBackend):
+    """CPU backend running the exported graph with OpenVINO"""
+    name = 'openvino'
+
+    def __init__(self, model_path, num_threads=None, int8=False):
+        super().__init__()
+        import openvino as ov
+        import yaml
+
+        model_dir = model_path if os.path.isdir(model_path) else self._export(model_path, 'openvino', int8)
+        xml_files = glob.glob(os.path.join(model_dir, '*.xml'))
+        if not xml_files:
+            raise FileNotFoundError(f"No OpenVINO model found in {model_dir}")
+        self.model_path = xml_files[0]
+
+        config = {'PERFORMANCE_HINT': 'LATENCY'}
+        if num_threads:
+            config['INFERENCE_NUM_THREADS'] = num_threads
+        core = ov.Core()
+        self.compiled_model = core.compile_model(core.read_model(self.model_path), 'CPU', config)
+        self.output = self.compiled_model.output(0)
+
+        input_shape = self.compiled_model.input(0).get_partial_shape()
+        self.dynamic_batch = input_shape[0].is_dynamic
+        if input_shape[2].is_static and input_shape[3].is_static:
+            self.input_size = (input_shape[2].get_length(), input_shape[3].get_length())
+
+        metadata_path = os.path.join(model_dir, 'metadata.yaml')
+        if os.path.exists(metadata_path):
+            with open(metadata_path) as f:
+                self.names = self._parse_names(yaml.safe_load(f).get('names'))
+
+    def _infer(self, blob):
+        return self.compiled_model(blob)[self.output]
+
+    def memory_bytes(self):
+        try:
+            weights = os.path.splitext(self.model_path)[0] + '.bin'
+            return os.path.getsize(weights)
+        except OSError:
+            return None
+
+
+def plan_tiles(image_shape, tile_size=640, overlap=0.2, mask=None):
+    """Return (x, y, w, h) tiles of tile_size overlapping by the given fraction.
+
+    With a mask the tiles only cover its bounding box, and tiles that contain no
+    mask pixels are skipped. Edge tiles are shifted inwards so that every tile
+    keeps the full size when the image is large enough.
+    """
+    height, width = image_shape[:2]
+    x_min, y_min, x_max, y_max = 0, 0, width, height
+    if mask is not None:
+        ys, xs = np.nonzero(mask)
+        if len(xs) == 0:
+            return []
+        x_min, y_min, x_max, y_max = xs.min(), ys.min(), xs.max() + 1, ys.max() + 1
+
+    stride = max(1, int(tile_size * (1 - overlap)))
+
+    def starts(low, high, limit):
+        if high - low <= tile_size:
+            return [max(0, min(low, limit - tile_size))]
+        positions = list(range(low, high - tile_size, stride))
+        positions.append(high - tile_size)
+        return positions
+
+    tiles = []
+    for y in starts(int(y_min), int(y_max), height):
+        for x in starts(int(x_min), int(x_max), width):
+            w, h = min(tile_size, width - x), min(tile_size, height - y)
+            if mask is not None and not mask[y:y + h, x:x + w].any():
+                continue
+            tiles.append((x, y, w, h))
+    return tiles
+
+
+def merge_detections(detections, iou_threshold=0.5):
+    """Class-aware NMS over detections collected from overlapping tiles"""
+    if not detections:
+        return []
+
+    boxes = np.array([d['box'] for d in detections], dtype=np.float64)
+    confidences = np.array([d['confidence'] for d in detections], dtype=np.float32)
+    class_ids = np.array([d['class'] for d in detections], dtype=np.float64)
+
+    # Tile boxes are in page coordinates, which can be larger than MAX_WH, so the
+    # class offset is taken from the boxes to keep classes apart on any page size
+    boxes = boxes + class_ids[:, None] * (boxes.max() + 1)
+    rects = np.column_stack([boxes[:, 0], boxes[:, 1], boxes[:, 2] - boxes[:, 0], boxes[:, 3] - boxes[:, 1]])
+    indices = cv2.dnn.NMSBoxes(rects.tolist(), confidences.tolist(), 0.0, iou_threshold)
+    indices = np.asarray(indices, dtype=np.int64).reshape(-1)
+    indices = indices[np.argsort(-confidences[indices], kind='stable')]
+    return [detections[i] for i in indices]
+
+
+BACKENDS = {
+    'torch': TorchBackend,
+    'onnx': OnnxBackend,
+    'openvino': OpenVINOBackend
+}
+
+
+def create_backend(name, model_path, num_threads=None, int8=False):
+    """Create an inference backend by name ('torch', 'onnx' or 'openvino')"""
+    name = (name or 'torch').lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown inference backend: {name}")
+    if name == 'torch':
+        return TorchBackend(model_path, num_threads=num_threads)
+    return BACKENDS[name](model_path, num_threads=num_threads, int8=int8)
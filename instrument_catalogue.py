@@ -0,0 +1,142 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from api_endpoints import api
+
+
+# Instrument catalogue cache, can be overridden in .env
+#   INSTRUMENT_CACHE_TTL: Seconds the merged instrument list is reused before it is fetched again
+#   INSTRUMENT_FETCH_WORKERS: Subcategories whose items are fetched at the same time
+DEFAULT_INSTRUMENT_CACHE_TTL = 300
+DEFAULT_INSTRUMENT_FETCH_WORKERS = 6
+
+INSTRUMENTS_CATEGORY_ID = 5  # Inventory category of measurement instruments
+CALIBRATION_DUE_DAYS = 10  # Calibrations due within this many days are flagged 'due'
+
+
+def add_calibration_status(calibration, now=None):
+    """Set 'status' (overdue/due/valid/unknown) and 'days_remaining' of a calibration record"""
+    if not calibration.get('next_calibration'):
+        calibration['status'] = 'unknown'
+        return calibration
+
+    now = now or datetime.now()
+    try:
+        next_cal_date = datetime.fromisoformat(calibration['next_calibration'].replace('Z', '+00:00'))
+        if next_cal_date.tzinfo is not None:
+            next_cal_date = next_cal_date.astimezone().replace(tzinfo=None)
+        days_remaining = (next_cal_date - now).days
+
+        if days_remaining < 0:
+            calibration['status'] = 'overdue'
+        elif days_remaining <= CALIBRATION_DUE_DAYS:
+            calibration['status'] = 'due'
+        else:
+            calibration['status'] = 'valid'
+        calibration['days_remaining'] = days_remaining
+
+    except Exception as e:
+        print(f"Error processing calibration date: {str(e)}")
+        calibration['status'] = 'unknown'
+    return calibration
+
+
+class InstrumentCatalogue:
+    """Merged list of measurement instruments with their calibrations.
+
+    Subcategory items are fetched concurrently together with the calibrations
+    and joined by inventory item id. The result is shared by the instrument and
+    Bluetooth dialogs and reused until it is older than the TTL.
+    """
+
+    def __init__(self, ttl=None, max_workers=None):
+        self.ttl = float(os.getenv('INSTRUMENT_CACHE_TTL', DEFAULT_INSTRUMENT_CACHE_TTL)) if ttl is None else ttl
+        self.max_workers = max_workers or int(os.getenv('INSTRUMENT_FETCH_WORKERS', DEFAULT_INSTRUMENT_FETCH_WORKERS))
+        self._subcategories = None
+        self._instruments = None
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def cached(self):
+        """(subcategories, instruments) if a fresh copy is cached, otherwise None"""
+        with self._lock:
+            if self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl:
+                return None
+            return list(self._subcategories), list(self._instruments)
+
+    def get(self, force=False):
+        """(subcategories, instruments), fetched from the API when missing or stale.
+
+        Blocks while fetching, call it off the GUI thread.
+        """
+        if not force:
+            cached = self.cached()
+            if cached is not None:
+                return cached
+
+        subcategories, instruments = self._fetch()
+        with self._lock:
+            self._subcategories = subcategories
+            self._instruments = instruments
+            self._loaded_at = time.monotonic()
+        return list(subcategories), list(instruments)
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = None
+
+    def _fetch(self):
+        subcategories = api.get_inventory_subcategories(INSTRUMENTS_CATEGORY_ID)
+        if not subcategories:
+            raise Exception("Failed to fetch subcategories")
+        subcategories = [s for s in subcategories if s.get('category_id') == INSTRUMENTS_CATEGORY_ID]
+
+        # Calibrations and the items of every subcategory in parallel
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            calibrations_future = executor.submit(api.get_calibrations)
+            item_futures = [(subcategory, executor.submit(api.get_inventory_items, subcategory['id']))
+                            for subcategory in subcategories]
+
+            calibrations = calibrations_future.result()
+            if not calibrations:
+                print("Warning: No calibration data found")
+                calibrations = []
+
+            # Calibrations by inventory_item_id
+            now = datetime.now()
+            calibration_lookup = {
+                cal['inventory_item_id']: add_calibration_status(cal, now)
+                for cal in calibrations
+            }
+
+            instruments = []
+            for subcategory, future in item_futures:
+                for item in future.result() or []:
+                    # Get instrument code from dynamic_data
+                    dynamic_data = item.get('dynamic_data', {})
+                    instrument_code = dynamic_data.get('Instrument code')
+
+                    # Skip items without an instrument code
+                    if not instrument_code:
+                        continue
+
+                    instruments.append({
+                        'name': f"{subcategory['name']} - {instrument_code}",
+                        'id': item.get('id'),
+                        'subcategory_id': subcategory['id'],
+                        'instrument_code': instrument_code,
+                        'item_code': item.get('item_code'),
+                        'dynamic_data': dynamic_data,
+                        'calibration': calibration_lookup.get(item.get('id'))
+                    })
+
+        # Sort instruments by instrument code
+        instruments.sort(key=lambda x: x['instrument_code'])
+        return subcategories, instruments
+
+
+# Create singleton instance
+instrument_catalogue = InstrumentCatalogue()
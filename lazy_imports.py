@@ -0,0 +1,70 @@
+import importlib
+import sys
+import threading
+import time
+
+
+# Seconds spent importing each deferred module, in load order
+load_times = {}
+
+_lock = threading.RLock()
+
+
+class LazyModule:
+    """Stand-in for a heavy module that is imported on first attribute access.
+
+    `fitz = lazy_import('fitz')` keeps fitz.open(...) working unchanged while
+    moving the import out of application startup. The import runs once, under
+    a lock, so the first use from a worker thread is safe.
+    """
+
+    def __init__(self, name):
+        self.__dict__['_name'] = name
+        self.__dict__['_module'] = None
+
+    def _load(self):
+        with _lock:
+            module = self.__dict__['_module']
+            if module is None:
+                name = self.__dict__['_name']
+                start = time.perf_counter()
+                module = importlib.import_module(name)
+                load_times.setdefault(name, time.perf_counter() - start)
+                # Later lookups hit the copied attributes instead of __getattr__
+                self.__dict__.update(module.__dict__)
+                self.__dict__['_module'] = module
+            return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+        self.__dict__[attr] = value
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = 'loaded' if self.__dict__['_module'] is not None else 'not loaded'
+        return f"<lazy module '{self.__dict__['_name']}' ({state})>"
+
+
+def lazy_import(name):
+    """The module if it is already imported, otherwise a LazyModule for it"""
+    module = sys.modules.get(name)
+    return module if module is not None else LazyModule(name)
+
+
+def is_loaded(name):
+    return name in sys.modules
+
+
+def preload(*names):
+    """Import the named modules now (e.g. from a background thread)"""
+    for name in names:
+        if name not in sys.modules:
+            with _lock:
+                start = time.perf_counter()
+                importlib.import_module(name)
+                load_times.setdefault(name, time.perf_counter() - start)
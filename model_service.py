@@ -0,0 +1,234 @@
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+
+# Weights of the GD&T symbol detector
+DEFAULT_MODEL_PATH = r'D:\siri\calipers\prometrix\prometrix\best.pt'
+
+# Inference backend settings, can be overridden in .env
+#   YOLO_BACKEND: torch (default), onnx or openvino
+#   YOLO_THREADS: CPU threads used for inference
+#   YOLO_INT8:    1 to run an INT8 quantized graph (onnx/openvino only)
+#   YOLO_TILED:        1 to run full page detection on overlapping tiles at full resolution
+#   YOLO_TILE_SIZE:    Tile edge in pixels for tiled page detection
+#   YOLO_TILE_OVERLAP: Fraction of the tile shared with its neighbours
+#   YOLO_TILE_BATCH:   Tiles sent through the model per run
+DEFAULT_TILE_SIZE = 640
+DEFAULT_TILE_OVERLAP = 0.2
+DEFAULT_TILE_BATCH = 8
+TILE_MERGE_IOU = 0.5
+
+
+class YOLOModelService:
+    """Process-wide YOLO detector that is loaded once, on first use or in the background"""
+
+    def __init__(self, model_path: str = DEFAULT_MODEL_PATH, backend: Optional[str] = None,
+                 num_threads: Optional[int] = None, int8: Optional[bool] = None):
+        self.model_path = model_path
+        self.backend = backend
+        self.num_threads = num_threads
+        self.int8 = int8
+        self._model = None
+        self._lock = threading.Lock()
+        self._load_failed = False
+        self.load_error = None  # Why the last load failed
+        self._preload_thread = None
+
+        # Load statistics
+        self.load_time = None  # Seconds spent loading the weights
+        self.memory_footprint = None  # Bytes held by the model (RSS delta or tensor sizes)
+        self.last_tile_timings = []  # [{'tile': (x, y, w, h), 'time': seconds}] of the last tiled run
+
+    def is_loaded(self) -> bool:
+        """Check if the weights are already in memory"""
+        return self._model is not None
+
+    def get_model(self):
+        """Return the loaded inference backend, loading it on first call; None if loading failed"""
+        if self._model is not None or self._load_failed:
+            return self._model
+
+        with self._lock:
+            # Another thread may have finished loading while we waited
+            if self._model is None and not self._load_failed:
+                self._load()
+        return self._model
+
+    def preload(self):
+        """Load the model in a background thread so the UI is not blocked"""
+        if self._model is not None or self._load_failed:
+            return
+        if self._preload_thread and self._preload_thread.is_alive():
+            return
+
+        self._preload_thread = threading.Thread(target=self.get_model, name="yolo-preload", daemon=True)
+        self._preload_thread.start()
+
+    def warmup(self) -> Optional[float]:
+        """Run the detector once on a blank tile, loading it first if needed.
+
+        The first inference pays for lazy initialisation (graph optimisation,
+        allocator growth); doing it here keeps it out of the first selection.
+        Returns the seconds of the dummy inference, None if no model is available.
+        """
+        model = self.get_model()
+        if model is None:
+            return None
+
+        import numpy as np
+
+        settings = self.get_tile_settings()
+        blank = np.full((settings['tile_size'], settings['tile_size'], 3), 255, dtype=np.uint8)
+        start = time.perf_counter()
+        if settings['enabled']:
+            model.detect_batch([blank], 0.99)
+        else:
+            model.detect(blank, 0.99)
+        return time.perf_counter() - start
+
+    def detect(self, image, conf_threshold: float = 0.25) -> List[Dict]:
+        """Run the detector on a BGR image.
+
+        Returns a list of {'box': [x1, y1, x2, y2], 'confidence', 'class', 'class_name'}
+        regardless of the backend, or an empty list if no model is available.
+        """
+        model = self.get_model()
+        if model is None:
+            return []
+        return model.detect(image, conf_threshold)
+
+    def detect_tiled(self, image, mask=None, conf_threshold: float = 0.25, tile_size: Optional[int] = None,
+                     overlap: Optional[float] = None, batch_size: Optional[int] = None) -> List[Dict]:
+        """Run the detector on overlapping full resolution tiles of a large image.
+
+        Only tiles touching the mask (e.g. the drawing frame from find_innermost_boundary)
+        are processed. Boxes are mapped back to image coordinates and duplicates from
+        overlapping tiles are merged with NMS. Per-tile timings are kept in
+        last_tile_timings.
+        """
+        self.last_tile_timings = []
+        model = self.get_model()
+        if model is None:
+            return []
+
+        from inference_backends import plan_tiles, merge_detections
+
+        defaults = self.get_tile_settings()
+        tile_size = tile_size or defaults['tile_size']
+        overlap = defaults['overlap'] if overlap is None else overlap
+        batch_size = batch_size or defaults['batch_size']
+
+        tiles = plan_tiles(image.shape, tile_size, overlap, mask)
+        detections = []
+        start = time.perf_counter()
+
+        for batch_start in range(0, len(tiles), batch_size):
+            batch = tiles[batch_start:batch_start + batch_size]
+            crops = [image[y:y + h, x:x + w] for x, y, w, h in batch]
+
+            batch_timer = time.perf_counter()
+            batch_results = model.detect_batch(crops, conf_threshold)
+            per_tile = (time.perf_counter() - batch_timer) / len(batch)
+
+            for (x, y, w, h), tile_detections in zip(batch, batch_results):
+                self.last_tile_timings.append({'tile': (x, y, w, h), 'time': per_tile})
+                for detection in tile_detections:
+                    x1, y1, x2, y2 = detection['box']
+                    detections.append({**detection, 'box': [x1 + x, y1 + y, x2 + x, y2 + y]})
+
+        merged = merge_detections(detections, TILE_MERGE_IOU)
+
+        if tiles:
+            times = [timing['time'] for timing in self.last_tile_timings]
+            print(f"Tiled detection: {len(tiles)} tiles of {tile_size}px (overlap {overlap:.0%}, batch {batch_size}) "
+                  f"in {time.perf_counter() - start:.2f}s, {sum(times) / len(times) * 1000:.1f}ms/tile "
+                  f"(max {max(times) * 1000:.1f}ms), {len(detections)} boxes merged to {len(merged)}")
+        return merged
+
+    @staticmethod
+    def get_tile_settings() -> dict:
+        """Tiled detection settings from the environment"""
+        return {
+            'enabled': os.getenv('YOLO_TILED', '0').lower() in ('1', 'true', 'yes'),
+            'tile_size': int(os.getenv('YOLO_TILE_SIZE', DEFAULT_TILE_SIZE)),
+            'overlap': float(os.getenv('YOLO_TILE_OVERLAP', DEFAULT_TILE_OVERLAP)),
+            'batch_size': int(os.getenv('YOLO_TILE_BATCH', DEFAULT_TILE_BATCH))
+        }
+
+    def _resolve_settings(self):
+        """Constructor arguments win over environment settings"""
+        backend = self.backend or os.getenv('YOLO_BACKEND', 'torch')
+        num_threads = self.num_threads
+        if num_threads is None and os.getenv('YOLO_THREADS'):
+            num_threads = int(os.getenv('YOLO_THREADS'))
+        int8 = self.int8
+        if int8 is None:
+            int8 = os.getenv('YOLO_INT8', '0').lower() in ('1', 'true', 'yes')
+        return backend, num_threads, int8
+
+    def _load(self):
+        """Load the weights and record load time and memory footprint"""
+        try:
+            backend, num_threads, int8 = self._resolve_settings()
+            rss_before = self._get_process_rss()
+            start = time.perf_counter()
+
+            # Imported here so torch/onnxruntime are only pulled in when detection is actually used
+            from inference_backends import create_backend
+            self._model = create_backend(backend, self.model_path, num_threads=num_threads, int8=int8)
+
+            self.load_time = time.perf_counter() - start
+            rss_after = self._get_process_rss()
+            if rss_before is not None and rss_after is not None and rss_after > rss_before:
+                self.memory_footprint = rss_after - rss_before
+            else:
+                self.memory_footprint = self._model.memory_bytes()
+
+            print(f"Loaded YOLO model from {os.path.basename(self.model_path)} with {self._model.name} backend "
+                  f"in {self.load_time:.2f}s ({self._format_bytes(self.memory_footprint)})")
+
+        except Exception as e:
+            print(f"Error loading YOLO model: {str(e)}")
+            self._model = None
+            self._load_failed = True
+            self.load_error = str(e)
+
+    def get_stats(self) -> dict:
+        """Return load statistics of the model"""
+        return {
+            'model_path': self.model_path,
+            'backend': self._model.name if self._model is not None else None,
+            'loaded': self.is_loaded(),
+            'load_time': self.load_time,
+            'memory_footprint': self.memory_footprint
+        }
+
+    def unload(self):
+        """Release the model so the next use loads it again"""
+        with self._lock:
+            self._model = None
+            self._load_failed = False
+            self.load_error = None
+            self.load_time = None
+            self.memory_footprint = None
+
+    @staticmethod
+    def _get_process_rss() -> Optional[int]:
+        """Resident memory of this process in bytes, None if psutil is unavailable"""
+        try:
+            import psutil
+            return psutil.Process(os.getpid()).memory_info().rss
+        except Exception:
+            return None
+
+    @staticmethod
+    def _format_bytes(size) -> str:
+        if size is None:
+            return "size unknown"
+        return f"{size / (1024 * 1024):.1f} MB"
+
+
+# Create singleton instance
+yolo_service = YOLOModelService()
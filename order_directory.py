@@ -0,0 +1,118 @@
+import os
+import threading
+import time
+
+from api_endpoints import api
+from order_search import OrderSearchIndex
+
+
+# Order directory refresh, can be overridden in .env
+#   ORDER_CACHE_TTL: Seconds the list of all orders is reused before it is fetched again
+DEFAULT_ORDER_CACHE_TTL = 300
+
+
+class OrderDirectory:
+    """Session cache of /planning/all_orders indexed by production order and part number.
+
+    The list is fetched once and reused until it is older than the TTL. Looking up
+    a production order that is not in the list refreshes it once, so orders created
+    during the session are still found.
+    """
+
+    def __init__(self, ttl=None):
+        self.ttl = float(os.getenv('ORDER_CACHE_TTL', DEFAULT_ORDER_CACHE_TTL)) if ttl is None else ttl
+        self._orders = []
+        self._by_production_order = {}
+        self._by_part_number = {}
+        self._loaded_at = None
+        self._search_index = None
+        self._lock = threading.RLock()
+
+    def get_orders(self, force=False):
+        """All orders, fetched from the API when the cached list is missing or stale"""
+        if force or self._is_stale():
+            self.refresh()
+        with self._lock:
+            return list(self._orders)
+
+    def refresh(self):
+        """Fetch the order list again; a failed fetch keeps the previous list.
+
+        The request runs without holding the lock, so lookups from other threads
+        are answered from the current list meanwhile.
+        """
+        orders = api.get_all_orders()
+        with self._lock:
+            if not orders:
+                if self._orders:
+                    print("Error refreshing order list, using cached orders")
+                return False
+            self._set_orders(orders)
+            return True
+
+    def get_order(self, production_order):
+        """Order of a production order, or None"""
+        key = str(production_order)
+        refreshed = self._is_stale() and self.refresh()
+        with self._lock:
+            order = self._by_production_order.get(key)
+        if order is None and not refreshed:
+            # Possibly created after the list was fetched
+            self.refresh()
+            with self._lock:
+                order = self._by_production_order.get(key)
+        return order
+
+    def find_order_id(self, production_order):
+        """Order id of a production order, or None"""
+        order = self.get_order(production_order)
+        return order.get('id') if order else None
+
+    def orders_for_part(self, part_number):
+        """Orders of a part number"""
+        if self._is_stale():
+            self.refresh()
+        with self._lock:
+            return list(self._by_part_number.get(str(part_number), []))
+
+    def get_search_index(self, force=False):
+        """Search index over the cached orders, rebuilt whenever the list is refreshed.
+
+        Building it takes a moment for large lists, call it off the GUI thread.
+        """
+        if force or self._is_stale():
+            self.refresh()
+        with self._lock:
+            if self._search_index is not None:
+                return self._search_index
+            orders = self._orders
+
+        search_index = OrderSearchIndex(orders)
+        with self._lock:
+            # Keep it unless the list was replaced while it was built
+            if self._orders is orders and self._search_index is None:
+                self._search_index = search_index
+        return search_index
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = None
+
+    def _is_stale(self):
+        with self._lock:
+            return self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl
+
+    def _set_orders(self, orders):
+        self._orders = list(orders)
+        self._search_index = None
+        self._by_production_order = {}
+        self._by_part_number = {}
+        for order in self._orders:
+            # First entry wins, as with the previous linear scans
+            self._by_production_order.setdefault(str(order.get('production_order')), order)
+            self._by_part_number.setdefault(str(order.get('part_number')), []).append(order)
+        self._loaded_at = time.monotonic()
+
+
+# Create singleton instance
+order_directory = OrderDirectory()
@@ -0,0 +1,82 @@
+import numpy as np
+
+
+NGRAM = 3  # Length of the indexed substrings
+FIELD_SEPARATOR = "\x00"  # Between part number and production order, so no match spans both
+
+
+class OrderSearchIndex:
+    """Substring search over the part numbers and production orders of a list of orders.
+
+    Every row is indexed by the trigrams of its lowercased part number and
+    production order. A query of three characters or more takes the rows having
+    all of its trigrams and checks them for the substring. A query that extends
+    the previous one (more characters typed) only rechecks the previous result.
+    Results are the same as `query in part_number.lower() or query in
+    production_order.lower()`.
+    """
+
+    def __init__(self, orders):
+        self.orders = list(orders)
+        self.part_numbers = [str(order.get('part_number') or '') for order in self.orders]
+        self.production_orders = [str(order.get('production_order') or '') for order in self.orders]
+        self.texts = [f"{part}{FIELD_SEPARATOR}{po}".lower()
+                      for part, po in zip(self.part_numbers, self.production_orders)]
+        self.all_rows = np.arange(len(self.texts), dtype=np.int32)
+
+        postings = {}
+        for row, text in enumerate(self.texts):
+            for gram in {text[i:i + NGRAM] for i in range(len(text) - NGRAM + 1)}:
+                if FIELD_SEPARATOR not in gram:
+                    postings.setdefault(gram, []).append(row)
+        self.postings = {gram: np.array(rows, dtype=np.int32) for gram, rows in postings.items()}
+
+        self._last_query = None
+        self._last_rows = None
+
+    def __len__(self):
+        return len(self.texts)
+
+    def search(self, query):
+        """Sorted array of the rows matching query (all rows for an empty query)"""
+        query = query.lower()
+        if not query:
+            rows = self.all_rows
+        elif FIELD_SEPARATOR in query:
+            rows = self.all_rows[:0]
+        else:
+            if self._last_query and self._last_query in query:
+                candidates = self._last_rows  # Narrow the previous result
+            else:
+                candidates = self._candidates(query)
+            rows = self._verify(query, candidates)
+
+        self._last_query = query
+        self._last_rows = rows
+        return rows
+
+    def _candidates(self, query):
+        """Rows containing every trigram of the query"""
+        if len(query) < NGRAM:
+            return self.all_rows
+
+        grams = {query[i:i + NGRAM] for i in range(len(query) - NGRAM + 1)}
+        lists = []
+        for gram in grams:
+            rows = self.postings.get(gram)
+            if rows is None:
+                return self.all_rows[:0]
+            lists.append(rows)
+
+        # Intersect starting with the rarest trigram
+        lists.sort(key=len)
+        candidates = lists[0]
+        for rows in lists[1:]:
+            if len(candidates) == 0:
+                break
+            candidates = np.intersect1d(candidates, rows, assume_unique=True)
+        return candidates
+
+    def _verify(self, query, candidates):
+        texts = self.texts
+        return np.fromiter((row for row in candidates.tolist() if query in texts[row]), dtype=np.int32)
@@ -0,0 +1,154 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from PyQt5.QtGui import QImage, QPixmap
+
+from lazy_imports import lazy_import
+
+fitz = lazy_import('fitz')  # Imported on first use
+
+
+# Memory budget of the page raster cache, can be overridden in .env
+#   PAGE_CACHE_MB: Megabytes of rasters (NumPy + QPixmap) kept in memory
+DEFAULT_CACHE_MB = 512
+
+
+class PageRaster:
+    """One decoded page raster, shared as NumPy array (detection input) and QImage/QPixmap"""
+
+    def __init__(self, key, samples, width, height, stride):
+        self.key = key
+        self.width = width
+        self.height = height
+        # RGB, owned by this object so QImage views stay valid while it is cached
+        self.array = np.frombuffer(samples, dtype=np.uint8).reshape(height, stride)[:, :width * 3] \
+            .reshape(height, width, 3).copy()
+        self._qimage = None
+        self._pixmap = None
+
+    @property
+    def nbytes(self):
+        """Memory held by the array and the derived images"""
+        size = self.array.nbytes
+        if self._pixmap is not None:
+            size += self.width * self.height * 4
+        return size
+
+    def qimage(self):
+        """QImage viewing the array buffer (no copy)"""
+        if self._qimage is None:
+            self._qimage = QImage(self.array.data, self.width, self.height, self.width * 3, QImage.Format_RGB888)
+        return self._qimage
+
+    def pixmap(self):
+        """QPixmap of the page, created on first use (GUI thread only)"""
+        if self._pixmap is None:
+            self._pixmap = QPixmap.fromImage(self.qimage())
+        return self._pixmap
+
+
+class PageRasterCache:
+    """LRU cache of page rasters keyed by (document hash, page, rotation, zoom)"""
+
+    def __init__(self, max_bytes=None):
+        if max_bytes is None:
+            max_bytes = int(float(os.getenv('PAGE_CACHE_MB', DEFAULT_CACHE_MB)) * 1024 * 1024)
+        self.max_bytes = max_bytes
+        self._rasters = OrderedDict()
+        self._document_hashes = {}
+        self._lock = threading.RLock()
+
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, page, zoom, rotation=0):
+        """Return the PageRaster of a page, rendering it on a miss.
+
+        rotation is applied on top of the page's own rotation (set_rotation),
+        both are part of the key.
+        """
+        key = (self.document_hash(page.parent), page.number, page.rotation, rotation % 360, round(zoom, 4))
+
+        with self._lock:
+            raster = self._rasters.get(key)
+            if raster is not None:
+                self._rasters.move_to_end(key)
+                self.hits += 1
+                return raster
+            self.misses += 1
+
+        matrix = fitz.Matrix(zoom, zoom)
+        if rotation:
+            matrix = matrix.prerotate(rotation)
+        pix = page.get_pixmap(matrix=matrix, alpha=False)
+        raster = PageRaster(key, pix.samples, pix.width, pix.height, pix.stride)
+
+        with self._lock:
+            self._rasters[key] = raster
+            self._rasters.move_to_end(key)
+            self._evict()
+        return raster
+
+    def document_hash(self, doc):
+        """Content hash of the document file, reused while the file is unchanged"""
+        path = getattr(doc, 'name', None)
+        if path and os.path.isfile(path):
+            stat = os.stat(path)
+            file_key = (path, stat.st_mtime, stat.st_size)
+            with self._lock:
+                doc_hash = self._document_hashes.get(file_key)
+            if doc_hash is None:
+                sha1 = hashlib.sha1()
+                with open(path, 'rb') as f:
+                    for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                        sha1.update(chunk)
+                doc_hash = sha1.hexdigest()
+                with self._lock:
+                    self._document_hashes[file_key] = doc_hash
+            # Remember the hash on the document, its file may be removed later (temporary downloads)
+            doc._raster_cache_hash = doc_hash
+            return doc_hash
+
+        doc_hash = getattr(doc, '_raster_cache_hash', None)
+        if doc_hash is None:
+            doc_hash = f"{path or 'memory'}:{id(doc)}"
+            doc._raster_cache_hash = doc_hash
+        return doc_hash
+
+    def current_bytes(self):
+        with self._lock:
+            return sum(raster.nbytes for raster in self._rasters.values())
+
+    def _evict(self):
+        """Drop least recently used rasters until the cache fits the budget (newest is always kept)"""
+        total = sum(raster.nbytes for raster in self._rasters.values())
+        while total > self.max_bytes and len(self._rasters) > 1:
+            _, raster = self._rasters.popitem(last=False)
+            total -= raster.nbytes
+
+    def trim(self):
+        """Re-apply the budget, e.g. after pixmaps were created for cached rasters"""
+        with self._lock:
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._rasters.clear()
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._rasters),
+                'bytes': sum(raster.nbytes for raster in self._rasters.values()),
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+
+# Create singleton instance
+page_raster_cache = PageRasterCache()
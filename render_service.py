@@ -0,0 +1,244 @@
+import itertools
+import os
+import shutil
+import tempfile
+from collections import OrderedDict
+
+from PyQt5 import sip
+from PyQt5.QtCore import QObject, pyqtSignal
+from PyQt5.QtGui import QImage, QPixmap
+
+from lazy_imports import lazy_import
+from page_cache import page_raster_cache
+
+# Imported on first use; the process pool itself is started with the first render
+fitz = lazy_import('fitz')
+shared_memory = lazy_import('multiprocessing.shared_memory')
+
+
+# Worker processes of the render pool, can be overridden in .env
+#   RENDER_WORKERS: Number of rasterization processes
+DEFAULT_RENDER_WORKERS = max(1, min(4, (os.cpu_count() or 2) - 1))
+
+
+# Documents opened by this worker process, keyed by document hash (most recent last)
+_worker_documents = OrderedDict()
+MAX_WORKER_DOCUMENTS = 4
+
+
+def _render_in_worker(doc_key, path, page_number, page_rotation, rotation, scale, clip, shm_name, shm_size):
+    """Render a page into a shared memory buffer allocated by the GUI process.
+
+    Runs in a pool process; every process keeps its own fitz.Document per file.
+    Returns (width, height, stride).
+    """
+    doc = _worker_documents.get(doc_key)
+    if doc is None:
+        doc = fitz.open(path)
+        _worker_documents[doc_key] = doc
+        while len(_worker_documents) > MAX_WORKER_DOCUMENTS:
+            _worker_documents.popitem(last=False)[1].close()
+    _worker_documents.move_to_end(doc_key)
+
+    page = doc[page_number]
+    if page.rotation != page_rotation:
+        page.set_rotation(page_rotation)
+
+    matrix = fitz.Matrix(scale, scale)
+    if rotation:
+        matrix = matrix.prerotate(rotation)
+    pix = page.get_pixmap(matrix=matrix, clip=fitz.Rect(clip) if clip else None, alpha=False)
+
+    size = pix.stride * pix.height
+    if size > shm_size:
+        raise ValueError(f"Rendered page needs {size} bytes, buffer has {shm_size}")
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        shm.buf[:size] = pix.samples
+    finally:
+        shm.close()
+    return pix.width, pix.height, pix.stride
+
+
+class RenderResult:
+    """Rendered RGB image living in shared memory, viewed as a QImage without a copy"""
+
+    def __init__(self, shm, width, height, stride):
+        self._shm = shm
+        self.width = width
+        self.height = height
+        self.stride = stride
+        self.image = QImage(sip.voidptr(shm.buf), width, height, stride, QImage.Format_RGB888)
+
+    def to_pixmap(self):
+        """Upload to a QPixmap and release the shared memory"""
+        pixmap = QPixmap.fromImage(self.image)
+        self.release()
+        return pixmap
+
+    def to_image(self):
+        """Detached QImage copy, releases the shared memory"""
+        image = self.image.copy()
+        self.release()
+        return image
+
+    def release(self):
+        if self._shm is None:
+            return
+        self.image = None
+        try:
+            self._shm.close()
+            self._shm.unlink()
+        except Exception as e:
+            print(f"Error releasing render buffer: {str(e)}")
+        self._shm = None
+
+    def __del__(self):
+        self.release()
+
+
+class _RenderJob:
+    def __init__(self, job_id, group, shm, future=None):
+        self.job_id = job_id
+        self.group = group
+        self.shm = shm
+        self.future = future
+        self.cancelled = False
+
+
+class RenderService(QObject):
+    """Pool of worker processes rasterizing PDF pages off the GUI thread.
+
+    Jobs are (page, rotation, scale, clip). Results arrive through the rendered
+    signal as RenderResult objects backed by shared memory. Submitting a job with
+    a group cancels the earlier jobs of that group that are still outstanding.
+    """
+    rendered = pyqtSignal(int, object)  # (job id, RenderResult)
+    failed = pyqtSignal(int, str)  # (job id, error message)
+    _job_done = pyqtSignal(int)
+
+    def __init__(self, max_workers=None, parent=None):
+        super().__init__(parent)
+        self.max_workers = max_workers or int(os.getenv('RENDER_WORKERS', DEFAULT_RENDER_WORKERS))
+        self._executor = None
+        self._jobs = {}
+        self._job_ids = itertools.count(1)
+        self._temp_dir = None
+        self._document_paths = {}  # Document hash -> file the workers open
+        self._job_done.connect(self._on_job_done)
+
+    def submit(self, page, scale=1.0, rotation=0, clip=None, group=None):
+        """Queue a render of page and return the job id"""
+        if group is not None:
+            self.cancel_group(group)
+
+        matrix = fitz.Matrix(scale, scale)
+        if rotation:
+            matrix = matrix.prerotate(rotation)
+        area = page.rect if clip is None else fitz.Rect(clip) & page.rect
+        irect = (area * matrix).irect
+        # One spare row/column for rounding differences in the worker
+        shm = shared_memory.SharedMemory(create=True, size=max(1, (irect.width + 1) * (irect.height + 1) * 3))
+
+        job_id = next(self._job_ids)
+        job = _RenderJob(job_id, group, shm)
+        self._jobs[job_id] = job
+
+        try:
+            job.future = self._get_executor().submit(
+                _render_in_worker, page_raster_cache.document_hash(page.parent),
+                self._document_path(page.parent), page.number, page.rotation,
+                rotation, scale, tuple(clip) if clip is not None else None, shm.name, shm.size
+            )
+        except Exception:
+            self._jobs.pop(job_id, None)
+            self._release_buffer(shm)
+            raise
+
+        job.future.add_done_callback(lambda _future, job_id=job_id: self._job_done.emit(job_id))
+        return job_id
+
+    def cancel(self, job_id):
+        """Cancel a job; queued jobs never run and running jobs are discarded"""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return
+        job.cancelled = True
+        if job.future is not None:
+            job.future.cancel()
+
+    def cancel_group(self, group):
+        for job in list(self._jobs.values()):
+            if job.group == group:
+                self.cancel(job.job_id)
+
+    def shutdown(self):
+        """Stop the workers and free all buffers and temporary files"""
+        for job_id in list(self._jobs):
+            self.cancel(job_id)
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+        for job in self._jobs.values():
+            self._release_buffer(job.shm)
+        self._jobs.clear()
+        if self._temp_dir:
+            shutil.rmtree(self._temp_dir, ignore_errors=True)
+            self._temp_dir = None
+        self._document_paths.clear()
+
+    def _on_job_done(self, job_id):
+        job = self._jobs.pop(job_id, None)
+        if job is None:
+            return
+
+        if job.cancelled or job.future.cancelled():
+            self._release_buffer(job.shm)
+            return
+
+        error = job.future.exception()
+        if error is not None:
+            self._release_buffer(job.shm)
+            print(f"Error rendering page: {str(error)}")
+            self.failed.emit(job_id, str(error))
+            return
+
+        width, height, stride = job.future.result()
+        self.rendered.emit(job_id, RenderResult(job.shm, width, height, stride))
+
+    def _get_executor(self):
+        if self._executor is None:
+            from concurrent.futures import ProcessPoolExecutor
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def _document_path(self, doc):
+        """File the workers can open for a document, written out if it only exists in memory"""
+        doc_hash = page_raster_cache.document_hash(doc)
+        path = self._document_paths.get(doc_hash)
+        if path and os.path.isfile(path):
+            return path
+
+        if doc.name and os.path.isfile(doc.name):
+            path = doc.name
+        else:
+            if self._temp_dir is None:
+                self._temp_dir = tempfile.mkdtemp(prefix="smartmetrology_render_")
+            path = os.path.join(self._temp_dir, f"{doc_hash.replace(':', '_')}.pdf")
+            with open(path, 'wb') as f:
+                f.write(doc.tobytes())
+        self._document_paths[doc_hash] = path
+        return path
+
+    @staticmethod
+    def _release_buffer(shm):
+        try:
+            shm.close()
+            shm.unlink()
+        except Exception:
+            pass
+
+
+# Create singleton instance
+render_service = RenderService()
@@ -0,0 +1,143 @@
+import math
+from collections import OrderedDict
+
+from PyQt5.QtCore import QRectF
+from PyQt5.QtGui import QImage, QPixmap
+from PyQt5.QtWidgets import QGraphicsItem, QGraphicsObject, QStyleOptionGraphicsItem
+
+from lazy_imports import lazy_import
+from page_cache import page_raster_cache
+from render_service import render_service
+
+fitz = lazy_import('fitz')  # Imported on first use
+
+
+SCENE_ZOOM = 2  # Scene coordinates are PDF points * 2
+TILE_SIZE = 512  # Tile edge in device pixels
+OVERVIEW_SIZE = 2048  # Longest edge of the coarse overview shown before tiles arrive
+MIN_LEVEL = -3  # Pyramid levels are powers of two of the scene scale
+MAX_LEVEL = 3
+MAX_CACHED_TILES = 192
+
+
+class TiledPageItem(QGraphicsObject):
+    """PDF page drawn as a multi-resolution tile pyramid.
+
+    A coarse overview is painted at once and sharp tiles for the visible area at
+    the current zoom are rendered by the render service worker processes and
+    filled in as they arrive. Painting outside a view (scene.render for zone
+    detection or PDF export) uses the full 2x page raster, as before.
+    """
+
+    def __init__(self, page, renderer=None, parent=None):
+        super().__init__(parent)
+        self.page = page
+        self.renderer = renderer or render_service
+        # Needed for option.exposedRect to be the visible part instead of the whole page
+        self.setFlag(QGraphicsItem.ItemUsesExtendedStyleOption)
+
+        rect = fitz.Rect(page.rect) * fitz.Matrix(SCENE_ZOOM, SCENE_ZOOM)
+        self._bounds = QRectF(0, 0, rect.irect.width, rect.irect.height)
+
+        # Coarse overview rendered synchronously
+        overview_zoom = min(SCENE_ZOOM, OVERVIEW_SIZE / max(page.rect.width, page.rect.height))
+        pix = page.get_pixmap(matrix=fitz.Matrix(overview_zoom, overview_zoom), alpha=False)
+        self.overview = QPixmap.fromImage(
+            QImage(pix.samples, pix.width, pix.height, pix.stride, QImage.Format_RGB888).copy()
+        )
+
+        self.tiles = OrderedDict()  # (level, tx, ty) -> QPixmap
+        self.pending = {}  # Render job id -> tile key
+        self.current_level = None
+
+        self.renderer.rendered.connect(self._on_tile_rendered)
+
+    def boundingRect(self):
+        return self._bounds
+
+    def paint(self, painter, option, widget=None):
+        exposed = option.exposedRect.intersected(self._bounds)
+        if exposed.isEmpty():
+            return
+
+        if widget is None:
+            # Not painting into a view: draw the full resolution page raster
+            pixmap = page_raster_cache.get(self.page, SCENE_ZOOM).pixmap()
+            page_raster_cache.trim()
+            painter.drawPixmap(self._bounds, pixmap, QRectF(pixmap.rect()))
+            return
+
+        self._draw_scaled(painter, exposed, self.overview, self._bounds)
+
+        lod = QStyleOptionGraphicsItem.levelOfDetailFromTransform(painter.worldTransform())
+        level = self._level_for_scale(lod)
+        if self._bounds.width() * 2 ** level <= self.overview.width():
+            return  # Overview is already sharp enough
+
+        if level != self.current_level:
+            # Tiles of the previous zoom level are no longer needed
+            self.current_level = level
+            for job_id, key in list(self.pending.items()):
+                if key[0] != level:
+                    self.renderer.cancel(job_id)
+                    del self.pending[job_id]
+        requested = set(self.pending.values())
+
+        tile_scene_size = TILE_SIZE / 2 ** level
+        tx1, ty1 = int(exposed.left() // tile_scene_size), int(exposed.top() // tile_scene_size)
+        tx2, ty2 = int(exposed.right() // tile_scene_size), int(exposed.bottom() // tile_scene_size)
+
+        for ty in range(ty1, ty2 + 1):
+            for tx in range(tx1, tx2 + 1):
+                key = (level, tx, ty)
+                tile_rect = QRectF(tx * tile_scene_size, ty * tile_scene_size,
+                                   tile_scene_size, tile_scene_size).intersected(self._bounds)
+                if tile_rect.isEmpty():
+                    continue
+
+                tile = self.tiles.get(key)
+                if tile is not None:
+                    self.tiles.move_to_end(key)
+                    painter.drawPixmap(tile_rect, tile, QRectF(tile.rect()))
+                elif key not in requested:
+                    clip = fitz.Rect(tile_rect.left(), tile_rect.top(),
+                                     tile_rect.right(), tile_rect.bottom()) / SCENE_ZOOM
+                    job_id = self.renderer.submit(self.page, scale=SCENE_ZOOM * 2 ** level, clip=clip)
+                    self.pending[job_id] = key
+
+    def _on_tile_rendered(self, job_id, result):
+        key = self.pending.pop(job_id, None)
+        if key is None:
+            return  # Not one of our tiles
+        self.tiles[key] = result.to_pixmap()
+        while len(self.tiles) > MAX_CACHED_TILES:
+            self.tiles.popitem(last=False)
+
+        level, tx, ty = key
+        tile_scene_size = TILE_SIZE / 2 ** level
+        self.update(QRectF(tx * tile_scene_size, ty * tile_scene_size, tile_scene_size, tile_scene_size))
+
+    def release(self):
+        """Stop receiving tiles, called when the page is replaced"""
+        for job_id in self.pending:
+            self.renderer.cancel(job_id)
+        try:
+            self.renderer.rendered.disconnect(self._on_tile_rendered)
+        except TypeError:
+            pass
+        self.tiles.clear()
+        self.pending.clear()
+
+    @staticmethod
+    def _level_for_scale(scale):
+        """Smallest power of two pyramid level at least as sharp as the view scale"""
+        level = math.ceil(math.log2(max(scale, 1e-6)))
+        return max(MIN_LEVEL, min(MAX_LEVEL, level))
+
+    @staticmethod
+    def _draw_scaled(painter, target, pixmap, bounds):
+        """Draw the part of a pixmap covering bounds that falls inside target"""
+        sx = pixmap.width() / bounds.width()
+        sy = pixmap.height() / bounds.height()
+        source = QRectF(target.left() * sx, target.top() * sy, target.width() * sx, target.height() * sy)
+        painter.drawPixmap(target, pixmap, source)
@@ -0,0 +1,121 @@
+import os
+import time
+
+from PyQt5 import QtCore
+
+
+# Background warm-up after the main window is shown, can be overridden in .env
+#   WARMUP: 0 to skip the warm-up entirely
+#   WARMUP_MIN_RAM_MB: Machines with less physical memory do not preload the detector
+#   WARMUP_DELAY_MS: Milliseconds after the window is shown before the warm-up starts
+DEFAULT_WARMUP_MIN_RAM_MB = 4096
+DEFAULT_WARMUP_DELAY_MS = 500
+
+
+def warmup_enabled():
+    return os.getenv('WARMUP', '1').lower() in ('1', 'true', 'yes')
+
+
+def total_memory_mb():
+    """Physical memory of this machine in megabytes, None if psutil is unavailable"""
+    try:
+        import psutil
+        return psutil.virtual_memory().total / (1024 * 1024)
+    except Exception:
+        return None
+
+
+def detector_warmup_allowed():
+    """False on machines below WARMUP_MIN_RAM_MB, where the model is only loaded when detection runs"""
+    memory_mb = total_memory_mb()
+    return memory_mb is None or memory_mb >= float(os.getenv('WARMUP_MIN_RAM_MB', DEFAULT_WARMUP_MIN_RAM_MB))
+
+
+class WarmupWorker(QtCore.QThread):
+    """Run warm-up tasks one after another; a failing task is reported and skipped"""
+    task_started = QtCore.pyqtSignal(int, str)  # (task index, label)
+    task_finished = QtCore.pyqtSignal(int, str, bool, float)  # (task index, label, success, seconds)
+
+    def __init__(self, tasks, parent=None):
+        super().__init__(parent)
+        self.tasks = list(tasks)
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def run(self):
+        for index, (label, task) in enumerate(self.tasks):
+            if self._cancelled:
+                break
+            self.task_started.emit(index, label)
+            start = time.perf_counter()
+            try:
+                task()
+                ok = True
+            except Exception as e:
+                print(f"Error during warm-up ({label}): {str(e)}")
+                ok = False
+            self.task_finished.emit(index, label, ok, time.perf_counter() - start)
+
+
+class WarmupScheduler(QtCore.QObject):
+    """Runs expensive first-use initialisation at idle priority once the window is up.
+
+    Tasks are (label, callable) pairs run in the order they were added on a
+    single idle priority thread, so they never compete with the GUI thread for
+    a core. Anything a task initialises must be safe to initialise from another
+    thread, as the user may trigger the same work while the warm-up is running.
+    """
+    progress = QtCore.pyqtSignal(str)  # Status text for the indicator
+    finished = QtCore.pyqtSignal(dict)  # {label: seconds, or None if the task failed}
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.tasks = []
+        self.timings = {}
+        self._worker = None
+
+    def add_task(self, label, task):
+        self.tasks.append((label, task))
+
+    def start(self, delay_ms=None):
+        """Schedule the tasks; returns False if the warm-up is disabled"""
+        if not warmup_enabled() or not self.tasks:
+            return False
+        if delay_ms is None:
+            delay_ms = int(os.getenv('WARMUP_DELAY_MS', DEFAULT_WARMUP_DELAY_MS))
+        QtCore.QTimer.singleShot(delay_ms, self._run)
+        return True
+
+    def is_running(self):
+        return self._worker is not None and self._worker.isRunning()
+
+    def stop(self):
+        """Skip the remaining tasks and wait for the current one (called on quit)"""
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker.wait()
+
+    def _run(self):
+        if self._worker is not None:
+            return
+        self.timings = {}
+        self._worker = WarmupWorker(self.tasks, self)
+        self._worker.task_started.connect(self._on_task_started)
+        self._worker.task_finished.connect(self._on_task_finished)
+        self._worker.finished.connect(self._on_finished)
+        self._worker.start(QtCore.QThread.IdlePriority)
+
+    def _on_task_started(self, index, label):
+        self.progress.emit(f"Warming up: {label} ({index + 1}/{len(self.tasks)})")
+
+    def _on_task_finished(self, index, label, ok, seconds):
+        self.timings[label] = seconds if ok else None
+
+    def _on_finished(self):
+        summary = ", ".join(f"{label} {seconds:.2f}s" if seconds is not None else f"{label} failed"
+                            for label, seconds in self.timings.items())
+        print(f"Warm-up finished: {summary}")
+        self.progress.emit("Ready")
+        self.finished.emit(dict(self.timings))
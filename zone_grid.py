@@ -0,0 +1,328 @@
+import bisect
+import os
+
+import numpy as np
+
+from lazy_imports import lazy_import
+
+cv2 = lazy_import('cv2')  # Imported on first use
+
+
+class ZoneGrid:
+    """Field-division grid of one loaded page/rotation used for zone lookups"""
+
+    # Row labels A-Z, '?' beyond the 26th row
+    ROW_LETTERS = np.array([chr(65 + i) for i in range(26)] + ['?'])
+
+    def __init__(self, vertical_lines, horizontal_lines, boundary_rect, width, height, key=None):
+        self.vertical_lines = list(vertical_lines)
+        self.horizontal_lines = list(horizontal_lines)
+        self.boundary_rect = boundary_rect
+        self.width = width
+        self.height = height
+        self.key = key
+
+    @staticmethod
+    def _find_interval(lines, value):
+        """Index i with lines[i] <= value < lines[i + 1], falling back to the last interval"""
+        idx = bisect.bisect_right(lines, value) - 1
+        if 0 <= idx < len(lines) - 1:
+            return idx
+        return len(lines) - 2
+
+    def zone_for_point(self, x, y):
+        """Return the zone label (row letter + column number) for a scene point"""
+        # Find column (numbered right to left)
+        col_idx = self._find_interval(self.vertical_lines, x)
+        num_cols = len(self.vertical_lines) - 1
+        col_number = num_cols - col_idx
+
+        # Find row (lettered bottom to top)
+        row_idx = self._find_interval(self.horizontal_lines, y)
+        num_rows = len(self.horizontal_lines) - 1
+        row_idx = num_rows - row_idx - 1
+        row_letter = chr(65 + row_idx) if row_idx < 26 else '?'
+
+        return f"{row_letter}{col_number}"
+
+    @staticmethod
+    def _find_intervals(lines, values):
+        """Vectorized _find_interval over an array of values"""
+        idx = np.searchsorted(lines, values, side='right') - 1
+        fallback = len(lines) - 2
+        return np.where((idx >= 0) & (idx < len(lines) - 1), idx, fallback)
+
+    def assign_zones(self, midpoints):
+        """Return zone labels for an (N, 2) array of scene points in one pass"""
+        midpoints = np.asarray(midpoints, dtype=np.float64).reshape(-1, 2)
+
+        # Columns are numbered right to left
+        col_idx = self._find_intervals(np.asarray(self.vertical_lines), midpoints[:, 0])
+        col_numbers = (len(self.vertical_lines) - 1) - col_idx
+
+        # Rows are lettered bottom to top
+        row_idx = self._find_intervals(np.asarray(self.horizontal_lines), midpoints[:, 1])
+        row_idx = (len(self.horizontal_lines) - 1) - row_idx - 1
+        row_letters = ZoneGrid.ROW_LETTERS[np.minimum(row_idx, 26)]
+
+        return np.char.add(row_letters, col_numbers.astype(str))
+
+
+class ZoneGridDetector:
+    """Field-division grid detection on a BGR page image (no GUI involved)"""
+
+    @staticmethod
+    def find_innermost_boundary(image):
+        """Find the innermost boundary rectangle that contains the main technical drawing"""
+        # Convert to grayscale
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+        # Apply Gaussian blur
+        blurred = cv2.GaussianBlur(gray, (5, 5), 0)
+
+        # Apply adaptive thresholding
+        thresh = cv2.adaptiveThreshold(
+            blurred, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+            cv2.THRESH_BINARY_INV, 11, 2
+        )
+
+        # Find contours with RETR_TREE to get hierarchy
+        contours, hierarchy = cv2.findContours(
+            thresh, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE
+        )
+
+        height, width = image.shape[:2]
+        valid_rectangles = []
+
+        # Process each contour
+        for i, cnt in enumerate(contours):
+            epsilon = 0.01 * cv2.arcLength(cnt, True)
+            approx = cv2.approxPolyDP(cnt, epsilon, True)
+
+            x, y, w, h = cv2.boundingRect(cnt)
+            area = cv2.contourArea(cnt)
+            rect_area = w * h
+
+            is_valid = (
+                    len(approx) >= 4 and
+                    w > width * 0.1 and h > height * 0.1 and
+                    abs(area - rect_area) / rect_area < 0.4 and
+                    x >= 0 and y >= 0
+            )
+
+            if is_valid:
+                valid_rectangles.append({
+                    'contour': cnt,
+                    'area': area,
+                    'rect': (x, y, w, h)
+                })
+
+        if not valid_rectangles:
+            return None, None
+
+        valid_rectangles.sort(key=lambda x: x['area'], reverse=True)
+        main_rect = valid_rectangles[1]['rect'] if len(valid_rectangles) > 1 else valid_rectangles[0]['rect']
+        main_cnt = valid_rectangles[1]['contour'] if len(valid_rectangles) > 1 else valid_rectangles[0]['contour']
+
+        mask = np.zeros((height, width), dtype=np.uint8)
+        cv2.drawContours(mask, [main_cnt], -1, 255, -1)
+
+        return mask, main_rect
+
+    @staticmethod
+    def extract_content_outside_boundary(image, boundary_rect):
+        """Extract content outside the innermost boundary."""
+        result_img = image.copy()
+        x, y, w, h = boundary_rect
+        height, width = image.shape[:2]
+
+        # Define regions of interest: top margin and right margin
+        top_margin = image[0:y, x:x + w].copy()
+        right_margin = image[y:y + h, x + w:width].copy()
+
+        # Create a mask to highlight these regions
+        highlight_mask = np.zeros_like(image)
+        highlight_mask[0:y, x:x + w] = (255, 0, 0)  # Blue for top margin
+        highlight_mask[y:y + h, x + w:width] = (255, 0, 0)  # Blue for right margin
+
+        # Apply the highlight: blend with original image
+        alpha = 0.3  # Transparency factor
+        result_img = cv2.addWeighted(result_img, 1, highlight_mask, alpha, 0)
+
+        # Draw boundary lines to clearly show the innermost boundary
+        cv2.line(result_img, (x, y), (x + w, y), (0, 0, 255), 5)  # Top line in red
+        cv2.line(result_img, (x + w, y), (x + w, y + h), (0, 0, 255), 5)  # Right line in red
+
+        return result_img, top_margin, right_margin
+
+    @staticmethod
+    def detect_isolated_text_labels(image):
+        """Detect isolated text labels in the image."""
+        # Convert to grayscale
+        if len(image.shape) == 3:
+            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        else:
+            gray = image
+
+        # Apply thresholding - try multiple approaches for better coverage
+        _, binary = cv2.threshold(gray, 200, 255, cv2.THRESH_BINARY_INV)
+
+        # Find connected components (CC)
+        num_labels, labels, stats, centroids = cv2.connectedComponentsWithStats(binary, connectivity=8)
+
+        # Filter components by size to find text-like objects
+        min_area = 15  # Very small area threshold for single characters
+        max_area = 1000  # Maximum area for text
+
+        text_regions = []
+        result_img = cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR) if len(image.shape) == 2 else image.copy()
+
+        # Start from 1 to skip background (label 0)
+        for i in range(1, num_labels):
+            area = stats[i, cv2.CC_STAT_AREA]
+            width = stats[i, cv2.CC_STAT_WIDTH]
+            height = stats[i, cv2.CC_STAT_HEIGHT]
+            x = stats[i, cv2.CC_STAT_LEFT]
+            y = stats[i, cv2.CC_STAT_TOP]
+
+            aspect_ratio = width / height if height > 0 else 0
+
+            # Filter conditions for isolated text characters
+            if (min_area <= area <= max_area and
+                    0.2 <= aspect_ratio <= 5 and
+                    width <= 100 and height <= 100):  # Size constraints
+
+                text_regions.append((x, y, width, height))
+                cv2.rectangle(result_img, (x, y), (x + width, y + height), (0, 255, 0), 2)
+
+        return result_img, len(text_regions)
+
+    @staticmethod
+    def draw_grid_based_on_labels(image, top_label_count, right_label_count, output_folder):
+        """Draw grid based on detected labels and return grid positions."""
+        result_img = image.copy()
+        height, width = image.shape[:2]
+
+        vertical_lines = []
+        horizontal_lines = []
+
+        # Check if image is vertical (height > width)
+        is_vertical = height > width
+
+        if is_vertical:
+            # Force 4 divisions for vertical drawings
+            num_vertical_divisions = 4
+            num_horizontal_divisions = 4
+
+            # Get the boundary rectangle
+            boundary_mask, boundary_rect = ZoneGridDetector.find_innermost_boundary(image)
+            if boundary_rect is not None:
+                x, y, w, h = boundary_rect
+
+                horizontal_spacing = h / num_horizontal_divisions
+                vertical_spacing = w / num_vertical_divisions
+                # Create vertical lines starting from boundary left edge
+                for i in range(num_vertical_divisions + 1):
+                    grid_x = int(x + i * vertical_spacing)
+                    vertical_lines.append(grid_x)
+                    cv2.line(result_img, (grid_x, 0), (grid_x, height), (0, 0, 255), 2)
+
+                # Create horizontal lines starting from boundary top
+                for i in range(num_horizontal_divisions + 1):
+                    grid_y = int(y + i * horizontal_spacing)
+                    horizontal_lines.append(grid_y)
+                    cv2.line(result_img, (0, grid_y), (width, grid_y), (0, 0, 255), 2)
+
+
+        else:
+
+            '''boundary_mask, boundary_rect = ZoneGridDetector.find_innermost_boundary(image)
+            if boundary_rect is not None:
+                x, y, w, h = boundary_rect
+                print(boundary_rect)
+
+
+                # Create a copy of the image to draw the boundary
+                boundary_visualization = image.copy()
+
+                # Draw the rectangle in red
+                cv2.rectangle(boundary_visualization, (x, y), (x + w, y + h), (0, 0, 255), 2)
+
+                # Add text to show coordinates
+                text = f"x:{x}, y:{y}, w:{w}, h:{h}"
+                cv2.putText(boundary_visualization, text, (x, y-10), 
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+
+                # Save the visualization
+                cv2.imwrite('innermost_boundary.png', boundary_visualization)
+                print("Boundary visualization saved as 'innermost_boundary.png'")'''
+
+            # Original logic for horizontal drawings
+            if top_label_count > 0:
+                vertical_spacing = width / top_label_count
+                for i in range(top_label_count):
+                    grid_x = int(width - i * vertical_spacing)
+                    if grid_x > 0:
+                        cv2.line(result_img, (grid_x, 0), (grid_x, height), (0, 0, 255), 2)
+                        vertical_lines.append(grid_x)
+
+            vertical_lines.append(0)
+            vertical_lines.sort()
+
+            if right_label_count > 0:
+                horizontal_spacing = height / right_label_count
+                for i in range(right_label_count):
+                    grid_y = int(height - i * horizontal_spacing)
+                    if grid_y > 0:
+                        cv2.line(result_img, (0, grid_y), (width, grid_y), (0, 0, 255), 2)
+                        horizontal_lines.append(grid_y)
+
+            horizontal_lines.append(0)
+            horizontal_lines.sort()
+
+        # Save the grid image if output folder is provided
+        if output_folder:
+            grid_path = os.path.join(output_folder, "label_based_grid.png")
+            cv2.imwrite(grid_path, result_img)
+            print(f"Label-based grid image saved to {grid_path}")
+
+            # Print the pixel positions
+            print("Vertical grid lines (X positions):", vertical_lines)
+            print("Horizontal grid lines (Y positions):", horizontal_lines)
+
+        return result_img, vertical_lines, horizontal_lines
+
+    @staticmethod
+    def build_zone_grid(cv_image):
+        """Detect boundary, margin labels and grid lines once and return a ZoneGrid"""
+        # Find innermost boundary
+        boundary_mask, boundary_rect = ZoneGridDetector.find_innermost_boundary(cv_image)
+        if not boundary_rect:
+            print("Could not find boundary rectangle")
+            return None
+
+        # Extract content outside boundary
+        result_img, top_margin, right_margin = ZoneGridDetector.extract_content_outside_boundary(
+            cv_image, boundary_rect
+        )
+
+        # Check if margins are valid
+        if top_margin is None or right_margin is None or top_margin.size == 0 or right_margin.size == 0:
+            print("Invalid margins detected")
+            return None
+
+        # Detect isolated text labels from margins
+        top_label_img, top_label_count = ZoneGridDetector.detect_isolated_text_labels(top_margin)
+        right_label_img, right_label_count = ZoneGridDetector.detect_isolated_text_labels(right_margin)
+
+        # Create grid based on labels
+        grid_img, vertical_lines, horizontal_lines = ZoneGridDetector.draw_grid_based_on_labels(
+            cv_image, top_label_count, right_label_count, None
+        )
+
+        if not vertical_lines or not horizontal_lines:
+            print("Could not create grid lines")
+            return None
+
+        height, width = cv_image.shape[:2]
+        return ZoneGrid(vertical_lines, horizontal_lines, boundary_rect, width, height)